@@ -0,0 +1,78 @@
+import asyncio
+from logging.config import fileConfig
+
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from alembic import context
+
+from app.api.database.db import DATABASE_URL
+from app.api.models import Base
+
+# Import every model so autogenerate sees the full schema
+from app.api.models import (  # noqa: F401
+    card_model,
+    outbox_message,
+    paystack_webhook_event,
+    permission,
+    product,
+    role,
+    role_permission,
+    site_data,
+    site_module,
+    site_user,
+    transactions,
+    user_model,
+    user_site_summary,
+)
+
+config = context.config
+
+# The seed command runs inside the app and keeps its own logging setup
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL to stdout (`alembic upgrade head --sql`)."""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    """Run the migrations over a dedicated asyncpg connection."""
+    connectable = create_async_engine(DATABASE_URL, poolclass=pool.NullPool)
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await connectable.dispose()
+
+
+def run_migrations_online() -> None:
+    # The seed command passes in the connection that holds its advisory lock
+    if config.attributes.get("connection") is not None:
+        do_run_migrations(config.attributes["connection"])
+    else:
+        asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
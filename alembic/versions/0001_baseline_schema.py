@@ -0,0 +1,164 @@
+"""baseline schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+Exactly the schema init_db used to build with Base.metadata.create_all before
+migrations existed. Databases created that way are stamped at this revision by
+the seed command instead of running it, so nothing may be added here: later
+schema changes go in their own revisions.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('permissions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_permissions_name'), 'permissions', ['name'], unique=True)
+    op.create_table('products',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('product_title', sa.String(), nullable=False),
+    sa.Column('product_code', sa.String(), nullable=False),
+    sa.Column('item_group', sa.String(), nullable=False),
+    sa.Column('product_description', sa.Text(), nullable=False),
+    sa.Column('product_image', sa.String(), nullable=False),
+    sa.Column('benefits', sa.JSON(), nullable=True),
+    sa.Column('images', sa.JSON(), nullable=True),
+    sa.Column('plans', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('product_code')
+    )
+    op.create_index(op.f('ix_products_id'), 'products', ['id'], unique=False)
+    op.create_table('roles',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('role_permissions',
+    sa.Column('role_id', sa.UUID(), nullable=False),
+    sa.Column('permission_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['permission_id'], ['permissions.id'], ),
+    sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ),
+    sa.PrimaryKeyConstraint('role_id', 'permission_id')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('first_name', sa.String(), nullable=False),
+    sa.Column('last_name', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('country', sa.String(), nullable=True),
+    sa.Column('role_id', sa.UUID(), nullable=True),
+    sa.Column('password', sa.String(), nullable=False),
+    sa.Column('profile_picture', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_table('cards',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('card_name', sa.String(), nullable=True),
+    sa.Column('card_number', sa.String(), nullable=False),
+    sa.Column('expiry_date', sa.String(), nullable=False),
+    sa.Column('cvv', sa.String(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('is_default', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('card_name'),
+    sa.UniqueConstraint('card_number')
+    )
+    op.create_table('site_data',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('site_name', sa.String(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('total_users_count', sa.Integer(), nullable=True),
+    sa.Column('active_users_count', sa.Integer(), nullable=True),
+    sa.Column('active_modules_count', sa.Integer(), nullable=True),
+    sa.Column('total_site_counts', sa.Integer(), nullable=True),
+    sa.Column('active_site_counts', sa.Integer(), nullable=True),
+    sa.Column('active_sites', sa.Boolean(), nullable=True),
+    sa.Column('total_users', sa.JSON(), nullable=True),
+    sa.Column('active_users', sa.JSON(), nullable=True),
+    sa.Column('active_modules', sa.JSON(), nullable=True),
+    sa.Column('sites_data', sa.JSON(), nullable=True),
+    sa.Column('location', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_site_data_id'), 'site_data', ['id'], unique=False)
+    op.create_table('transactions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('plan', sa.String(), nullable=False),
+    sa.Column('payment_status', sa.String(), nullable=False),
+    sa.Column('first_name', sa.String(), nullable=False),
+    sa.Column('last_name', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('phone', sa.String(), nullable=False),
+    sa.Column('country', sa.String(), nullable=False),
+    sa.Column('company_name', sa.String(), nullable=False),
+    sa.Column('organization', sa.String(), nullable=False),
+    sa.Column('site_name', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('training_and_setup', sa.Boolean(), nullable=False),
+    sa.Column('valid_from', sa.DateTime(), nullable=False),
+    sa.Column('valid_upto', sa.DateTime(), nullable=False),
+    sa.Column('payment_reference', sa.String(), nullable=False),
+    sa.Column('transaction_id', sa.BigInteger(), nullable=False),
+    sa.Column('message', sa.String(), nullable=False),
+    sa.Column('paystack_status', sa.String(), nullable=True),
+    sa.Column('paystack_response', sa.JSON(), nullable=True),
+    sa.Column('site_creation_status', sa.String(), nullable=True),
+    sa.Column('site_creation_job_id', sa.UUID(), nullable=False),
+    sa.Column('site_creation_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_transactions_id'), 'transactions', ['id'], unique=False)
+    op.create_table('user_permissions',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('permission_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['permission_id'], ['permissions.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'permission_id')
+    )
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    op.drop_table('user_permissions')
+    op.drop_table('transactions')
+    op.drop_table('site_data')
+    op.drop_table('cards')
+    op.drop_table('users')
+    op.drop_table('role_permissions')
+    op.drop_table('roles')
+    op.drop_table('products')
+    op.drop_table('permissions')
+    # ### end Alembic commands ###
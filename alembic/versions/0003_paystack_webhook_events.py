@@ -0,0 +1,33 @@
+"""paystack webhook events
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00.000000
+
+Idempotency table for the Paystack webhook: one row per processed
+(event, reference), so redeliveries are acknowledged without reprocessing.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('paystack_webhook_events',
+    sa.Column('event', sa.String(), nullable=False),
+    sa.Column('reference', sa.String(), nullable=False),
+    sa.Column('paystack_transaction_id', sa.BigInteger(), nullable=True),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('event', 'reference', name='pk_paystack_webhook_events')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('paystack_webhook_events')
@@ -0,0 +1,35 @@
+"""hot lookup indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:00:00.000000
+
+Indexes for the columns the webhooks and dashboard filter on. Checked by
+tests/test_query_plans.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_transactions_site_name_created_at', 'transactions', ['site_name', sa.text('created_at DESC')], unique=False)
+    op.create_index(op.f('ix_transactions_transaction_id'), 'transactions', ['transaction_id'], unique=False)
+    op.create_index(op.f('ix_transactions_payment_reference'), 'transactions', ['payment_reference'], unique=False)
+    op.create_index(op.f('ix_transactions_user_id'), 'transactions', ['user_id'], unique=False)
+    op.create_index('ix_site_data_user_id_site_name', 'site_data', ['user_id', 'site_name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_site_data_user_id_site_name', table_name='site_data')
+    op.drop_index(op.f('ix_transactions_user_id'), table_name='transactions')
+    op.drop_index(op.f('ix_transactions_payment_reference'), table_name='transactions')
+    op.drop_index(op.f('ix_transactions_transaction_id'), table_name='transactions')
+    op.drop_index('ix_transactions_site_name_created_at', table_name='transactions')
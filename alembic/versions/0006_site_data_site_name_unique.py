@@ -0,0 +1,47 @@
+"""site_data site_name unique
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 14:00:00.000000
+
+The site-data webhook upserts with ON CONFLICT (site_name), which needs a
+unique constraint. Databases built by create_all can hold several rows per
+site_name, so duplicates are removed first, keeping the most recently updated
+row of each site. Databases that already have the constraint are left alone.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CONSTRAINT_NAME = 'site_data_site_name_key'
+
+
+def _has_site_name_constraint() -> bool:
+    constraints = sa.inspect(op.get_bind()).get_unique_constraints('site_data')
+    return any(constraint['column_names'] == ['site_name'] for constraint in constraints)
+
+
+def upgrade() -> None:
+    if _has_site_name_constraint():
+        return
+    op.execute(
+        "DELETE FROM site_data USING ("
+        "  SELECT id, row_number() OVER ("
+        "    PARTITION BY site_name ORDER BY updated_at DESC, created_at DESC, id DESC"
+        "  ) AS position FROM site_data"
+        ") AS ranked "
+        "WHERE site_data.id = ranked.id AND ranked.position > 1"
+    )
+    op.create_unique_constraint(CONSTRAINT_NAME, 'site_data', ['site_name'])
+
+
+def downgrade() -> None:
+    op.drop_constraint(CONSTRAINT_NAME, 'site_data', type_='unique')
@@ -0,0 +1,39 @@
+"""user site summaries
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 14:05:00.000000
+
+Per-user dashboard totals, maintained on write. Filled for existing users by
+the seed command's backfill. Skipped if the table already exists.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('user_site_summaries'):
+        return
+    op.create_table('user_site_summaries',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('total_sites', sa.Integer(), nullable=False),
+    sa.Column('active_sites', sa.Integer(), nullable=False),
+    sa.Column('total_users', sa.Integer(), nullable=False),
+    sa.Column('active_users', sa.Integer(), nullable=False),
+    sa.Column('active_modules', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_site_summaries')
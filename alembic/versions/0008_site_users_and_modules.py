@@ -0,0 +1,64 @@
+"""site users and modules
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 14:10:00.000000
+
+Child tables for the users and modules of each site, replacing the JSON
+columns on site_data for queries. Filled from the JSON columns by the seed
+command's backfill. Tables that already exist are skipped.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('site_modules'):
+        op.create_table('site_modules',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('site_id', sa.UUID(), nullable=False),
+        sa.Column('module_name', sa.String(), nullable=False),
+        sa.Column('app_name', sa.String(), nullable=True),
+        sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['site_id'], ['site_data.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('site_id', 'module_name', name='uq_site_modules_site_id_module_name')
+        )
+        op.create_index(op.f('ix_site_modules_app_name'), 'site_modules', ['app_name'], unique=False)
+        op.create_index('ix_site_modules_created_at', 'site_modules', ['created_at'], unique=False)
+        op.create_index(op.f('ix_site_modules_module_name'), 'site_modules', ['module_name'], unique=False)
+        op.create_index(op.f('ix_site_modules_site_id'), 'site_modules', ['site_id'], unique=False)
+    if not inspector.has_table('site_users'):
+        op.create_table('site_users',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('site_id', sa.UUID(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['site_id'], ['site_data.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('site_id', 'email', name='uq_site_users_site_id_email')
+        )
+        op.create_index(op.f('ix_site_users_email'), 'site_users', ['email'], unique=False)
+        op.create_index(op.f('ix_site_users_full_name'), 'site_users', ['full_name'], unique=False)
+        op.create_index(op.f('ix_site_users_site_id'), 'site_users', ['site_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('site_users')
+    op.drop_table('site_modules')
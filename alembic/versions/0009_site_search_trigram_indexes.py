@@ -0,0 +1,32 @@
+"""site search trigram indexes
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 14:15:00.000000
+
+pg_trgm GIN indexes behind the ILIKE search of /active-modules. Indexes that
+already exist are skipped.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_site_data_site_name_trgm', 'site_data', ['site_name'], unique=False, postgresql_using='gin', postgresql_ops={'site_name': 'gin_trgm_ops'}, if_not_exists=True)
+    op.create_index('ix_site_modules_app_name_trgm', 'site_modules', ['app_name'], unique=False, postgresql_using='gin', postgresql_ops={'app_name': 'gin_trgm_ops'}, if_not_exists=True)
+    op.create_index('ix_site_modules_module_name_trgm', 'site_modules', ['module_name'], unique=False, postgresql_using='gin', postgresql_ops={'module_name': 'gin_trgm_ops'}, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_site_modules_module_name_trgm', table_name='site_modules')
+    op.drop_index('ix_site_modules_app_name_trgm', table_name='site_modules')
+    op.drop_index('ix_site_data_site_name_trgm', table_name='site_data')
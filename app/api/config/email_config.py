@@ -1,28 +1,44 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from functools import lru_cache
 from app.api.config.settings import settings
 from pydantic import EmailStr
 from app.api.security.security import create_verification_token
+from app.api.utils.metrics import track_upstream
 #from datetime import datetime, timedelta
 # from jose import JWTError, jwt
 
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.SMTP_USER,
-    MAIL_PASSWORD=settings.SMTP_PASSWORD,
-    MAIL_FROM=settings.EMAIL_FROM,
-    MAIL_PORT=settings.SMTP_PORT,
-    MAIL_SERVER=settings.SMTP_SERVER,
-    MAIL_FROM_NAME=settings.PROJECT_NAME,
-    MAIL_STARTTLS=settings.MAIL_STARTTLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    USE_CREDENTIALS=True,
-)
+@lru_cache(maxsize=None)
+def get_fast_mail():
+    """
+    Builds the mail connection config and FastMail client on first use.
+    fastapi_mail is imported here so it stays off the app import path.
+    """
+    from fastapi_mail import FastMail, ConnectionConfig
 
+    conf = ConnectionConfig(
+        MAIL_USERNAME=settings.SMTP_USER,
+        MAIL_PASSWORD=settings.SMTP_PASSWORD,
+        MAIL_FROM=settings.EMAIL_FROM,
+        MAIL_PORT=settings.SMTP_PORT,
+        MAIL_SERVER=settings.SMTP_SERVER,
+        MAIL_FROM_NAME=settings.PROJECT_NAME,
+        MAIL_STARTTLS=settings.MAIL_STARTTLS,
+        MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
+        USE_CREDENTIALS=True,
+    )
+    return FastMail(conf)
+
+
+async def send_mail(message):
+    """Send through the shared FastMail client, timed as the 'smtp' upstream."""
+    with track_upstream("smtp", settings.SMTP_SERVER):
+        await get_fast_mail().send_message(message)
 
 
 class EmailService:
-    def __init__(self):
-        self.fm = FastMail(conf)
+    @property
+    def fm(self):
+        return get_fast_mail()
 
     async def send_verification_email(self, email: str, token: str, first_name: str):
         # HTML email template with purple activation button on white background
@@ -44,13 +60,15 @@ class EmailService:
         </html>
         """
 
+        from fastapi_mail import MessageSchema
+
         message = MessageSchema(
             subject="Email Verification",
             recipients=[email],
             body=html,
             subtype="html"  # Set subtype to HTML
         )
-        await self.fm.send_message(message)
+        await send_mail(message)
 
     async def handle_email_verification(self, db, email, first_name):
         verification_token = await create_verification_token(data={"email": email})
@@ -85,6 +103,8 @@ class PasswordResetMailService:
         """
         
         # Create the message object with the styled HTML content
+        from fastapi_mail import MessageSchema
+
         message = MessageSchema(
             subject="Password Reset Request",
             recipients=[email],  
@@ -92,9 +112,8 @@ class PasswordResetMailService:
             subtype="html"  
         )
 
-        # Initialize FastMail and send the email
-        fm = FastMail(conf)
-        await fm.send_message(message)
+        # Send through the shared FastMail client
+        await send_mail(message)
 
 
 
@@ -1,5 +1,10 @@
+from dotenv import load_dotenv
+from typing import Optional
 from pydantic_settings import BaseSettings
 
+# Load .env into os.environ once, for the modules that still read os.getenv
+load_dotenv()
+
 class Settings(BaseSettings):
     PROJECT_NAME: str
     DATABASE_URL: str
@@ -30,7 +35,101 @@ class Settings(BaseSettings):
     EMAIL_TOKEN_EXPIRE_MINUTES: int
     MAIL_STARTTLS: bool = False
     MAIL_SSL_TLS: bool = True
-    
+
+
+    # Database engine profile (default, dev, prod, test, see app/api/database/engine_profiles.py);
+    # "default" keeps the engine settings the app has always run with.
+    # The DB_* values below override single fields of the chosen profile when set
+    DB_PROFILE: str = "default"
+    DB_ECHO: Optional[bool] = None
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: Optional[float] = None
+    DB_POOL_PRE_PING: Optional[bool] = None
+    DB_POOL_RECYCLE: Optional[int] = None
+    DB_STATEMENT_CACHE_SIZE: Optional[int] = None
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = None
+
+    # Optional read replica for read-only endpoints (same credentials and database name)
+    DB_REPLICA_HOST: Optional[str] = None
+    DB_REPLICA_PORT: Optional[int] = None
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 2.0
+    # Reads go to the primary for this long after a client's own write
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+
+    # Upstream HTTP client pools (Frappe admin, tenant sites, Paystack, Google)
+    UPSTREAM_HTTP2: bool = False
+    UPSTREAM_MAX_CONNECTIONS: int = 100
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    UPSTREAM_KEEPALIVE_EXPIRY: float = 30.0
+    UPSTREAM_CONNECT_TIMEOUT: float = 5.0
+    FRAPPE_HTTP_TIMEOUT: float = 30.0
+    SITES_HTTP_TIMEOUT: float = 15.0
+    PAYSTACK_HTTP_TIMEOUT: float = 20.0
+    GOOGLE_HTTP_TIMEOUT: float = 10.0
+
+    # Google OIDC discovery and JWKS are cached for their Cache-Control max-age (or the default below);
+    # an unknown kid triggers a refetch, but at most once per MIN_REFRESH interval
+    GOOGLE_OIDC_DISCOVERY_URL: str = "https://accounts.google.com/.well-known/openid-configuration"
+    GOOGLE_OIDC_DEFAULT_MAX_AGE_SECONDS: float = 3600.0
+    GOOGLE_JWKS_MIN_REFRESH_SECONDS: float = 30.0
+
+    # Tenant site fan-out (per-site/per-endpoint requests)
+    FANOUT_MAX_CONCURRENCY: int = 50
+    FANOUT_MAX_PER_HOST: int = 4
+    FANOUT_DEADLINE_SECONDS: float = 10.0
+
+    # Concurrent writes to the Frappe admin site (item benefits, images, price)
+    FRAPPE_WRITE_CONCURRENCY: int = 8
+    FRAPPE_WRITE_DEADLINE_SECONDS: float = 30.0
+
+    # /sites-data serves stored rows and refreshes in the background once older than this
+    SITE_DATA_FRESHNESS_SECONDS: int = 300
+
+    # Periodic site-stats refresher (one leader across all workers)
+    SITE_REFRESH_ENABLED: bool = True
+    SITE_REFRESH_INTERVAL_SECONDS: int = 600
+    SITE_REFRESH_JITTER: float = 0.2
+    SITE_REFRESH_MAX_BACKOFF_SECONDS: int = 3600
+    SITE_REFRESH_RATE_PER_SECOND: float = 5.0
+    SITE_REFRESH_TICK_SECONDS: float = 10.0
+
+
+    # Outbox worker delivering queued Frappe writes (site creation, site data)
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_WORKERS: int = 2
+    OUTBOX_BATCH_SIZE: int = 10
+    OUTBOX_POLL_SECONDS: float = 2.0
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: float = 10.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 1800.0
+    # A claimed message is retried by any worker once this long has passed without a result
+    OUTBOX_LEASE_SECONDS: float = 300.0
+
+    # /get-products serves cached response bytes; other workers see product changes within this TTL
+    PRODUCT_CATALOG_CACHE_TTL_SECONDS: float = 60.0
+    # GET /products/{id} refreshes a product from Frappe in the background at most this often
+    PRODUCT_REFRESH_TTL_SECONDS: float = 300.0
+
+    # Refuse to start against a database that is not migrated to the latest revision
+    SCHEMA_CHECK_ENABLED: bool = True
+
+    # bcrypt runs on its own thread pool; past MAX_PENDING running or queued hashes, requests get a 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # Stored hashes with a different cost are rehashed on the next successful login
+    PASSWORD_HASH_ROUNDS: int = 12
+
+    # Decoded JWTs are cached until they expire; principals (user, role, permissions) for the TTL
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+
+    # Per-route latency histograms (upstream and pool metrics are always recorded)
+    METRICS_ENABLED: bool = True
+    # Bearer token the Prometheus scraper sends to /metrics; /metrics answers 404 while unset
+    METRICS_SCRAPE_TOKEN: Optional[str] = None
 
     # Other configurations
     ROUTE_PREFIX: str = "/api"
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from app.api.config.settings import settings
 from app.api.models.user_model import User
 from app.api.security.security import hash_password
+from app.api.security.auth_cache import principal_cache
 from app.api.services.email_services import verify_email_logic, password_reset_request_logic, reset_password_logic
 from app.api.schemas.user_schema import ResetPassword
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -23,6 +24,7 @@ class EmailController:
             # Activate user
             user.is_active = True
             await db.commit()
+            principal_cache.invalidate(user.id)
 
         except HTTPException as e:
             raise e
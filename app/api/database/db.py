@@ -2,39 +2,28 @@ import logging
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Function to retrieve environment variables safely
-def get_env_variable(var_name):
-    value = os.getenv(var_name)
-    if value is None:
-        raise ValueError(f"Missing environment variable: {var_name}")
-    return value
+from app.api.config.settings import settings
+from app.api.database.engine_profiles import resolve_engine_profile
 
 # Database Configuration
-DB_HOST = get_env_variable("DB_HOST")
-DB_PORT = get_env_variable("DB_PORT")
-DB_NAME = get_env_variable("DB_NAME")
-DB_USER = get_env_variable("DB_USER")
-DB_PASSWORD = get_env_variable("DB_PASSWORD")
+DB_HOST = settings.DB_HOST
+DB_PORT = settings.DB_PORT
+DB_NAME = settings.DB_NAME
+DB_USER = settings.DB_USER
+DB_PASSWORD = settings.DB_PASSWORD
 
 # Database URL for asynchronous PostgreSQL connection
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Engine tuning comes from the DB_PROFILE settings profile
+engine_profile = resolve_engine_profile(settings)
+
 # Create the async SQLAlchemy engine
 async_engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    pool_size=20,
-    max_overflow=0,
-    pool_timeout=30,
-    pool_pre_ping=True
+    f"{DATABASE_URL}?{engine_profile.url_query()}",
+    **engine_profile.engine_kwargs(application_name=settings.PROJECT_NAME),
 )
 
 # Session management with AsyncSession
@@ -44,6 +33,24 @@ async_sessionmaker = sessionmaker(
     expire_on_commit=False
 )
 
+# Optional read replica, used by get_read_db (app/api/database/replica.py)
+replica_engine = None
+replica_sessionmaker = None
+if settings.DB_REPLICA_HOST:
+    REPLICA_DATABASE_URL = (
+        f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{settings.DB_REPLICA_HOST}:"
+        f"{settings.DB_REPLICA_PORT or DB_PORT}/{DB_NAME}"
+    )
+    replica_engine = create_async_engine(
+        f"{REPLICA_DATABASE_URL}?{engine_profile.url_query()}",
+        **engine_profile.engine_kwargs(application_name=f"{settings.PROJECT_NAME} (replica)", pool_name="replica"),
+    )
+    replica_sessionmaker = sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
 # Async context manager for session scope
 @asynccontextmanager
 async def session_scope() -> AsyncGenerator[AsyncSession, None]:
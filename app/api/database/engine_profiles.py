@@ -0,0 +1,143 @@
+import dataclasses
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from app.api.utils.metrics import db_pool_checkout_wait, db_pools
+
+
+class MeteredAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default async pool, plus the checkout wait histogram and occupancy gauges
+    on /metrics. The engine name is the pool's logging name.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics_name = self._orig_logging_name or "primary"
+        db_pools[self.metrics_name] = self
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started, self.metrics_name)
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """
+    Engine tuning for one environment. `pool_pre_ping` pays a round trip on every
+    checkout to catch dead connections; `pool_recycle` replaces connections older than
+    the given seconds instead, which is cheaper when the network path is stable.
+    """
+    echo: bool = False
+    pool_size: int = 20
+    max_overflow: int = 0
+    pool_timeout: float = 30.0
+    pool_pre_ping: bool = False
+    pool_recycle: int = -1
+    # Opens a fresh connection per checkout (tests that spin up their own event loops)
+    null_pool: bool = False
+    # asyncpg prepared statement cache per connection; 0 disables it (needed behind pgbouncer)
+    statement_cache_size: int = 100
+    # Server-side limits in milliseconds; 0 leaves the server default
+    statement_timeout_ms: int = 0
+    idle_in_transaction_timeout_ms: int = 0
+
+    def engine_kwargs(self, application_name: Optional[str] = None, pool_name: str = "primary") -> dict:
+        """Keyword arguments for create_async_engine. `pool_name` labels the pool metrics."""
+        server_settings = {}
+        if self.statement_timeout_ms:
+            server_settings["statement_timeout"] = str(self.statement_timeout_ms)
+        if self.idle_in_transaction_timeout_ms:
+            server_settings["idle_in_transaction_session_timeout"] = str(self.idle_in_transaction_timeout_ms)
+        if application_name:
+            server_settings["application_name"] = application_name
+
+        kwargs = {
+            "echo": self.echo,
+            "pool_pre_ping": self.pool_pre_ping,
+            "connect_args": {
+                "statement_cache_size": self.statement_cache_size,
+                "server_settings": server_settings,
+            },
+        }
+        if self.null_pool:
+            kwargs["poolclass"] = NullPool
+        else:
+            kwargs.update(
+                poolclass=MeteredAsyncQueuePool,
+                pool_logging_name=pool_name,
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_timeout=self.pool_timeout,
+                pool_recycle=self.pool_recycle,
+            )
+        return kwargs
+
+    def url_query(self) -> str:
+        """Query string for the SQLAlchemy asyncpg dialect's own prepared statement cache."""
+        return f"prepared_statement_cache_size={self.statement_cache_size}"
+
+
+ENGINE_PROFILES = {
+    # What the engine ran with before profiles existed, used when DB_PROFILE is not set
+    "default": EngineProfile(
+        echo=True,
+        pool_size=20,
+        max_overflow=0,
+        pool_timeout=30.0,
+        pool_pre_ping=True,
+    ),
+    "dev": EngineProfile(
+        echo=True,
+        pool_size=5,
+        max_overflow=5,
+        pool_pre_ping=True,
+        statement_timeout_ms=60_000,
+    ),
+    "prod": EngineProfile(
+        echo=False,
+        pool_size=20,
+        max_overflow=10,
+        pool_pre_ping=False,
+        pool_recycle=1800,
+        statement_cache_size=500,
+        statement_timeout_ms=30_000,
+        idle_in_transaction_timeout_ms=60_000,
+    ),
+    "test": EngineProfile(
+        echo=False,
+        null_pool=True,
+        statement_timeout_ms=10_000,
+    ),
+}
+
+
+def resolve_engine_profile(settings) -> EngineProfile:
+    """
+    Picks the DB_PROFILE profile and applies any DB_* override that is set, so a
+    deployment can tweak one knob without defining a new profile.
+    """
+    name = settings.DB_PROFILE.lower()
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{settings.DB_PROFILE}', expected one of {sorted(ENGINE_PROFILES)}")
+
+    overrides = {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "statement_timeout_ms": settings.DB_STATEMENT_TIMEOUT_MS,
+    }
+    return dataclasses.replace(
+        ENGINE_PROFILES[name],
+        **{field: value for field, value in overrides.items() if value is not None},
+    )
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, Optional
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.config.settings import settings
+from app.api.database.db import async_sessionmaker, replica_engine, replica_sessionmaker
+
+
+logger = logging.getLogger(__name__)
+
+
+# Cookie holding the epoch time until which this client's reads must go to the primary
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Replay lag in seconds; 0 when the replica has replayed everything it received,
+# so an idle primary does not make the replica look stale
+REPLICA_LAG_SQL = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaLagMonitor:
+    """
+    Caches the replica's replication lag for DB_REPLICA_LAG_CHECK_SECONDS. Only one
+    request measures it at a time; the others use the last value. A failed check
+    counts as unhealthy, so reads fall back to the primary.
+    """
+
+    def __init__(self, max_lag: float, check_interval: float):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _measure(self) -> Optional[float]:
+        try:
+            async with replica_engine.connect() as conn:
+                return float((await conn.execute(REPLICA_LAG_SQL)).scalar() or 0)
+        except Exception as e:
+            logger.warning(f"Replica lag check failed, reading from the primary: {e}")
+            return None
+
+    async def healthy(self) -> bool:
+        if time.monotonic() - self._checked_at >= self.check_interval and not self._lock.locked():
+            async with self._lock:
+                self.lag = await self._measure()
+                self._checked_at = time.monotonic()
+        return self.lag is not None and self.lag <= self.max_lag
+
+
+replica_lag_monitor = ReplicaLagMonitor(
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_LAG_CHECK_SECONDS,
+)
+
+
+def recently_wrote(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yield a session for read-only routes. Uses the replica when one is configured,
+    its lag is within DB_REPLICA_MAX_LAG_SECONDS and the client has not written in
+    the last READ_YOUR_WRITES_SECONDS; otherwise the primary.
+    """
+    use_replica = (
+        replica_sessionmaker is not None
+        and not recently_wrote(request)
+        and await replica_lag_monitor.healthy()
+    )
+    sessionmaker = replica_sessionmaker if use_replica else async_sessionmaker
+    async with sessionmaker() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+
+
+class ReadYourWritesMiddleware:
+    """
+    Sets the read-your-writes cookie on every successful non-GET response, so the
+    same client reads its own writes from the primary for a short window, whichever
+    worker serves the next request.
+    """
+
+    def __init__(self, app, window: float = settings.READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or self.window <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + self.window
+                cookie = f"{READ_YOUR_WRITES_COOKIE}={until:.3f}; Max-Age={int(self.window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,49 @@
+import logging
+from pathlib import Path
+from typing import Optional
+
+from app.api.database.db import async_engine
+
+
+logger = logging.getLogger(__name__)
+
+
+ALEMBIC_INI = Path(__file__).resolve().parents[3] / "alembic.ini"
+
+
+# Alembic is imported inside the functions so it stays off the app import path
+def alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return config
+
+
+def head_revision() -> Optional[str]:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+async def current_revision() -> Optional[str]:
+    from alembic.migration import MigrationContext
+
+    async with async_engine.connect() as conn:
+        return await conn.run_sync(lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision())
+
+
+async def check_schema_version():
+    """
+    Verifies the database is migrated to the latest Alembic revision.
+    This is the only schema work done at app startup; migrations and seed data are
+    applied by `python -m app.api.database.seed`.
+    """
+    head = head_revision()
+    current = await current_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}. "
+            f"Run `python -m app.api.database.seed` to migrate it."
+        )
+    logger.info(f"Database schema is at revision {current}")
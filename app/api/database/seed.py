@@ -0,0 +1,148 @@
+"""
+One-shot schema migration and seed command, run once per deploy:
+
+    python -m app.api.database.seed
+
+Applies pending Alembic migrations and inserts the default roles and permissions from
+`initial_data.py`. Runs under a Postgres advisory lock, so when several containers
+start together one does the work and the others wait for it, then find nothing left
+to do.
+
+The derived tables (user_site_summaries, site_users, site_modules) are backfilled
+only with --backfill, once after upgrading a database that predates them:
+
+    python -m app.api.database.seed --backfill
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+from alembic import command
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.api.database.db import async_engine
+from app.api.database.schema import alembic_config
+from app.api.initial_data import roles, permissions, roles_permissions
+from app.api.models.permission import Permission
+from app.api.models.role import Role
+from app.api.models.role_permission import role_permissions
+from app.api.services.dashboard_services import refresh_all_user_site_summaries
+from app.api.services.site_detail_services import backfill_site_details
+
+
+logger = logging.getLogger(__name__)
+
+
+SEED_LOCK_KEY = 734_211_002
+
+# Revision that matches a schema built by the old create_all-on-startup init_db
+BASELINE_REVISION = "0001"
+
+
+def _upgrade(sync_conn):
+    config = alembic_config()
+    config.attributes["connection"] = sync_conn
+    config.attributes["configure_logger"] = False
+
+    # Databases created before migrations existed already hold the baseline schema
+    if MigrationContext.configure(sync_conn).get_current_revision() is None and inspect(sync_conn).has_table("users"):
+        logger.info(f"Existing schema without a version, stamping it at {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+
+    command.upgrade(config, "head")
+
+
+async def migrate(conn: AsyncConnection):
+    await conn.run_sync(_upgrade)
+    await conn.commit()
+
+
+async def seed_roles_and_permissions(conn: AsyncConnection):
+    """Inserts the default roles, permissions and their links in three set-based statements."""
+    await conn.execute(
+        pg_insert(Role.__table__)
+        .values([{"id": uuid.uuid4(), **role} for role in roles])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    await conn.execute(
+        pg_insert(Permission.__table__)
+        .values([{"id": uuid.uuid4(), **permission} for permission in permissions])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+
+    role_ids = dict((await conn.execute(select(Role.name, Role.id))).all())
+    permission_ids = dict((await conn.execute(select(Permission.name, Permission.id))).all())
+
+    links = []
+    for role_name, permission_names in roles_permissions.items():
+        if role_name not in role_ids:
+            logger.warning(f"Role '{role_name}' not found!")
+            continue
+        for permission_name in permission_names:
+            if permission_name not in permission_ids:
+                logger.warning(f"Permission '{permission_name}' not found!")
+                continue
+            links.append({"role_id": role_ids[role_name], "permission_id": permission_ids[permission_name]})
+
+    if links:
+        await conn.execute(pg_insert(role_permissions).values(links).on_conflict_do_nothing())
+    await conn.commit()
+    logger.info(f"Seeded {len(roles)} roles, {len(permissions)} permissions and {len(links)} role-permission links")
+
+
+async def backfill(conn: AsyncConnection):
+    """Fills derived tables for rows written before those tables existed."""
+    async with AsyncSession(bind=conn, expire_on_commit=False) as db:
+        await refresh_all_user_site_summaries(db)
+        await backfill_site_details(db)
+        await db.commit()
+    logger.info("User site summaries and site details backfilled")
+
+
+async def run(migrate_schema: bool = True, backfill_derived: bool = False):
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SEED_LOCK_KEY})
+        await conn.commit()
+        try:
+            if migrate_schema:
+                await migrate(conn)
+            await seed_roles_and_permissions(conn)
+            if backfill_derived:
+                await backfill(conn)
+        finally:
+            # After a failure the transaction is aborted (or the connection broken); an error
+            # here must not hide the original one, and closing the connection frees the lock anyway
+            try:
+                await conn.rollback()
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SEED_LOCK_KEY})
+                await conn.commit()
+            except Exception as e:
+                logger.warning(f"Could not release the seed lock, it is freed when the connection closes: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate the database schema and insert seed data.")
+    parser.add_argument("--no-migrate", action="store_true", help="only insert seed data (and backfill)")
+    parser.add_argument("--backfill", action="store_true", help="fill the derived tables from existing site data")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    started = time.perf_counter()
+
+    async def run_and_dispose():
+        try:
+            await run(migrate_schema=not args.no_migrate, backfill_derived=args.backfill)
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(run_and_dispose())
+    logger.info(f"Database ready in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import hmac
 import uuid
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -12,7 +13,9 @@ from sqlalchemy.orm import Session
 from typing import Any, List, Optional
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from app.api.config.settings import settings
 from app.api.schemas.user_schema import Email
+from app.api.security.auth_cache import Principal, principal_cache, token_cache
 from app.api.services import user_services
 from app.api.utils.errors import AccessTokenRequired, AccountNotVerified, InsufficientPermission, InvalidToken, RefreshTokenRequired
 from app.api.utils.utils import decode_token
@@ -76,9 +79,10 @@ class TokenBearer(HTTPBearer):
 
         token = creds.credentials
 
-        token_data = decode_token(token)
-
-        if not self.token_valid(token):
+        # Verified and parsed once per token, then served from the token cache
+        try:
+            token_data = token_cache.decode(token)
+        except JWTError:
             raise InvalidToken()
 
         # if await token_in_blocklist(token_data["jti"]):
@@ -89,9 +93,11 @@ class TokenBearer(HTTPBearer):
         return token_data
 
     def token_valid(self, token: str) -> bool:
-        token_data = decode_token(token)
-
-        return token_data is not None
+        try:
+            token_cache.decode(token)
+        except JWTError:
+            return False
+        return True
 
     def verify_token_data(self, token_data):
         raise NotImplementedError("Please Override this method in child classes")
@@ -99,14 +105,14 @@ class TokenBearer(HTTPBearer):
     
 class AccessTokenBearer(TokenBearer):
     def verify_token_data(self, token_data: dict) -> None:
-        if token_data and token_data["refresh"]:
+        if token_data and token_data.get("refresh"):
             raise AccessTokenRequired()
         
 
 
 class RefreshTokenBearer(TokenBearer):
     def verify_token_data(self, token_data: dict) -> None:
-        if token_data and not token_data["refresh"]:
+        if token_data and not token_data.get("refresh"):
             raise RefreshTokenRequired()
         
         
@@ -115,19 +121,56 @@ class RefreshTokenBearer(TokenBearer):
 async def get_current_user(
     token_details: dict = Depends(AccessTokenBearer()),
     session: AsyncSession = Depends(get_db),
-):
-    user_email = token_details["user"]["email"]
-
-    user = await user_services.get_user_by_email(user_email, session)
+) -> Principal:
+    """The authenticated user with role and permissions; no query while its principal is cached."""
+    user_data = token_details.get("user")
+    if not isinstance(user_data, dict):
+        raise InvalidToken()
+
+    if user_data.get("id"):
+        try:
+            user_id = uuid.UUID(str(user_data["id"]))
+        except ValueError:
+            raise InvalidToken()
+        user = await principal_cache.get(session, user_id)
+    elif user_data.get("email"):
+        # Tokens issued before the id was included only carry the email
+        user = await principal_cache.get_by_email(session, user_data["email"])
+    else:
+        raise InvalidToken()
+    if user is None:
+        raise InvalidToken()
 
     return user
 
 
+async def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """Allows only authenticated admins and super admins."""
+    await verify_role_for_admin_or_super_admin(current_user.role)
+    return current_user
+
+
+async def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+):
+    """Allows the metrics scraper, which presents settings.METRICS_SCRAPE_TOKEN as a bearer token."""
+    expected = settings.METRICS_SCRAPE_TOKEN
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    presented = credentials.credentials if credentials is not None else ""
+    if not hmac.compare_digest(presented.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics scrape token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]) -> None:
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> Any:
+    def __call__(self, current_user: Principal = Depends(get_current_user)) -> Any:
         if not current_user.is_verified:
             raise AccountNotVerified()
         if current_user.role in self.allowed_roles:
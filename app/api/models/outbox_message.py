@@ -0,0 +1,33 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.api.models import Base
+
+
+class OutboxMessage(Base):
+    """
+    An outbound Frappe write, committed in the same transaction as the change that
+    caused it and delivered later by the outbox worker (app/api/services/outbox_services.py).
+
+    status is "pending" until delivered ("done") or out of attempts ("dead").
+    """
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        # The worker only ever scans pending messages that are due
+        Index(
+            "ix_outbox_messages_pending_due", "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id", ondelete="SET NULL"), nullable=True, index=True)
+
+    status = Column(String, nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
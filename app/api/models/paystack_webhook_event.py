@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, DateTime, PrimaryKeyConstraint, String, func
+from app.api.models import Base
+
+
+class PaystackWebhookEvent(Base):
+    """
+    A Paystack webhook that has been processed, keyed by event and payment reference.
+    Inserted in the same commit as the transaction update, so a redelivery is
+    recognized by a single insert that hits the primary key.
+    """
+    __tablename__ = "paystack_webhook_events"
+    __table_args__ = (
+        PrimaryKeyConstraint("event", "reference", name="pk_paystack_webhook_events"),
+    )
+
+    event = Column(String, nullable=False)
+    reference = Column(String, nullable=False)
+    paystack_transaction_id = Column(BigInteger, nullable=True)
+
+    received_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -32,8 +32,10 @@
 
 
 
+import hashlib
+import json
 import uuid
-from sqlalchemy import Column, Float, String, DateTime, Boolean, Integer, ForeignKey, Text, JSON
+from sqlalchemy import event, Column, Float, String, DateTime, Boolean, Integer, ForeignKey, Text, JSON
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -56,5 +58,27 @@ class Product(Base):
     images = Column(JSON, nullable=True)
     plans = Column(JSON, nullable=True)  # This replaces plan_descriptions and prices
 
+    # sha256 of the synced fields, so a catalog sync skips rows that did not change
+    content_hash = Column(String(64), nullable=True)
+
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+
+# Columns written by a catalog sync; content_hash covers exactly these
+PRODUCT_SYNC_COLUMNS = [
+    "product_title", "item_group", "product_description", "product_image", "images", "benefits", "plans",
+]
+
+
+def product_content_hash(row: dict) -> str:
+    content = {column: row.get(column) for column in PRODUCT_SYNC_COLUMNS}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+
+# Keeps content_hash in step with every ORM write, so the bulk sync never compares
+# against a hash of content the row no longer holds
+@event.listens_for(Product, "before_insert")
+@event.listens_for(Product, "before_update")
+def _set_content_hash(mapper, connection, target):
+    target.content_hash = product_content_hash({column: getattr(target, column) for column in PRODUCT_SYNC_COLUMNS})
@@ -40,7 +40,7 @@
 
 
 
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, JSON, ForeignKey, func
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, JSON, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.api.models import Base
@@ -50,9 +50,15 @@ from datetime import datetime, timezone
 
 class SiteData(Base):
     __tablename__ = "site_data"
+    __table_args__ = (
+        # Lets the /active-modules search match on site names through ILIKE (needs pg_trgm)
+        Index("ix_site_data_site_name_trgm", "site_name", postgresql_using="gin", postgresql_ops={"site_name": "gin_trgm_ops"}),
+        # Every dashboard endpoint lists a user's sites, usually ordered by name
+        Index("ix_site_data_user_id_site_name", "user_id", "site_name"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    site_name = Column(String, nullable=False)
+    site_name = Column(String, unique=True, nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
 
     # Totals data
@@ -78,3 +84,5 @@ class SiteData(Base):
 
     # Relationships
     user = relationship("User", back_populates="site_data")
+    site_users = relationship("SiteUser", back_populates="site", cascade="all, delete-orphan", passive_deletes=True)
+    site_modules = relationship("SiteModule", back_populates="site", cascade="all, delete-orphan", passive_deletes=True)
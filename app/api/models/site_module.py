@@ -0,0 +1,31 @@
+import uuid
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship
+from app.api.models import Base
+
+
+class SiteModule(Base):
+    """One active module of a tenant site, normalized out of SiteData.active_modules."""
+    __tablename__ = "site_modules"
+    __table_args__ = (
+        UniqueConstraint("site_id", "module_name", name="uq_site_modules_site_id_module_name"),
+        # Trigram indexes back the ILIKE '%term%' search on /active-modules (needs pg_trgm)
+        Index("ix_site_modules_module_name_trgm", "module_name", postgresql_using="gin", postgresql_ops={"module_name": "gin_trgm_ops"}),
+        Index("ix_site_modules_app_name_trgm", "app_name", postgresql_using="gin", postgresql_ops={"app_name": "gin_trgm_ops"}),
+        Index("ix_site_modules_created_at", "created_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    site_id = Column(UUID(as_uuid=True), ForeignKey("site_data.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    module_name = Column(String, nullable=False, index=True)
+    app_name = Column(String, nullable=True, index=True)
+
+    # The module entry exactly as the site reported it
+    data = Column(JSONB, nullable=False)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    site = relationship("SiteData", back_populates="site_modules")
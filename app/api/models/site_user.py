@@ -0,0 +1,28 @@
+import uuid
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import relationship
+from app.api.models import Base
+
+
+class SiteUser(Base):
+    """One ERP user of a tenant site, normalized out of SiteData.total_users/active_users."""
+    __tablename__ = "site_users"
+    __table_args__ = (
+        UniqueConstraint("site_id", "email", name="uq_site_users_site_id_email"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    site_id = Column(UUID(as_uuid=True), ForeignKey("site_data.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    email = Column(String, nullable=False, index=True)
+    full_name = Column(String, nullable=True, index=True)
+    is_active = Column(Boolean, nullable=False, default=False)
+
+    # The user entry exactly as the site reported it
+    data = Column(JSONB, nullable=False)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    site = relationship("SiteData", back_populates="site_users")
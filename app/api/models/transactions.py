@@ -1,5 +1,5 @@
-from sqlalchemy import BigInteger, Column, Float, String, DateTime, Boolean, Integer, ForeignKey, Text, JSON
-from sqlalchemy.sql import func
+from sqlalchemy import BigInteger, Column, Float, String, DateTime, Boolean, Integer, ForeignKey, Index, Text, JSON
+from sqlalchemy.sql import func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.api.models import Base
@@ -7,9 +7,13 @@ import uuid
 
 class UserTransactions(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # "Latest transaction for a site" in the site-creation webhook
+        Index("ix_transactions_site_name_created_at", "site_name", text("created_at DESC")),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True)
     plan = Column(String, nullable=False)
     payment_status = Column(String, nullable=False)
     first_name = Column(String, nullable=False)
@@ -25,8 +29,8 @@ class UserTransactions(Base):
     training_and_setup = Column(Boolean, nullable=False)
     valid_from = Column(DateTime, nullable=False)
     valid_upto = Column(DateTime, nullable=False)
-    payment_reference = Column(String, nullable=False)
-    transaction_id = Column(BigInteger, nullable=False)
+    payment_reference = Column(String, nullable=False, index=True)
+    transaction_id = Column(BigInteger, nullable=False, index=True)
     message = Column(String, nullable=False)
     paystack_status = Column(String)
     paystack_response = Column(JSON)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, Integer, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.api.models import Base
+
+
+class UserSiteSummary(Base):
+    """
+    Per-user dashboard totals, kept in step with SiteData on every write so the
+    count endpoints read a single row by primary key.
+    """
+    __tablename__ = "user_site_summaries"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    total_sites = Column(Integer, nullable=False, default=0)
+    active_sites = Column(Integer, nullable=False, default=0)
+    total_users = Column(Integer, nullable=False, default=0)
+    active_users = Column(Integer, nullable=False, default=0)
+    active_modules = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
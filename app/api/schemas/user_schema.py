@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel, Field, ConfigDict
-from passlib.context import CryptContext
+from app.api.security.password_hasher import password_hasher
 from pydantic import BaseModel, field_validator, Field, EmailStr, UUID4, field_validator
 import re
 import uuid
@@ -167,23 +167,20 @@ class UserUpdate(BaseModel):
             return None
         return value
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 class ChangePassword(BaseModel):
     old_password: str = Field(..., min_length=6, max_length=50)
     new_password: str = Field(..., min_length=6, max_length=50)
     confirm_password: str = Field(..., min_length=6, max_length=50)
 
     @staticmethod
-    def hash_password(password: str) -> str:
+    async def hash_password(password: str) -> str:
         """Hash the password using bcrypt."""
-        return pwd_context.hash(password)
+        return await password_hasher.hash(password)
 
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
         """Verify the password against the stored hash."""
-        return pwd_context.verify(plain_password, hashed_password)
+        return await password_hasher.verify(plain_password, hashed_password)
 
     @staticmethod
     def validate_new_password(new_password: str, confirm_password: str):
@@ -0,0 +1,173 @@
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional
+
+from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
+
+from app.api.config.settings import settings
+from app.api.models.role import Role
+from app.api.models.user_model import User
+
+
+class TokenCache:
+    """
+    LRU of decoded JWTs, so a token is verified and parsed once rather than on
+    every request that presents it. Entries are keyed by the raw token: a forged
+    token that reuses a known jti is a different key, so it still goes through
+    signature verification. Every entry is dropped at its token's `exp`, and jti
+    maps back to the token for revoke().
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # token -> (claims, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tokens_by_jti = {}
+
+    def decode(self, token: str) -> dict:
+        """Returns the token's claims; raises jose's JWTError (or ExpiredSignatureError) like jwt.decode."""
+        entry = self._entries.get(token)
+        if entry is not None:
+            claims, expires_at = entry
+            if expires_at is None or expires_at > time.time():
+                self._entries.move_to_end(token)
+                return claims
+            self._evict(token)
+
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        self._entries[token] = (claims, claims.get("exp"))
+        if claims.get("jti"):
+            self._tokens_by_jti[claims["jti"]] = token
+        while len(self._entries) > self.max_size:
+            self._evict(next(iter(self._entries)))
+        return claims
+
+    def revoke(self, jti: str):
+        token = self._tokens_by_jti.get(jti)
+        if token is not None:
+            self._evict(token)
+
+    def _evict(self, token: str):
+        claims, _ = self._entries.pop(token, (None, None))
+        if claims and self._tokens_by_jti.get(claims.get("jti")) == token:
+            del self._tokens_by_jti[claims["jti"]]
+
+
+@dataclass(frozen=True)
+class Principal:
+    """What an authenticated request needs to know about its user, detached from any session."""
+    id: uuid.UUID
+    email: str
+    first_name: str
+    last_name: str
+    is_active: bool
+    role_id: Optional[uuid.UUID]
+    role: Optional[str]
+    permissions: FrozenSet[str]
+
+    @property
+    def is_verified(self) -> bool:
+        return self.is_active
+
+    def has_permission(self, permission: str) -> bool:
+        return permission in self.permissions
+
+
+async def load_principal(
+    db: AsyncSession, user_id: Optional[uuid.UUID] = None, email: Optional[str] = None
+) -> Optional[Principal]:
+    """Loads a user (by id, or else by email) with its role and effective (role + direct) permissions in one query."""
+    result = await db.execute(
+        select(User)
+        .options(joinedload(User.role).joinedload(Role.permissions), joinedload(User.permissions))
+        .filter(User.id == user_id if user_id is not None else User.email == email)
+    )
+    user = result.unique().scalars().first()
+    if user is None:
+        return None
+
+    permissions = {permission.name for permission in user.permissions}
+    if user.role is not None:
+        permissions.update(permission.name for permission in user.role.permissions)
+    return Principal(
+        id=user.id,
+        email=user.email,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        is_active=user.is_active,
+        role_id=user.role_id,
+        role=user.role.name if user.role is not None else None,
+        permissions=frozenset(permissions),
+    )
+
+
+class PrincipalCache:
+    """
+    Principals by user id for AUTH_PRINCIPAL_CACHE_TTL_SECONDS, so an authenticated
+    request does not query the user, role and permissions again. Tokens that carry
+    only an email (the Google sign-in ones) go through get_by_email, which keeps an
+    email -> user id index next to the entries.
+
+    Code that changes a user's profile, role or permissions calls invalidate(user_id)
+    after committing; changes to a role's permissions call invalidate_all(). That
+    clears this worker only, other workers pick the change up within the TTL.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        # user id -> (principal, loaded_at)
+        self._entries: "OrderedDict[uuid.UUID, tuple]" = OrderedDict()
+        self._ids_by_email: Dict[str, uuid.UUID] = {}
+        self._generation = 0
+
+    def _cached(self, user_id: Optional[uuid.UUID]) -> Optional[Principal]:
+        entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self._entries.move_to_end(user_id)
+            return entry[0]
+        return None
+
+    async def get(self, db: AsyncSession, user_id: uuid.UUID) -> Optional[Principal]:
+        return self._cached(user_id) or await self._load(db, user_id=user_id)
+
+    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[Principal]:
+        return self._cached(self._ids_by_email.get(email)) or await self._load(db, email=email)
+
+    async def _load(self, db: AsyncSession, **lookup) -> Optional[Principal]:
+        generation = self._generation
+        principal = await load_principal(db, **lookup)
+        # Skip caching if an invalidation happened while it was loading
+        if principal is not None and generation == self._generation:
+            self._entries[principal.id] = (principal, time.monotonic())
+            self._entries.move_to_end(principal.id)
+            self._ids_by_email[principal.email] = principal.id
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+        return principal
+
+    def _drop(self, user_id: uuid.UUID):
+        principal, _ = self._entries.pop(user_id, (None, None))
+        if principal is not None and self._ids_by_email.get(principal.email) == user_id:
+            del self._ids_by_email[principal.email]
+
+    def invalidate(self, user_id: uuid.UUID):
+        self._generation += 1
+        self._drop(user_id)
+
+    def invalidate_all(self):
+        self._generation += 1
+        self._entries.clear()
+        self._ids_by_email.clear()
+
+
+token_cache = TokenCache(max_size=settings.AUTH_TOKEN_CACHE_SIZE)
+principal_cache = PrincipalCache(
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+)
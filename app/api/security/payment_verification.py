@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Depends
 import httpx
 import logging
 from fastapi import HTTPException
-from dotenv import load_dotenv
+from app.api.config.settings import settings
 import os
 import hmac
 import hashlib
 import json
+from app.api.utils.http_clients import http_clients, PAYSTACK
 
 
 
@@ -14,12 +15,7 @@ import json
 
 
 
-load_dotenv()
-
-
-
-
-PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
+PAYSTACK_SECRET_KEY = settings.PAYSTACK_SECRET_KEY
 
 
 
@@ -57,34 +53,19 @@ PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
 
 
 
-async def verify_webhook_signature(secret_key: str, request: Request, signature: str):
+def verify_webhook_signature(secret_key: str, raw_payload: bytes, signature: str):
     """
-    Verifies the signature of the Paystack webhook using raw payload.
+    Verifies the HMAC SHA512 signature of a Paystack webhook against the raw body.
+    Uses a constant-time comparison so the signature cannot be guessed byte by byte.
     """
-    try:
-        # Get the raw request body
-        raw_payload = await request.body()
-        #logging.info("verify_webhook_signature function called.")
-        #logging.info(f"Received Payload: {raw_payload}")
-        #logging.info(f"Received Signature: {signature}")
-
-        # Calculate the HMAC SHA512 signature
-        calculated_signature = hmac.new(
-            key=secret_key.encode('utf-8'),
-            msg=raw_payload,
-            digestmod=hashlib.sha512
-        ).hexdigest()
-        
-        #logging.info(f"Calculated Signature: {calculated_signature}")
-
-        # Compare the calculated signature with the received signature
-        if calculated_signature != signature:
-            raise HTTPException(status_code=400, detail="Invalid webhook signature")
-        
-        #logging.info("Webhook signature verification succeeded.")
+    calculated_signature = hmac.new(
+        key=secret_key.encode('utf-8'),
+        msg=raw_payload,
+        digestmod=hashlib.sha512
+    ).hexdigest()
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error verifying webhook signature: {str(e)}")
+    if not hmac.compare_digest(calculated_signature, signature or ""):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
 
 
 
@@ -109,35 +90,35 @@ async def verify_paystack_transaction(payment_reference: str):
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(paystack_url, headers=headers)
+        client = http_clients.get(PAYSTACK)
+        response = await client.get(paystack_url, headers=headers)
             
-            if response.status_code == 200:
-                data = response.json()
-                status = data.get("status")
-                # Check for True or False status instead of 'success' or 'failed'
-                if status is True:
-                    return "success", data.get("data")
-                elif status is False:
-                    return "failed", data.get("data")
-                else:
-                    logging.error(f"Unexpected Paystack response: {data}")
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Unexpected Paystack status: {status}"
-                    )
-            elif response.status_code == 401:
-                logging.error("Unauthorized: Invalid Payment")
-                raise HTTPException(
-                    status_code=401, 
-                    detail="Unauthorized: Invalid Payment"
-                )
+        if response.status_code == 200:
+            data = response.json()
+            status = data.get("status")
+            # Check for True or False status instead of 'success' or 'failed'
+            if status is True:
+                return "success", data.get("data")
+            elif status is False:
+                return "failed", data.get("data")
             else:
-                logging.error(f"Paystack API error: {response.text}")
+                logging.error(f"Unexpected Paystack response: {data}")
                 raise HTTPException(
-                    status_code=500,
-                    detail=f"Paystack API returned an error: {response.text}"
+                    status_code=400, 
+                    detail=f"Unexpected Paystack status: {status}"
                 )
+        elif response.status_code == 401:
+            logging.error("Unauthorized: Invalid Payment")
+            raise HTTPException(
+                status_code=401, 
+                detail="Unauthorized: Invalid Payment"
+            )
+        else:
+            logging.error(f"Paystack API error: {response.text}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Paystack API returned an error: {response.text}"
+            )
     except httpx.RequestError as e:
         logging.error(f"Error connecting to Paystack: {str(e)}")
         raise HTTPException(
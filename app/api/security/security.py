@@ -2,9 +2,8 @@ import os
 from datetime import datetime, timedelta
 import uuid
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from dotenv import load_dotenv
 from app.api.config.settings import settings
+from app.api.security.password_hasher import password_hasher
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
@@ -17,12 +16,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
 
-# Load environment variables from .env file
-load_dotenv()
-
-
-# Create a CryptContext to use Bcrypt for password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Bcrypt hashing runs on password_hasher's thread pool, off the event loop
+pwd_context = password_hasher.context
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
@@ -35,13 +30,18 @@ EMAIL_TOKEN_EXPIRE_MINUTES = int(os.getenv("EMAIL_TOKEN_EXPIRE_MINUTES", 5))
 
 async def hash_password(password: str) -> str:
     """Hashes a password using Bcrypt."""
-    return pwd_context.hash(password)
+    return await password_hasher.hash(password)
 
 
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Verifies a password; returns (valid, new_hash), with new_hash set if the stored cost is outdated."""
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
 
 
 
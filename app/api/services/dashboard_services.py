@@ -1,5 +1,6 @@
 import asyncio
 import os
+import uuid
 from sqlalchemy.future import select
 import httpx
 import logging
@@ -10,20 +11,24 @@ from app.api.config.erp_config import FRAPPE_BASE_URL
 from datetime import datetime, timedelta
 import logging
 import httpx
-from sqlalchemy import select
+from sqlalchemy import select, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert, UUID as PG_UUID
 from app.api.models.site_data import SiteData
 from app.api.models.user_model import User
-from app.api.database.db import get_db 
+from app.api.models.user_site_summary import UserSiteSummary
+from app.api.services.site_detail_services import sync_site_details
+from app.api.database.db import get_db, async_sessionmaker
+from app.api.config.settings import settings
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.utils.http_clients import http_clients, FRAPPE, SITES
+from app.api.utils.fanout import tenant_fanout
 
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-from typing import Optional
+from typing import Dict, Optional
 
 
 # API_KEY = os.getenv("API_KEY")
@@ -39,20 +44,20 @@ async def fetch_total_users():
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{FRAPPE_BASE_URL}/api/method/admin_clientportalapp.users.get_users")
-            response.raise_for_status()
-            data = response.json()
+        client = http_clients.get(FRAPPE)
+        response = await client.get(f"{FRAPPE_BASE_URL}/api/method/admin_clientportalapp.users.get_users")
+        response.raise_for_status()
+        data = response.json()
 
-            user_data = data.get("message", {})
-            if not user_data:
-                logging.warning("No users found in the response.")
-                return {"count": 0, "users": []}
+        user_data = data.get("message", {})
+        if not user_data:
+            logging.warning("No users found in the response.")
+            return {"count": 0, "users": []}
 
-            return {
-                "count": user_data.get("count", 0),
-                "users": user_data.get("users", [])
-            }
+        return {
+            "count": user_data.get("count", 0),
+            "users": user_data.get("users", [])
+        }
 
     except httpx.RequestError as e:
         logging.error(f"Request error: {e}")
@@ -71,20 +76,20 @@ async def fetch_active_users():
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{FRAPPE_BASE_URL}/api/method/admin_clientportalapp.users.get_active_users") #pass the URl Dynamically
-            response.raise_for_status()
-            data = response.json()
+        client = http_clients.get(FRAPPE)
+        response = await client.get(f"{FRAPPE_BASE_URL}/api/method/admin_clientportalapp.users.get_active_users") #pass the URl Dynamically
+        response.raise_for_status()
+        data = response.json()
 
-            user_data = data.get("message", {})
-            if not user_data:
-                logging.warning("No users found in the response.")
-                return {"count": 0, "users": []}
+        user_data = data.get("message", {})
+        if not user_data:
+            logging.warning("No users found in the response.")
+            return {"count": 0, "users": []}
 
-            return {
-                "count": user_data.get("count", 0),
-                "users": user_data.get("users", [])
-            }
+        return {
+            "count": user_data.get("count", 0),
+            "users": user_data.get("users", [])
+        }
 
     except httpx.RequestError as e:
         logging.error(f"Request error: {e}")
@@ -105,20 +110,20 @@ async def fetch_active_modules():
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{FRAPPE_BASE_URL}/api/method/admin_clientportalapp.modules.get_modules")
-            response.raise_for_status()
-            data = response.json()
+        client = http_clients.get(FRAPPE)
+        response = await client.get(f"{FRAPPE_BASE_URL}/api/method/admin_clientportalapp.modules.get_modules")
+        response.raise_for_status()
+        data = response.json()
 
-            module_data = data.get("message", {})
-            if not module_data:
-                logging.warning("No modules found in the response.")
-                return {"count": 0, "modules": []}
+        module_data = data.get("message", {})
+        if not module_data:
+            logging.warning("No modules found in the response.")
+            return {"count": 0, "modules": []}
 
-            return {
-                "count": module_data.get("count", 0),
-                "modules": module_data.get("modules", [])
-            }
+        return {
+            "count": module_data.get("count", 0),
+            "modules": module_data.get("modules", [])
+        }
 
     except httpx.RequestError as e:
         logging.error(f"Request error: {e}")
@@ -142,23 +147,23 @@ async def fetch_active_sites(email: str):
     try:
         params = {"email": email}  # Add email to query parameters
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{FRAPPE_BASE_URL}/api/method/admin_clientportalapp.sites.get_sites",
-                params=params  # Pass the email parameter here
-            )
-            response.raise_for_status()
-            data = response.json()
+        client = http_clients.get(FRAPPE)
+        response = await client.get(
+            f"{FRAPPE_BASE_URL}/api/method/admin_clientportalapp.sites.get_sites",
+            params=params  # Pass the email parameter here
+        )
+        response.raise_for_status()
+        data = response.json()
 
-            module_data = data.get("message", {})
-            if not module_data:
-                logging.warning("No sites found in the response.")
-                return {"count": 0, "site": []}
+        module_data = data.get("message", {})
+        if not module_data:
+            logging.warning("No sites found in the response.")
+            return {"count": 0, "site": []}
 
-            return {
-                "count": len(module_data),  # Get the count from the data length
-                "sites": module_data  # Directly return the list of sites
-            }
+        return {
+            "count": len(module_data),  # Get the count from the data length
+            "sites": module_data  # Directly return the list of sites
+        }
 
     except httpx.RequestError as e:
         logging.error(f"Request error: {e}")
@@ -201,20 +206,20 @@ async def fetch_active_users_dynamic(email: str):
     url = f"http://{site_name}/api/method/admin_clientportalapp.users.get_active_users"
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
+        client = http_clients.get(SITES)
+        response = await client.get(url)
+        response.raise_for_status()
+        data = response.json()
 
-            user_data = data.get("message", [])
-            if not user_data:
-                logging.warning("No users found in the response.")
-                return {"count": 0, "users": []}
+        user_data = data.get("message", [])
+        if not user_data:
+            logging.warning("No users found in the response.")
+            return {"count": 0, "users": []}
 
-            return {
-                "count": len(user_data),  # Get the count from the data length
-                "users": user_data  # Directly return the list of users
-            }
+        return {
+            "count": len(user_data),  # Get the count from the data length
+            "users": user_data  # Directly return the list of users
+        }
 
     except httpx.RequestError as e:
         logging.error(f"Request error: {e}")
@@ -228,6 +233,79 @@ async def fetch_active_users_dynamic(email: str):
 
 
 
+# Rows per INSERT, keeps each statement well under the asyncpg bind-parameter limit
+SITE_DATA_UPSERT_CHUNK_SIZE = 500
+
+# Columns an upsert must not overwrite on an existing site
+SITE_DATA_IMMUTABLE_COLUMNS = {"id", "site_name", "user_id", "created_at"}
+
+
+async def upsert_site_data(db: AsyncSession, rows: list) -> Dict[str, uuid.UUID]:
+    """
+    Inserts or updates SiteData rows with INSERT ... ON CONFLICT (site_name) DO UPDATE,
+    one statement per chunk instead of a SELECT per site.
+    Returns the id of every written row keyed by site name.
+    """
+    site_ids = {}
+    for start in range(0, len(rows), SITE_DATA_UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + SITE_DATA_UPSERT_CHUNK_SIZE]
+        stmt = pg_insert(SiteData).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SiteData.site_name],
+            set_={
+                column: stmt.excluded[column]
+                for column in chunk[0]
+                if column not in SITE_DATA_IMMUTABLE_COLUMNS
+            },
+        ).returning(SiteData.id, SiteData.site_name)
+        result = await db.execute(stmt)
+        site_ids.update({site_name: site_id for site_id, site_name in result.all()})
+    return site_ids
+
+
+async def refresh_user_site_summary(db: AsyncSession, user_id):
+    """
+    Recomputes a user's UserSiteSummary row from their SiteData rows in one upsert.
+    Runs inside the caller's transaction so the summary commits with the site data.
+    """
+    user_id = uuid.UUID(str(user_id))
+    aggregate = select(
+        literal(user_id, type_=PG_UUID(as_uuid=True)), *_summary_aggregates()
+    ).where(SiteData.user_id == user_id)
+    await db.execute(_upsert_summaries(aggregate))
+
+
+SUMMARY_COLUMNS = ["user_id", "total_sites", "active_sites", "total_users", "active_users", "active_modules", "updated_at"]
+
+
+def _summary_aggregates() -> list:
+    """SiteData aggregates for SUMMARY_COLUMNS after user_id."""
+    return [
+        func.coalesce(func.max(SiteData.total_site_counts), func.count(SiteData.id)),
+        func.coalesce(func.max(SiteData.active_site_counts), 0),
+        func.coalesce(func.sum(SiteData.total_users_count), 0),
+        func.coalesce(func.sum(SiteData.active_users_count), 0),
+        func.coalesce(func.sum(SiteData.active_modules_count), 0),
+        func.now(),
+    ]
+
+
+def _upsert_summaries(aggregate):
+    stmt = pg_insert(UserSiteSummary).from_select(SUMMARY_COLUMNS, aggregate)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserSiteSummary.user_id],
+        set_={column: stmt.excluded[column] for column in SUMMARY_COLUMNS[1:]},
+    )
+
+
+async def refresh_all_user_site_summaries(db: AsyncSession):
+    """Backfills the summary of every user that has site data in one INSERT ... SELECT ... GROUP BY."""
+    aggregate = (
+        select(SiteData.user_id, *_summary_aggregates()).group_by(SiteData.user_id)
+    )
+    await db.execute(_upsert_summaries(aggregate))
+
+
 async def fetch_consolidated_site_data(email: str) -> dict:
     """
     Fetches consolidated site data from the Frappe API.
@@ -235,12 +313,12 @@ async def fetch_consolidated_site_data(email: str) -> dict:
     frappe_api_url = f"{FRAPPE_BASE_URL}/api/method/admin_clientportalapp.site_data.get_consolidated_site_data?email={email}"
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(frappe_api_url)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            json_response = response.json()
-            logger.debug(f"Frappe API response: {json_response}")  # Debug statement
-            return json_response
+        client = http_clients.get(FRAPPE)
+        response = await client.get(frappe_api_url)
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        json_response = response.json()
+        logger.debug(f"Frappe API response: {json_response}")  # Debug statement
+        return json_response
     except httpx.RequestError as e:
         logger.error(f"Request error while calling Frappe API: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch data from Frappe API")
@@ -292,6 +370,7 @@ async def fetch_user_data(email: str, db: AsyncSession) -> dict:
         }
 
     # Process each site and update the database
+    site_rows = {}
     for site in sites_data:
         site_name = site["site_info"]["site_name"]
         site_status = site["site_info"]["site_status"]
@@ -311,6 +390,7 @@ async def fetch_user_data(email: str, db: AsyncSession) -> dict:
             # Update site counts from API response
             existing_site.total_site_counts = total_sites
             existing_site.active_site_counts = active_sites
+            site_rows[site_name] = existing_site
         else:
             # Create new site
             site_data = SiteData(
@@ -329,8 +409,22 @@ async def fetch_user_data(email: str, db: AsyncSession) -> dict:
                 active_site_counts=active_sites
             )
             db.add(site_data)
+            site_rows[site_name] = site_data
+
+    # Write the per-site users and modules into their child tables
+    await db.flush()
+    await sync_site_details(db, {
+        site_rows[site["site_info"]["site_name"]].id: {
+            "users": site["stats"].get("users", []),
+            "active_users": site["stats"].get("active_users_list", []),
+            "modules": site["stats"].get("modules", []),
+        }
+        for site in sites_data
+    })
 
     # Commit changes to the database
+    # Keep the dashboard summary in the same transaction
+    await refresh_user_site_summary(db, user.id)
     await db.commit()
 
     return {
@@ -339,6 +433,49 @@ async def fetch_user_data(email: str, db: AsyncSession) -> dict:
     }
 
 
+SITE_STATS_ENDPOINTS = {
+    "total_users": "admin_clientportalapp.users.get_users",
+    "active_users": "admin_clientportalapp.users.get_active_users",
+    "active_modules": "admin_clientportalapp.modules.get_modules",
+}
+
+
+async def fetch_sites_stats(site_names: list, scheme: str = "https", deadline: Optional[float] = None) -> dict:
+    """
+    Fetches users, active users and modules for every site concurrently.
+
+    Returns a dict keyed by site name holding the `message` of each endpoint plus an
+    `errors` dict; an endpoint that failed or missed the deadline is an empty dict
+    with its error recorded under `errors`.
+    """
+    client = http_clients.get(SITES)
+
+    def site_request(url: str):
+        async def call():
+            response = await client.get(url)
+            response.raise_for_status()
+            return response.json().get("message", {}) or {}
+        return call
+
+    jobs = {
+        (site_name, endpoint): (site_name, site_request(f"{scheme}://{site_name}/api/method/{method}"))
+        for site_name in site_names
+        for endpoint, method in SITE_STATS_ENDPOINTS.items()
+    }
+    results = await tenant_fanout.run(jobs, deadline=deadline)
+
+    sites_stats = {site_name: {"errors": {}} for site_name in site_names}
+    for (site_name, endpoint), result in results.items():
+        if result.ok:
+            sites_stats[site_name][endpoint] = result.value
+        else:
+            logging.error(f"Error fetching {endpoint} for site {site_name}: {result.error}")
+            sites_stats[site_name][endpoint] = {}
+            sites_stats[site_name]["errors"][endpoint] = result.error
+
+    return sites_stats
+
+
 async def fetch_user_data_count(email: str):
     # Step 1: Fetch active sites
     active_sites_response = await fetch_active_sites(email=email)
@@ -371,68 +508,47 @@ async def fetch_user_data_count(email: str):
     active_modules_count = 0
     active_modules_list = []
 
-    headers = {
-        # "Authorization": f"token {API_KEY}:{API_SECRET}"
-    }
+    # Step 2: Fetch every site and endpoint concurrently
+    site_names = [site.get("site_name") for site in sites if site.get("site_name")]
+    sites_stats = await fetch_sites_stats(site_names, scheme="http")
 
-    # Step 2: Loop through all sites and fetch data
-    async with httpx.AsyncClient() as client:
-        for site in sites:
-            site_name = site.get("site_name")
-            if not site_name:
-                continue
-
-            # Define dynamic URLs
-            urls = {
-                "total_users": f"http://{site_name}/api/method/admin_clientportalapp.users.get_users",
-                "active_users": f"http://{site_name}/api/method/admin_clientportalapp.users.get_active_users",
-                "active_modules": f"http://{site_name}/api/method/admin_clientportalapp.modules.get_modules"
-            }
+    for site in sites:
+        site_name = site.get("site_name")
+        if not site_name:
+            continue
+
+        site_stats = sites_stats[site_name]
+        total_users_data = site_stats["total_users"]
+        active_users_data = site_stats["active_users"]
+        active_modules_data = site_stats["active_modules"]
+
+        # Aggregate global data (a failed endpoint contributes nothing)
+        total_users_count += total_users_data.get("count", 0)
+        total_users_list.extend(total_users_data.get("users", []))
+
+        active_users_count += active_users_data.get("count", 0)
+        active_users_list.extend(active_users_data.get("users", []))
 
-            try:
-                # Fetch data from each site
-                total_users_response = await client.get(urls["total_users"])
-                total_users_response.raise_for_status()
-
-                active_users_response = await client.get(urls["active_users"])
-                active_users_response.raise_for_status()
-
-                active_modules_response = await client.get(urls["active_modules"])
-                active_modules_response.raise_for_status()
-
-                # Parse responses
-                total_users_data = total_users_response.json().get("message", {})
-                active_users_data = active_users_response.json().get("message", {})
-                active_modules_data = active_modules_response.json().get("message", {})
-
-                # Aggregate global data
-                total_users_count += total_users_data.get("count", 0)
-                total_users_list.extend(total_users_data.get("users", []))
-
-                active_users_count += active_users_data.get("count", 0)
-                active_users_list.extend(active_users_data.get("users", []))
-
-                active_modules_count += active_modules_data.get("count", 0)
-                active_modules_list.extend(active_modules_data.get("modules", []))
-
-                # Add site-specific data
-                site["total_users"] = {
-                    "count": total_users_data.get("count", 0),
-                    f"total_users_for_{site_name}": total_users_data.get("users", [])
-                }
-                site["active_users"] = {
-                    "count": active_users_data.get("count", 0),
-                    f"active_users_for_{site_name}": active_users_data.get("users", [])
-                }
-                site["active_modules"] = {
-                    "count": active_modules_data.get("count", 0),
-                    f"active_modules_for_{site_name}": active_modules_data.get("modules", [])
-                }
-
-            except httpx.RequestError as e:
-                logging.error(f"Request error on site {site_name}: {e}")
-            except httpx.HTTPStatusError as e:
-                logging.error(f"HTTP error on site {site_name}: {e.response.status_code} - {e.response.text}")
+        active_modules_count += active_modules_data.get("count", 0)
+        active_modules_list.extend(active_modules_data.get("modules", []))
+
+        # Add site-specific data
+        site["total_users"] = {
+            "count": total_users_data.get("count", 0),
+            f"total_users_for_{site_name}": total_users_data.get("users", [])
+        }
+        site["active_users"] = {
+            "count": active_users_data.get("count", 0),
+            f"active_users_for_{site_name}": active_users_data.get("users", [])
+        }
+        site["active_modules"] = {
+            "count": active_modules_data.get("count", 0),
+            f"active_modules_for_{site_name}": active_modules_data.get("modules", [])
+        }
+
+        # Mark partial results so the frontend can tell a failed site from an empty one
+        site["partial"] = bool(site_stats["errors"])
+        site["errors"] = site_stats["errors"]
 
     # Step 3: Return consolidated data
     return {
@@ -455,160 +571,156 @@ async def fetch_user_data_count(email: str):
     }
 
 
-async def get_site_data(id: str, db: AsyncSession):
+# In-flight background refreshes, keyed by user id, so concurrent requests share one
+_site_data_refreshes: Dict[str, asyncio.Task] = {}
+
+
+def site_data_response(site: SiteData) -> dict:
+    """Serializes a stored SiteData row into the /sites-data site shape."""
+    return {
+        "site_name": site.site_name,
+        "active": site.active_sites,
+        "creation_date": site.created_at,
+        "country": site.location,
+        "last_updated": site.updated_at,
+        "total_users": {
+            "count": site.total_users_count or 0,
+            "users": site.total_users or [],
+        },
+        "active_users": {
+            "count": site.active_users_count or 0,
+            "users": site.active_users or [],
+        },
+        "active_modules": {
+            "count": site.active_modules_count or 0,
+            "modules": site.active_modules or [],
+        },
+    }
+
+
+def apply_site_stats(site: SiteData, site_stats: dict) -> bool:
+    """
+    Copies freshly fetched stats onto a SiteData row, skipping endpoints that failed.
+    Returns True if at least one endpoint was refreshed.
+    """
+    errors = site_stats.get("errors", {})
+    refreshed = False
+
+    if "total_users" not in errors:
+        total_users_data = site_stats["total_users"]
+        site.total_users_count = int(total_users_data.get("count", 0))
+        site.total_users = total_users_data.get("users", [])
+        refreshed = True
+
+    if "active_users" not in errors:
+        active_users_data = site_stats["active_users"]
+        site.active_users_count = int(active_users_data.get("count", 0))
+        site.active_users = active_users_data.get("users", [])
+        refreshed = True
+
+    if "active_modules" not in errors:
+        active_modules_data = site_stats["active_modules"]
+        site.active_modules_count = int(active_modules_data.get("count", 0))
+        site.active_modules = active_modules_data.get("modules", [])
+        refreshed = True
+
+    if refreshed:
+        site.updated_at = datetime.now()
+
+    return refreshed
+
+
+def site_detail_lists(site_stats: dict) -> dict:
+    """
+    Picks the user and module lists out of fetched stats for sync_site_details,
+    leaving out endpoints that failed so their stored rows are kept.
+    """
+    errors = site_stats.get("errors", {})
+    lists = {}
+    if "total_users" not in errors and "active_users" not in errors:
+        lists["users"] = site_stats["total_users"].get("users", [])
+        lists["active_users"] = site_stats["active_users"].get("users", [])
+    if "active_modules" not in errors:
+        lists["modules"] = site_stats["active_modules"].get("modules", [])
+    return lists
+
+
+async def refresh_user_site_data(user_id: str):
     """
-    Fetch and update site data with real-time checks.
-    Includes verification steps for count updates and detailed logging.
+    Re-fetches live stats for every site of a user and writes them back to SiteData.
+    Runs in the background with its own session.
     """
-    # Start a new transaction
-    async with db.begin():
+    async with async_sessionmaker() as db:
         try:
-            # Get existing site data
-            result = await db.execute(select(SiteData).where(SiteData.user_id == id))
+            result = await db.execute(select(SiteData).where(SiteData.user_id == user_id))
             user_sites = result.scalars().all()
-
             if not user_sites:
-                return await fetch_user_data(id=id, db=db)
-
-            async with httpx.AsyncClient(timeout=30.0) as client: 
-                updated_sites_data = []
-                total_users_count = 0
-                active_users_count = 0
-                active_modules_count = 0
-                active_sites_count = 0
-
-                for site in user_sites:
-                    try:
-                        # Log current database values
-                        logging.info(f"Current DB values for site {site.site_name}: "
-                                   f"total_users={site.total_users_count}, "
-                                   f"active_users={site.active_users_count}")
-
-                        # Real-time API calls
-                        urls = {
-                            "total_users": f"https://{site.site_name}/api/method/admin_clientportalapp.users.get_users",
-                            "active_users": f"https://{site.site_name}/api/method/admin_clientportalapp.users.get_active_users",
-                            "active_modules": f"https://{site.site_name}/api/method/admin_clientportalapp.modules.get_modules",
-                        }
-
-                        # Make API calls with explicit timeouts
-                        responses = await asyncio.gather(
-                            client.get(urls["total_users"]),
-                            client.get(urls["active_users"]),
-                            client.get(urls["active_modules"]),
-                            return_exceptions=True
-                        )
-
-                        # Verify responses
-                        if any(isinstance(resp, Exception) for resp in responses):
-                            raise httpx.RequestError("One or more API calls failed")
-
-                        # Parse response data with verification
-                        total_users_data = responses[0].json().get("message", {})
-                        active_users_data = responses[1].json().get("message", {})
-                        active_modules_data = responses[2].json().get("message", {})
-
-                        # Extract and verify counts
-                        site_total_users = int(total_users_data.get("count", 0))
-                        site_active_users = int(active_users_data.get("count", 0))
-                        site_active_modules = int(active_modules_data.get("count", 0))
-
-                        # Log new values from API
-                        logging.info(f"New API values for site {site.site_name}: "
-                                   f"total_users={site_total_users}, "
-                                   f"active_users={site_active_users}")
-
-                        # Verify if counts have changed
-                        counts_changed = (
-                            site.total_users_count != site_total_users or
-                            site.active_users_count != site_active_users or
-                            site.active_modules_count != site_active_modules
-                        )
-
-                        if counts_changed:
-                            logging.info(f"Updating counts for site {site.site_name}")
-                            # Update counts in database
-                            site.total_users_count = site_total_users
-                            site.active_users_count = site_active_users
-                            site.active_modules_count = site_active_modules
-                            
-                            # Update user lists
-                            site.total_users = total_users_data.get("users", [])
-                            site.active_users = active_users_data.get("users", [])
-                            site.active_modules = active_modules_data.get("modules", [])
-                            
-                            # Explicitly mark for update
-                            db.add(site)
-
-                        # Prepare response data
-                        current_site_data = {
-                            "site_name": site.site_name,
-                            "active": site.active_sites,
-                            "creation_date": site.created_at,
-                            "country": site.location,
-                            "total_users": {
-                                "count": site_total_users,
-                                "users": total_users_data.get("users", []),
-                            },
-                            "active_users": {
-                                "count": site_active_users,
-                                "users": active_users_data.get("users", []),
-                            },
-                            "active_modules": {
-                                "count": site_active_modules,
-                                "modules": active_modules_data.get("modules", []),
-                            },
-                        }
-
-                    except Exception as e:
-                        logging.error(f"Error processing site {site.site_name}: {str(e)}")
-                        # Use database fallback
-                        current_site_data = {
-                            "site_name": site.site_name,
-                            "active": site.active_sites,
-                            "creation_date": site.created_at,
-                            "country": site.location,
-                            "total_users": {
-                                "count": site.total_users_count or 0,
-                                "users": site.total_users or [],
-                            },
-                            "active_users": {
-                                "count": site.active_users_count or 0,
-                                "users": site.active_users or [],
-                            },
-                            "active_modules": {
-                                "count": site.active_modules_count or 0,
-                                "modules": site.active_modules or [],
-                            },
-                        }
-
-                    updated_sites_data.append(current_site_data)
-                    
-                    # Update running totals
-                    total_users_count += current_site_data["total_users"]["count"]
-                    active_users_count += current_site_data["active_users"]["count"]
-                    active_modules_count += current_site_data["active_modules"]["count"]
-                    active_sites_count += 1 if current_site_data["active"] else 0
-
-                # Explicitly commit changes
-                await db.commit()
-
-                return {
-                    "totals": {
-                        "total_sites": len(user_sites),
-                        "active_sites": active_sites_count,
-                        "total_users": total_users_count,
-                        "active_users": active_users_count,
-                        "total_active_modules": active_modules_count,
-                    },
-                    "sites_data": updated_sites_data,
-                }
+                return
+
+            sites_stats = await fetch_sites_stats([site.site_name for site in user_sites])
 
+            refreshed_count = 0
+            for site in user_sites:
+                if apply_site_stats(site, sites_stats[site.site_name]):
+                    refreshed_count += 1
+
+            await sync_site_details(db, {
+                site.id: site_detail_lists(sites_stats[site.site_name]) for site in user_sites
+            })
+            await refresh_user_site_summary(db, user_id)
+            await db.commit()
+            logging.info(f"Refreshed {refreshed_count} of {len(user_sites)} sites for user {user_id}")
         except Exception as e:
-            # Rollback on error
             await db.rollback()
-            logging.error(f"Transaction failed: {str(e)}")
-            raise
+            logging.error(f"Background site data refresh failed for user {user_id}: {str(e)}")
+
+
+def schedule_site_data_refresh(user_id: str) -> asyncio.Task:
+    """Starts a background refresh for a user unless one is already running."""
+    task = _site_data_refreshes.get(user_id)
+    if task is None or task.done():
+        task = asyncio.create_task(refresh_user_site_data(user_id))
+        _site_data_refreshes[user_id] = task
+        task.add_done_callback(
+            lambda finished: _site_data_refreshes.pop(user_id, None) if _site_data_refreshes.get(user_id) is finished else None
+        )
+    return task
+
+
+async def get_site_data(id: str, db: AsyncSession) -> Optional[dict]:
+    """
+    Serves site data straight from the SiteData rows (stale-while-revalidate).
+
+    When the oldest row is older than SITE_DATA_FRESHNESS_SECONDS a background refresh
+    is started and the stored values are returned as-is; `last_updated` tells the
+    frontend how fresh the numbers are. Returns None if the user has no sites.
+    """
+    result = await db.execute(select(SiteData).where(SiteData.user_id == id))
+    user_sites = result.scalars().all()
+
+    if not user_sites:
+        return None
+
+    sites_data = [site_data_response(site) for site in user_sites]
+
+    last_updated = min(site.updated_at for site in user_sites)
+    stale = datetime.now() - last_updated > timedelta(seconds=settings.SITE_DATA_FRESHNESS_SECONDS)
+    if stale:
+        schedule_site_data_refresh(str(id))
+
+    return {
+        "totals": {
+            "total_sites": len(user_sites),
+            "active_sites": sum(1 for site in sites_data if site["active"]),
+            "total_users": sum(site["total_users"]["count"] for site in sites_data),
+            "active_users": sum(site["active_users"]["count"] for site in sites_data),
+            "total_active_modules": sum(site["active_modules"]["count"] for site in sites_data),
+        },
+        "sites_data": sites_data,
+        "last_updated": last_updated,
+        "stale": stale,
+        "refreshing": str(id) in _site_data_refreshes,
+    }
 
 
 
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.api.models.user_model import User
 from app.api.security.security import create_access_token, create_verification_token, get_current_user_id, verify_password_reset_token, hash_password
 from app.api.config.email_config import EmailService, PasswordResetMailService
+from app.api.security.auth_cache import principal_cache
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 import logging
@@ -26,6 +27,7 @@ async def verify_email_logic(token: str, db: AsyncSession, user: User = Depends(
     user.is_active = True
     try:
         await db.commit()
+        principal_cache.invalidate(user.id)
         logging.info(f"User {user.email} has been activated successfully.")
         await db.refresh(user)
     except Exception as e:
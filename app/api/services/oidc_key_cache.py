@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+from authlib.jose import JsonWebKey
+
+from app.api.config.settings import settings
+from app.api.utils.http_clients import http_clients, GOOGLE
+
+
+logger = logging.getLogger(__name__)
+
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def cache_max_age(response: httpx.Response, default: float) -> float:
+    """Seconds the response may be cached for, from Cache-Control (no-store/no-cache mean 0)."""
+    cache_control = response.headers.get("cache-control", "")
+    if re.search(r"no-store|no-cache", cache_control, re.IGNORECASE):
+        return 0.0
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return float(match.group(1)) - float(response.headers.get("age", 0) or 0)
+    return default
+
+
+class OIDCKeyCache:
+    """
+    The provider's signing keys by kid, imported once and kept ready for jwt.decode.
+
+    The discovery document and the JWKS are each cached for their Cache-Control
+    max-age. A token with a kid that is not in the current set (the provider rotated
+    its keys) triggers a refetch, at most once per `min_refresh` seconds so random
+    kids cannot make us hammer the provider. Concurrent refetches share one request.
+    If a refetch fails, the expired keys keep being used.
+    """
+
+    def __init__(self, discovery_url: str, default_max_age: float, min_refresh: float):
+        self.discovery_url = discovery_url
+        self.default_max_age = default_max_age
+        self.min_refresh = min_refresh
+
+        self._jwks_uri: Optional[str] = None
+        self._jwks_uri_expires_at = 0.0
+        self._keys: Dict[str, object] = {}
+        self._keys_expires_at = 0.0
+        self._last_refresh = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def _get_jwks_uri(self) -> str:
+        if self._jwks_uri is not None and time.monotonic() < self._jwks_uri_expires_at:
+            return self._jwks_uri
+        response = await http_clients.get(GOOGLE).get(self.discovery_url)
+        response.raise_for_status()
+        self._jwks_uri = response.json()["jwks_uri"]
+        self._jwks_uri_expires_at = time.monotonic() + cache_max_age(response, self.default_max_age)
+        return self._jwks_uri
+
+    async def _refresh(self):
+        self._last_refresh = time.monotonic()
+        jwks_uri = await self._get_jwks_uri()
+        response = await http_clients.get(GOOGLE).get(jwks_uri)
+        response.raise_for_status()
+
+        keys = {}
+        for jwk in response.json().get("keys", []):
+            try:
+                keys[jwk["kid"]] = JsonWebKey.import_key(jwk)
+            except Exception as e:
+                logger.warning(f"Skipping unusable JWK {jwk.get('kid')} from {jwks_uri}: {e}")
+        self._keys = keys
+        self._keys_expires_at = time.monotonic() + cache_max_age(response, self.default_max_age)
+        logger.info(f"Loaded {len(keys)} signing keys from {jwks_uri}")
+
+    def _needs_refresh(self, kid: str) -> bool:
+        if time.monotonic() >= self._keys_expires_at:
+            return True
+        return kid not in self._keys and time.monotonic() - self._last_refresh >= self.min_refresh
+
+    async def get_key(self, kid: str):
+        """The imported key for `kid`, or None if the provider does not publish it."""
+        if not self._needs_refresh(kid):
+            return self._keys.get(kid)
+
+        async with self._lock:
+            # Another caller may have refreshed while this one waited for the lock
+            if self._needs_refresh(kid):
+                try:
+                    await self._refresh()
+                except (httpx.HTTPError, KeyError, ValueError) as e:
+                    if not self._keys:
+                        raise
+                    logger.warning(f"Refreshing signing keys from {self.discovery_url} failed, using cached keys: {e}")
+        return self._keys.get(kid)
+
+
+google_keys = OIDCKeyCache(
+    discovery_url=settings.GOOGLE_OIDC_DISCOVERY_URL,
+    default_max_age=settings.GOOGLE_OIDC_DEFAULT_MAX_AGE_SECONDS,
+    min_refresh=settings.GOOGLE_JWKS_MIN_REFRESH_SECONDS,
+)
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import logging
+import random
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.config.settings import settings
+from app.api.database.db import async_sessionmaker
+from app.api.models.outbox_message import OutboxMessage
+from app.api.models.transactions import UserTransactions
+from app.api.utils.frappe_utils import create_frappe_site, store_site_data
+from app.api.utils.json_encoder import CustomJSONEncoder
+
+
+logger = logging.getLogger(__name__)
+
+
+# Message kinds
+CREATE_FRAPPE_SITE = "create_frappe_site"
+STORE_SITE_DATA = "store_site_data"
+
+PENDING = "pending"
+DONE = "done"
+DEAD = "dead"
+
+
+def enqueue(db: AsyncSession, kind: str, payload: dict, transaction_id=None) -> OutboxMessage:
+    """
+    Adds an outbound write to the session. It is only queued once the caller
+    commits, together with whatever change it belongs to.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown outbox message kind '{kind}'")
+    message = OutboxMessage(
+        kind=kind,
+        payload=json.loads(json.dumps(payload, cls=CustomJSONEncoder)),
+        transaction_id=transaction_id,
+    )
+    db.add(message)
+    return message
+
+
+# Handlers: `send` makes the Frappe call outside any DB transaction; `on_success`
+# and `on_dead` record the outcome on the transaction row, committed with the message status.
+
+async def _send_create_frappe_site(payload: dict):
+    return await create_frappe_site(
+        site_name=payload["site_name"],
+        plan=payload["plan"],
+        quantity=payload["quantity"],
+    )
+
+
+def _created_frappe_site(transaction: UserTransactions, response):
+    transaction.site_creation_status = "initiated"
+    if response and "job_id" in response:
+        transaction.site_creation_job_id = response.get("job_id")
+    logger.info(f"Site creation initiated successfully for {transaction.site_name}")
+
+
+def _stored_site_data(transaction: UserTransactions, response):
+    transaction.site_creation_status = "complete"
+    logger.info(f"Site data successfully stored in Frappe for {transaction.site_name}")
+
+
+def _mark_failed(transaction: UserTransactions, error: str):
+    transaction.site_creation_status = "failed"
+    transaction.site_creation_error = error
+
+
+class OutboxHandler(NamedTuple):
+    send: Callable[[dict], Awaitable]
+    on_success: Callable
+    on_dead: Callable
+
+
+HANDLERS: Dict[str, OutboxHandler] = {
+    CREATE_FRAPPE_SITE: OutboxHandler(_send_create_frappe_site, _created_frappe_site, _mark_failed),
+    STORE_SITE_DATA: OutboxHandler(store_site_data, _stored_site_data, _mark_failed),
+}
+
+
+# Claims due messages and pushes their next attempt out by the lease in one statement,
+# so the row locks are held only for this short transaction and not during the
+# Frappe call. A worker that dies mid-call leaves the message to be retried after the lease.
+CLAIM_DUE_MESSAGES = text(
+    "UPDATE outbox_messages SET attempts = attempts + 1, "
+    "next_attempt_at = now() + make_interval(secs => :lease) "
+    "WHERE id IN ("
+    "  SELECT id FROM outbox_messages "
+    "  WHERE status = 'pending' AND next_attempt_at <= now() "
+    "  ORDER BY next_attempt_at LIMIT :limit "
+    "  FOR UPDATE SKIP LOCKED"
+    ") RETURNING id, kind, payload, transaction_id, attempts"
+)
+
+
+def _error_text(error: Exception) -> str:
+    return str(getattr(error, "detail", None) or error) or type(error).__name__
+
+
+class OutboxWorker:
+    """
+    Drains outbox_messages with OUTBOX_WORKERS tasks per process. Every process runs
+    its own tasks; FOR UPDATE SKIP LOCKED keeps them from claiming the same message.
+
+    A failed delivery is retried with jittered exponential backoff from
+    OUTBOX_RETRY_BASE_SECONDS up to OUTBOX_RETRY_MAX_SECONDS. After
+    OUTBOX_MAX_ATTEMPTS the message is marked "dead" and the transaction is marked failed.
+    """
+
+    def __init__(self):
+        self.workers = settings.OUTBOX_WORKERS
+        self.batch_size = settings.OUTBOX_BATCH_SIZE
+        self.poll = settings.OUTBOX_POLL_SECONDS
+        self.max_attempts = settings.OUTBOX_MAX_ATTEMPTS
+        self.retry_base = settings.OUTBOX_RETRY_BASE_SECONDS
+        self.retry_max = settings.OUTBOX_RETRY_MAX_SECONDS
+        self.lease = settings.OUTBOX_LEASE_SECONDS
+
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self):
+        if not self._tasks:
+            self._wakeup = asyncio.Event()
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+            logger.info(f"Outbox worker started with {self.workers} tasks.")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Outbox worker stopped.")
+
+    def notify(self):
+        """Wakes the idle tasks after a commit that queued messages, instead of waiting for the next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def retry_delay(self, attempts: int) -> float:
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _run(self):
+        while True:
+            try:
+                if await self.process_due_messages():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker tick failed: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll)
+            except asyncio.TimeoutError:
+                pass
+
+    async def process_due_messages(self) -> int:
+        """Claims and delivers one batch of due messages; returns how many were claimed."""
+        async with async_sessionmaker() as db:
+            result = await db.execute(CLAIM_DUE_MESSAGES, {"lease": self.lease, "limit": self.batch_size})
+            claimed = result.all()
+            await db.commit()
+
+        for message in claimed:
+            await self._deliver(message)
+        return len(claimed)
+
+    async def _deliver(self, message):
+        handler = HANDLERS.get(message.kind)
+        response, error = None, None
+        if handler is None:
+            error = f"Unknown outbox message kind '{message.kind}'"
+        else:
+            try:
+                response = await handler.send(message.payload)
+            except Exception as e:
+                error = _error_text(e)
+
+        async with async_sessionmaker() as db:
+            transaction = None
+            if message.transaction_id is not None:
+                transaction = await db.get(UserTransactions, message.transaction_id)
+
+            if error is None:
+                values = {"status": DONE, "processed_at": func.now(), "last_error": None}
+                if transaction is not None:
+                    handler.on_success(transaction, response)
+            elif handler is None or message.attempts >= self.max_attempts:
+                values = {"status": DEAD, "processed_at": func.now(), "last_error": error}
+                if transaction is not None and handler is not None:
+                    handler.on_dead(transaction, error)
+                logger.error(f"Outbox message {message.id} ({message.kind}) is dead after {message.attempts} attempts: {error}")
+            else:
+                delay = self.retry_delay(message.attempts)
+                values = {
+                    "next_attempt_at": func.now() + func.make_interval(0, 0, 0, 0, 0, 0, delay),
+                    "last_error": error,
+                }
+                logger.warning(
+                    f"Outbox message {message.id} ({message.kind}) attempt {message.attempts} failed, "
+                    f"retrying in {delay:.0f}s: {error}"
+                )
+
+            await db.execute(update(OutboxMessage).where(OutboxMessage.id == message.id).values(**values))
+            await db.commit()
+
+
+async def outbox_stats(db: AsyncSession) -> dict:
+    """Message counts by status, plus the age in seconds of the oldest pending message."""
+    result = await db.execute(
+        select(OutboxMessage.status, func.count()).group_by(OutboxMessage.status)
+    )
+    counts = {status: count for status, count in result.all()}
+    oldest = await db.execute(
+        select(func.extract("epoch", func.now() - func.min(OutboxMessage.created_at)))
+        .where(OutboxMessage.status == PENDING)
+    )
+    oldest_pending = oldest.scalar()
+    return {
+        "pending": counts.get(PENDING, 0),
+        "done": counts.get(DONE, 0),
+        "dead": counts.get(DEAD, 0),
+        "oldest_pending_seconds": round(float(oldest_pending), 1) if oldest_pending is not None else None,
+    }
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.config.settings import settings
+from app.api.database.db import async_sessionmaker
+from app.api.models.product import Product
+from app.api.services.product_services import apply_frappe_product, fetch_and_save_product, fetch_product_from_frappe, fetch_products_from_db
+from app.api.utils.json_encoder import CustomJSONEncoder
+
+
+logger = logging.getLogger(__name__)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value matches `etag` (weak comparison, as RFC 9110 asks)."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class ProductCatalogCache:
+    """
+    The /get-products response, kept as encoded JSON bytes with its ETag, so a
+    catalog read is a memory copy instead of a query plus serialization.
+
+    Anything that writes products calls invalidate(). That clears this worker's
+    copy; other workers pick up the change within PRODUCT_CATALOG_CACHE_TTL_SECONDS.
+    Concurrent misses share one rebuild.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._built_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._body is not None and time.monotonic() - self._built_at < self.ttl
+
+    def invalidate(self):
+        self._generation += 1
+        self._body = self._etag = None
+
+    async def get(self, db: AsyncSession) -> Tuple[bytes, str]:
+        """Returns (body, etag), rebuilding from `db` if the cached copy is missing or expired."""
+        if self._fresh():
+            return self._body, self._etag
+
+        async with self._lock:
+            if self._fresh():
+                return self._body, self._etag
+
+            generation = self._generation
+            products = await fetch_products_from_db(db)
+            if not products["products"]:
+                logger.info("No products found in the database. Fetching from external API.")
+                # `db` may be a replica session, save through the primary
+                async with async_sessionmaker() as primary:
+                    products = await fetch_and_save_product(primary)
+
+            body = json.dumps(products, cls=CustomJSONEncoder, separators=(",", ":")).encode()
+            etag = make_etag(body)
+            # Only cache a real catalog, and not one invalidated while it was being built
+            if products["products"] and generation == self._generation:
+                self._body, self._etag, self._built_at = body, etag, time.monotonic()
+            return body, etag
+
+
+product_catalog_cache = ProductCatalogCache(ttl=settings.PRODUCT_CATALOG_CACHE_TTL_SECONDS)
+
+
+class ProductRefresher:
+    """
+    Refreshes single products from Frappe after the product page has been served
+    from the database. A product_code refreshed within PRODUCT_REFRESH_TTL_SECONDS
+    is not fetched again, and only one refresh per product_code runs at a time.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._refreshed_at: Dict[str, float] = {}
+        self._in_flight: Set[str] = set()
+        # Strong references so running refreshes are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, product_code: str):
+        if not product_code or product_code in self._in_flight:
+            return
+        if time.monotonic() - self._refreshed_at.get(product_code, float("-inf")) < self.ttl:
+            return
+        self._in_flight.add(product_code)
+        task = asyncio.create_task(self._refresh(product_code))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, product_code: str):
+        try:
+            item = await fetch_product_from_frappe(product_code)
+            if item is not None:
+                async with async_sessionmaker() as db:
+                    result = await db.execute(select(Product).where(Product.product_code == product_code))
+                    product = result.scalar_one_or_none()
+                    if product is not None and apply_frappe_product(product, item):
+                        await db.commit()
+                        product_catalog_cache.invalidate()
+                        logger.info(f"Refreshed product {product_code} from Frappe")
+        except Exception as e:
+            logger.warning(f"Background refresh of product {product_code} failed: {e}")
+        finally:
+            # Failures also wait out the TTL, so a Frappe outage is not hit on every view
+            self._refreshed_at[product_code] = time.monotonic()
+            self._in_flight.discard(product_code)
+
+
+product_refresher = ProductRefresher(ttl=settings.PRODUCT_REFRESH_TTL_SECONDS)
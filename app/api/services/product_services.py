@@ -1,106 +1,67 @@
 import uuid
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.api.models.product import Product
+from app.api.models.product import PRODUCT_SYNC_COLUMNS, Product, product_content_hash
 import httpx
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-import requests
 from app.api.config.erp_config import FRAPPE_BASE_URL, HEADERS
 from app.api.schemas.product_schema import ItemUpdateRequest
+from app.api.utils.fanout import FanOutResult, frappe_fanout
+from app.api.utils.http_clients import http_clients, FRAPPE
 import logging
+from datetime import date
+from functools import partial
+from typing import Any, Dict, List, Optional
 
 
 
 
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("product_fetch.log"),
-        logging.StreamHandler()
-    ]
-)
-
-
 
 async def fetch_and_save_product(db: AsyncSession) -> dict:
     url = f"{FRAPPE_BASE_URL}/api/method/clientportalapp.products.get_products_pricing"
     product_data = []
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url)
-            response.raise_for_status()
-            response_json = response.json()
-            product_data = response_json.get("message", {}).get("items", [])
-        except httpx.HTTPStatusError as exc:
-            logging.error(f"HTTP error details: {exc.response.text}")
-            return {"message": "Error fetching products", "products": []}
-        except Exception as e:
-            logging.error(f"Unable to fetch product data: {str(e)}")
-            return {"message": "Error fetching products", "products": []}
+    client = http_clients.get(FRAPPE)
+    try:
+        response = await client.get(url)
+        response.raise_for_status()
+        response_json = response.json()
+        product_data = response_json.get("message", {}).get("items", [])
+    except httpx.HTTPStatusError as exc:
+        logging.error(f"HTTP error details: {exc.response.text}")
+        return {"message": "Error fetching products", "products": []}
+    except Exception as e:
+        logging.error(f"Unable to fetch product data: {str(e)}")
+        return {"message": "Error fetching products", "products": []}
 
     if not product_data:
         logging.warning("No products fetched from API.")
         return {"message": "No products found", "products": []}
 
-    updated_products = []
-
-    for item in product_data:
-        # Directly use the plans data structure from the API response
-        formatted_product = {
-            "product_id": item.get("name"),
-            "product_name": item.get("item_name"),
-            "item_group": item.get("item_group", "Unknown"),
-            "product_description": item.get("description", "No description provided."),
-            "product_image": item.get("images", [None])[0],
-            "images": item.get("images", []),
-            "benefits": item.get("benefits", []),
-            "plans": item.get("plans", {})  # Store the entire plans object directly
-        }
-
-        query = select(Product).where(Product.product_code == formatted_product["product_id"])
-        result = await db.execute(query)
-        existing_product = result.scalars().first()
-
-        if not existing_product:
-            new_product = Product(
-                id=uuid.uuid4(),
-                product_code=formatted_product["product_id"],
-                product_title=formatted_product["product_name"],
-                item_group=formatted_product["item_group"],
-                product_description=formatted_product["product_description"],
-                product_image=formatted_product["product_image"],
-                images=formatted_product["images"],
-                benefits=formatted_product["benefits"],
-                plans=formatted_product["plans"]  # Store plans directly
-            )
-            db.add(new_product)
-            updated_products.append(new_product)
-        else:
-            existing_product.product_title = formatted_product["product_name"]
-            existing_product.item_group = formatted_product["item_group"]
-            existing_product.product_description = formatted_product["product_description"]
-            existing_product.product_image = formatted_product["product_image"]
-            existing_product.images = formatted_product["images"]
-            existing_product.benefits = formatted_product["benefits"]
-            existing_product.plans = formatted_product["plans"]  # Update plans directly
-            updated_products.append(existing_product)
+    rows = [frappe_item_to_row(item) for item in product_data]
 
     try:
+        counts = await upsert_products(db, rows)
         await db.commit()
     except Exception as e:
         logging.error(f"Error committing to database: {str(e)}")
         await db.rollback()
         raise HTTPException(status_code=500, detail="Error saving products to database")
 
-    # Return the products with the complete plans structure
+    logger.info(
+        f"Product sync: {counts['created']} created, {counts['updated']} updated, "
+        f"{counts['unchanged']} unchanged"
+    )
+
+    # Return the synced products with the complete plans structure
+    result = await db.execute(select(Product).where(Product.product_code.in_([row["product_code"] for row in rows])))
     response_products = [
         {
             "id": str(product.id),
@@ -113,10 +74,114 @@ async def fetch_and_save_product(db: AsyncSession) -> dict:
             "benefits": product.benefits,
             "plans": product.plans  # Return the complete plans object
         }
-        for product in updated_products
+        for product in result.scalars().all()
     ]
 
-    return {"message": "Products fetched successfully", "products": response_products}
+    return {"message": "Products fetched successfully", "products": response_products, "sync": counts}
+
+
+# Rows per INSERT statement, well under asyncpg's 32767 bind parameter limit
+PRODUCT_UPSERT_CHUNK_SIZE = 500
+
+
+def frappe_item_to_row(item: dict) -> dict:
+    """Map an item from get_products_pricing to product columns."""
+    return {
+        "product_code": item.get("name"),
+        "product_title": item.get("item_name"),
+        "item_group": item.get("item_group", "Unknown"),
+        "product_description": item.get("description", "No description provided."),
+        "product_image": (item.get("images") or [None])[0],
+        "images": item.get("images", []),
+        "benefits": item.get("benefits", []),
+        "plans": item.get("plans", {}),  # Store the entire plans object directly
+    }
+
+
+async def upsert_products(db: AsyncSession, rows: List[dict]) -> Dict[str, int]:
+    """
+    Inserts or updates products by product_code in chunked INSERT ... ON CONFLICT
+    statements (not committed). Existing rows whose content hash matches are left
+    untouched. Returns the created, updated and unchanged counts.
+    """
+    # ON CONFLICT cannot touch the same row twice in one statement, keep the last entry per code
+    by_code = {row["product_code"]: row for row in rows if row.get("product_code")}
+    rows = [{**row, "content_hash": product_content_hash(row)} for row in by_code.values()]
+
+    created = updated = 0
+    for start in range(0, len(rows), PRODUCT_UPSERT_CHUNK_SIZE):
+        chunk = [{"id": uuid.uuid4(), **row} for row in rows[start:start + PRODUCT_UPSERT_CHUNK_SIZE]]
+        stmt = pg_insert(Product).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["product_code"],
+            set_={
+                **{column: stmt.excluded[column] for column in PRODUCT_SYNC_COLUMNS + ["content_hash"]},
+                "updated_at": func.now(),
+            },
+            where=Product.content_hash.is_distinct_from(stmt.excluded.content_hash),
+        ).returning(literal_column("xmax = 0").label("inserted"))
+        result = await db.execute(stmt)
+        for inserted in result.scalars().all():
+            if inserted:
+                created += 1
+            else:
+                updated += 1
+
+    return {"created": created, "updated": updated, "unchanged": len(rows) - created - updated}
+
+
+DEFAULT_PRODUCT_IMAGE = "https://example.com/default-product-image.jpg"
+
+
+def webhook_item_to_row(item: dict) -> dict:
+    """Map an item from the Frappe product-update webhook to product columns."""
+    return {
+        "product_code": item.get("name"),
+        "product_title": item.get("item_name"),
+        "item_group": item.get("item_group", "Unknown"),
+        "product_description": item.get("description"),
+        "product_image": item.get("image") or DEFAULT_PRODUCT_IMAGE,
+        "images": item.get("images", []),
+        "benefits": item.get("benefits", []),
+        "plans": item.get("plans", {}),
+    }
+
+
+async def apply_product_webhook(db: AsyncSession, items: List[dict]) -> List[dict]:
+    """
+    Saves a batch of webhook items (not committed): one query loads the stored
+    content hashes of every product_code in the batch, then the new and changed
+    rows go through upsert_products. Returns a result per item.
+    """
+    rows = [webhook_item_to_row(item) for item in items]
+    codes = {row["product_code"] for row in rows if row["product_code"]}
+
+    existing = {}
+    if codes:
+        result = await db.execute(
+            select(Product.product_code, Product.content_hash).where(Product.product_code.in_(codes))
+        )
+        existing = dict(result.all())
+
+    results, changed = [], {}
+    for row in rows:
+        code = row["product_code"]
+        if not code:
+            results.append({"product_code": None, "action": "failed", "status": "error", "error": "Item has no name"})
+            continue
+        if code not in existing:
+            action = "created"
+        elif existing[code] == product_content_hash(row):
+            action = "unchanged"
+        else:
+            action = "updated"
+        if action != "unchanged":
+            changed[code] = row
+        results.append({"product_code": code, "action": action, "status": "success"})
+
+    if changed:
+        await upsert_products(db, list(changed.values()))
+    return results
 
 
 
@@ -160,12 +225,26 @@ async def fetch_products_from_db(db: AsyncSession) -> dict:
         )
 
 
+def product_to_dict(product: Product) -> dict:
+    return {
+        "id": str(product.id),
+        "product_code": product.product_code,
+        "product_title": product.product_title,
+        "item_group": getattr(product, 'item_group', None),
+        "product_description": product.product_description,
+        "product_image": product.product_image,
+        "images": getattr(product, 'images', []),
+        "benefits": getattr(product, 'benefits', []),
+        "plans": product.plans if product.plans else {}
+    }
+
+
 async def fetch_single_product_from_db(product_id: uuid.UUID, db: AsyncSession) -> dict:
     """
-    Fetch a single product from database and update it with latest API data if available.
+    Fetch a single product from the database. The Frappe refresh runs in the
+    background afterwards (see ProductRefresher in product_cache.py).
     """
     try:
-        # First, fetch the specific product from database
         query = select(Product).where(Product.id == product_id)
         result = await db.execute(query)
         product = result.scalar_one_or_none()
@@ -176,63 +255,9 @@ async def fetch_single_product_from_db(product_id: uuid.UUID, db: AsyncSession)
                 detail=f"Product with ID {product_id} not found"
             )
 
-        # Create base response with existing plans
-        response_product = {
-            "id": str(product.id),
-            "product_code": product.product_code,
-            "product_title": product.product_title,
-            "item_group": getattr(product, 'item_group', None),
-            "product_description": product.product_description,
-            "product_image": product.product_image,
-            "images": getattr(product, 'images', []),
-            "benefits": getattr(product, 'benefits', []),
-            "plans": product.plans if product.plans else {}
-        }
-
-        # Attempt to fetch latest data from API
-        url = f"{FRAPPE_BASE_URL}/api/method/clientportalapp.products.get_products_pricing"
-        
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                api_product_data = response.json().get("message", {}).get("items", [])
-
-                # Find matching product in API data
-                matching_api_product = next(
-                    (item for item in api_product_data if item.get("name") == product.product_code),
-                    None
-                )
-
-                if matching_api_product:
-                    # Update product in database with new data
-                    product.product_title = matching_api_product.get("item_name", product.product_title)
-                    product.item_group = matching_api_product.get("item_group", getattr(product, 'item_group', None))
-                    product.product_description = matching_api_product.get("description", product.product_description)
-                    product.product_image = matching_api_product.get("images", [product.product_image])[0]
-                    product.images = matching_api_product.get("images", getattr(product, 'images', []))
-                    product.benefits = matching_api_product.get("benefits", getattr(product, 'benefits', []))
-                    product.plans = matching_api_product.get("grouped_data", product.plans)
-                    
-                    await db.commit()
-
-                    # Update response with new data
-                    response_product.update({
-                        "product_title": product.product_title,
-                        "item_group": product.item_group,
-                        "product_description": product.product_description,
-                        "product_image": product.product_image,
-                        "images": product.images,
-                        "benefits": product.benefits,
-                        "plans": product.plans
-                    })
-
-        except Exception as e:
-            logging.warning(f"API fetch failed, using existing database product: {str(e)}")
-
         return {
             "message": "Product found",
-            "product": response_product
+            "product": product_to_dict(product)
         }
 
     except HTTPException:
@@ -245,9 +270,61 @@ async def fetch_single_product_from_db(product_id: uuid.UUID, db: AsyncSession)
         )
 
 
+async def fetch_product_from_frappe(product_code: str) -> Optional[dict]:
+    """
+    Fetch one item's pricing data from Frappe, or None if Frappe does not return it.
+    The item_code filter keeps the response to one item; the match on "name" keeps
+    this correct if the server ignores the filter and returns the full catalog.
+    """
+    url = f"{FRAPPE_BASE_URL}/api/method/clientportalapp.products.get_products_pricing"
+    client = http_clients.get(FRAPPE)
+    response = await client.get(url, params={"item_code": product_code})
+    response.raise_for_status()
+    items = response.json().get("message", {}).get("items", [])
+    return next((item for item in items if item.get("name") == product_code), None)
+
+
+def apply_frappe_product(product: Product, item: dict) -> bool:
+    """Copy Frappe item data onto a product; returns True if anything changed."""
+    values = {
+        "product_title": item.get("item_name", product.product_title),
+        "item_group": item.get("item_group", getattr(product, 'item_group', None)),
+        "product_description": item.get("description", product.product_description),
+        "product_image": (item.get("images") or [product.product_image])[0],
+        "images": item.get("images", getattr(product, 'images', [])),
+        "benefits": item.get("benefits", getattr(product, 'benefits', [])),
+        "plans": item.get("grouped_data", product.plans),
+    }
+    changed = False
+    for field, value in values.items():
+        if getattr(product, field) != value:
+            setattr(product, field, value)
+            changed = True
+    return changed
+
+
+
+async def _frappe_write(method: str, url: str, payload: dict, headers: dict) -> Any:
+    client = http_clients.get(FRAPPE)
+    response = await client.request(method, url, json=payload, headers=headers)
+    if response.status_code != 200:
+        raise Exception(f"{response.status_code}: {response.text[:500]}")
+    return response.json()
+
+
+def _write_result(result: FanOutResult) -> dict:
+    if result.ok:
+        return {"status": "success", "response": result.value}
+    return {"status": "error", "error": result.error}
+
 
 # This Function will be used to update a doctype in frappe I.e the site doctype when a user purchases an item
-def update_item_in_frappe(payload: ItemUpdateRequest):
+async def update_item_in_frappe(payload: ItemUpdateRequest) -> dict:
+    """
+    Updates the Item, then writes its benefits, images and price concurrently
+    (capped by frappe_fanout) and reports a result per sub-resource.
+    Raises a 502 with the results if any write failed.
+    """
     # Update the Item Doctype in Frappe
     item_data = {
         "item_name": payload.item_name,
@@ -256,71 +333,59 @@ def update_item_in_frappe(payload: ItemUpdateRequest):
         "custom_security": payload.custom_security
     }
 
+    # The child rows reference the Item, so it is written first
     try:
-        # Update the main Item record
-        item_response = requests.put(
+        item_response = await _frappe_write(
+            "PUT",
             f"{FRAPPE_BASE_URL}/api/method/clientportalapp.product.update_item_from_api/{payload.name}",
-            json=item_data,
-             headers = {
-            # "Authorization": f"token {API_KEY}:{API_SECRET}"
-            }
+            item_data,
+            headers={
+                # "Authorization": f"token {API_KEY}:{API_SECRET}"
+            },
         )
-
-        if item_response.status_code != 200:
-            raise HTTPException(
-                status_code=item_response.status_code,
-                detail=f"Failed to update Item: {item_response.json()}"
-            )
-
-        # Update Benefits child table
-        if payload.benefits:
-            for benefit in payload.benefits:
-                response = requests.post(
-                    f"{FRAPPE_BASE_URL}/api/resource/Benefits",
-                    json={"parent": payload.name, **benefit},
-                    headers=HEADERS
-                )
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Failed to update Benefits: {response.json()}"
-                    )
-
-        # Update ItemImage child table
-        if payload.images:
-            for image in payload.images:
-                response = requests.post(
-                    f"{FRAPPE_BASE_URL}/api/resource/ItemImage",
-                    json={"parent": payload.name, "images": image},
-                    headers=HEADERS
-                )
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Failed to update ItemImage: {response.json()}"
-                    )
-
-        # Update or add Item Price
-        if payload.price is not None:
-            response = requests.post(
-                f"{FRAPPE_BASE_URL}/api/resource/Item Price",
-                json={
-                    "item_code": payload.name,
-                    "price_list_rate": payload.price,
-                    "valid_from": "2024-11-27"  # Example current date
-                },
-                headers=HEADERS
-            )
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"Failed to update Item Price: {response.json()}"
-                )
-
-        return {"message": "Item updated successfully"}
-
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error updating item: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Failed to update Item: {str(e)}")
+
+    host = httpx.URL(FRAPPE_BASE_URL).host
+    jobs = {}
+    for index, benefit in enumerate(payload.benefits or []):
+        jobs[("benefits", index)] = (host, partial(
+            _frappe_write, "POST", f"{FRAPPE_BASE_URL}/api/resource/Benefits",
+            {"parent": payload.name, **benefit}, HEADERS,
+        ))
+    for index, image in enumerate(payload.images or []):
+        jobs[("images", index)] = (host, partial(
+            _frappe_write, "POST", f"{FRAPPE_BASE_URL}/api/resource/ItemImage",
+            {"parent": payload.name, "images": image}, HEADERS,
+        ))
+    if payload.price is not None:
+        jobs[("price", 0)] = (host, partial(
+            _frappe_write, "POST", f"{FRAPPE_BASE_URL}/api/resource/Item Price",
+            {
+                "item_code": payload.name,
+                "price_list_rate": payload.price,
+                "valid_from": date.today().isoformat(),
+            },
+            HEADERS,
+        ))
+
+    results = await frappe_fanout.run(jobs)
+
+    report = {
+        "item": {"status": "success", "response": item_response},
+        "benefits": [_write_result(results[("benefits", index)]) for index in range(len(payload.benefits or []))],
+        "images": [_write_result(results[("images", index)]) for index in range(len(payload.images or []))],
+        "price": _write_result(results[("price", 0)]) if ("price", 0) in results else None,
+    }
+    failed = sum(1 for result in results.values() if not result.ok)
+    if failed:
+        logger.error(f"Item {payload.name} updated, but {failed} of {len(results)} child writes failed")
+        raise HTTPException(
+            status_code=502,
+            detail={"message": f"{failed} of {len(results)} item sub-resource updates failed", "results": report},
+        )
+
+    return {"message": "Item updated successfully", "results": report}
     
     
     
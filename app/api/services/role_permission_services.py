@@ -9,12 +9,21 @@ from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from sqlalchemy.orm import joinedload
+from app.api.security.auth_cache import principal_cache
 
 
 class RoleAssignment(BaseModel):
     role_id: uuid.UUID  
 
 
+# Loads all the requested permissions in one query instead of one per id
+async def get_permissions_by_ids(db: AsyncSession, permission_ids: List[uuid.UUID]) -> dict:
+    if not permission_ids:
+        return {}
+    result = await db.execute(select(Permission).filter(Permission.id.in_(permission_ids)))
+    return {permission.id: permission for permission in result.scalars().all()}
+
+
 # Function For Creating Roles
 async def create_role(db: AsyncSession, role_name: str) -> Role:
     result = await db.execute(
@@ -42,6 +51,7 @@ async def delete_role(db: AsyncSession, role_id: uuid.UUID):
     if role:
         await db.delete(role)
         await db.commit()
+        principal_cache.invalidate_all()
         return True
 
     return False
@@ -55,6 +65,7 @@ async def add_role_to_user(db: AsyncSession, user_id: uuid.UUID, role_id: uuid.U
     if user and role:
         user.role = role
         await db.commit() 
+        principal_cache.invalidate(user_id)
         return True
     return False
 
@@ -66,6 +77,7 @@ async def remove_role_from_user(db: AsyncSession, user_id: uuid.UUID):
     if user and user.role_id:
         user.role_id = None
         await db.commit()
+        principal_cache.invalidate(user_id)
         return True
     
     return False
@@ -92,6 +104,7 @@ async def delete_permission(db: AsyncSession, permission_id: uuid.UUID):
     if permission:
         await db.delete(permission)
         await db.commit()
+        principal_cache.invalidate_all()
         return True
     return False
 
@@ -100,15 +113,15 @@ async def delete_permission(db: AsyncSession, permission_id: uuid.UUID):
 # A Function That Adds Permissions Or a Permission to a Role
 async def add_permissions_to_role(db: AsyncSession, role_id: uuid.UUID, permission_ids: list[uuid.UUID]) -> int:
     result = await db.execute(select(Role).filter(Role.id == role_id).options(joinedload(Role.permissions)))
-    role = result.scalars().first()
+    role = result.unique().scalars().first()
 
     if not role:
         print(f"Role with ID {role_id} not found.")
         return 0
+    permissions = await get_permissions_by_ids(db, permission_ids)
     added_count = 0
     for permission_id in permission_ids:
-        result = await db.execute(select(Permission).filter(Permission.id == permission_id))
-        permission = result.scalars().first()
+        permission = permissions.get(permission_id)
 
         if not permission:
             print(f"Permission with ID {permission_id} not found.")
@@ -121,6 +134,7 @@ async def add_permissions_to_role(db: AsyncSession, role_id: uuid.UUID, permissi
 
     if added_count > 0:
         await db.commit() 
+        principal_cache.invalidate_all()
     else:
         print(f"No new permissions were added to role {role_id}.")
     
@@ -133,16 +147,15 @@ async def add_permissions_to_role(db: AsyncSession, role_id: uuid.UUID, permissi
 # A Function That Removes A Permission or All Permissions from a role
 async def remove_permissions_from_role(db: AsyncSession, role_id: uuid.UUID, permission_ids: list):
     result = await db.execute(select(Role).options(joinedload(Role.permissions)).filter(Role.id == role_id))
-    role = result.scalars().first()
+    role = result.unique().scalars().first()
     
     if role:
-        for permission_id in permission_ids:
-            permission_result = await db.execute(select(Permission).filter(Permission.id == permission_id))
-            permission = permission_result.scalars().first()
-            
-            if permission and permission in role.permissions:
+        permissions = await get_permissions_by_ids(db, permission_ids)
+        for permission in permissions.values():
+            if permission in role.permissions:
                 role.permissions.remove(permission)
         await db.commit()
+        principal_cache.invalidate_all()
         return True
     return False
 
@@ -152,21 +165,22 @@ async def remove_permissions_from_role(db: AsyncSession, role_id: uuid.UUID, per
 # A Function That Adds Permissions or a Single Permission to a role
 async def add_permissions_to_user(db: AsyncSession, user_id: uuid.UUID, permission_ids: List[uuid.UUID]) -> int:
     result = await db.execute(select(User).options(joinedload(User.permissions)).filter(User.id == user_id))
-    user = result.scalars().first()
+    user = result.unique().scalars().first()
     
     if not user:
         return 0
 
+    permissions = await get_permissions_by_ids(db, permission_ids)
     added_count = 0
     for permission_id in permission_ids:
-        permission_result = await db.execute(select(Permission).filter(Permission.id == permission_id))
-        permission = permission_result.scalars().first()
+        permission = permissions.get(permission_id)
         
         if permission and permission not in user.permissions:
             user.permissions.append(permission)
             added_count += 1
 
     await db.commit()
+    principal_cache.invalidate(user_id)
     return added_count
 
 
@@ -175,15 +189,15 @@ async def add_permissions_to_user(db: AsyncSession, user_id: uuid.UUID, permissi
 # A Function That Revokes Permission From A User
 async def remove_permissions_from_user(db: AsyncSession, user_id: uuid.UUID, permission_ids: list):
     result = await db.execute(select(User).options(joinedload(User.permissions)).filter(User.id == user_id))
-    user = result.scalars().first()
+    user = result.unique().scalars().first()
     
     if user:
-        permission_results = await db.execute(select(Permission).filter(Permission.id.in_(permission_ids)))
-        permissions_to_revoke = permission_results.scalars().all()
-        for permission in permissions_to_revoke:
+        permissions = await get_permissions_by_ids(db, permission_ids)
+        for permission in permissions.values():
             if permission in user.permissions:
                 user.permissions.remove(permission)
         
         await db.commit()
+        principal_cache.invalidate(user_id)
         return True
     return False
\ No newline at end of file
@@ -15,6 +15,7 @@ from app.api.models.card_model import Card
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.schemas.user_schema import UserResponse, UserUpdate  # Import the Pydantic schema
 from app.api.schemas.card_schema import CardCreate, CardUpdate, CardResponse
+from app.api.security.auth_cache import principal_cache
 
 # UPLOAD_DIR = "uploads/profile_pictures"
 
@@ -104,6 +105,7 @@ async def update_user(user_id: uuid.UUID, user_update: UserUpdate, db: AsyncSess
         setattr(user, key, value)
     
     await db.commit()
+    principal_cache.invalidate(user_id)
     await db.refresh(user)
     
     return UserResponse.model_validate(user)
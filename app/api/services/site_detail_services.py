@@ -0,0 +1,308 @@
+import base64
+import json
+import logging
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, or_, select, text, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import String
+
+from app.api.models.site_data import SiteData
+from app.api.models.site_module import SiteModule
+from app.api.models.site_user import SiteUser
+
+
+logger = logging.getLogger(__name__)
+
+
+# Rows per INSERT, keeps each statement well under the asyncpg bind-parameter limit
+SITE_DETAIL_UPSERT_CHUNK_SIZE = 1000
+
+
+def site_user_email(user: dict) -> Optional[str]:
+    """Frappe identifies users by email, exposed as `email` or as the doc `name`."""
+    return user.get("email") or user.get("name")
+
+
+def site_user_rows(site_id: uuid.UUID, users: list, active_users: list, now: datetime) -> List[dict]:
+    active_emails = {site_user_email(user) for user in active_users if isinstance(user, dict)}
+    rows = {}
+    for user in users:
+        if not isinstance(user, dict) or not site_user_email(user):
+            continue
+        email = site_user_email(user)
+        rows[email] = {
+            "id": uuid.uuid4(),
+            "site_id": site_id,
+            "email": email,
+            "full_name": user.get("full_name") or user.get("first_name"),
+            "is_active": email in active_emails,
+            "data": user,
+            "updated_at": now,
+        }
+    return list(rows.values())
+
+
+def site_module_rows(site_id: uuid.UUID, modules: list, now: datetime) -> List[dict]:
+    rows = {}
+    for module in modules:
+        if not isinstance(module, dict) or not module.get("module_name"):
+            continue
+        rows[module["module_name"]] = {
+            "id": uuid.uuid4(),
+            "site_id": site_id,
+            "module_name": module["module_name"],
+            "app_name": module.get("app_name"),
+            "data": module,
+            "updated_at": now,
+        }
+    return list(rows.values())
+
+
+async def _upsert_changed(db: AsyncSession, model, rows: List[dict], conflict_columns: List[str], compare_columns: List[str]):
+    """Upserts rows, touching existing ones only when one of `compare_columns` changed."""
+    for start in range(0, len(rows), SITE_DETAIL_UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + SITE_DETAIL_UPSERT_CHUNK_SIZE]
+        stmt = pg_insert(model).values(chunk)
+        changed = None
+        for column in compare_columns:
+            condition = getattr(model, column).is_distinct_from(stmt.excluded[column])
+            changed = condition if changed is None else changed | condition
+        stmt = stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={column: stmt.excluded[column] for column in compare_columns + ["updated_at"]},
+            where=changed,
+        )
+        await db.execute(stmt)
+
+
+# Removes the children of the given sites that are not in the (site_id, key) pairs just written
+_DELETE_MISSING_SITE_USERS = text(
+    "DELETE FROM site_users AS su "
+    "WHERE su.site_id = ANY(:site_ids) "
+    "AND NOT EXISTS (SELECT 1 FROM unnest(:keep_site_ids, :keep_keys) AS k(site_id, key) "
+    "WHERE k.site_id = su.site_id AND k.key = su.email)"
+)
+_DELETE_MISSING_SITE_MODULES = text(
+    "DELETE FROM site_modules AS sm "
+    "WHERE sm.site_id = ANY(:site_ids) "
+    "AND NOT EXISTS (SELECT 1 FROM unnest(:keep_site_ids, :keep_keys) AS k(site_id, key) "
+    "WHERE k.site_id = sm.site_id AND k.key = sm.module_name)"
+)
+
+
+def _with_array_params(statement):
+    return statement.bindparams(
+        bindparam("site_ids", type_=ARRAY(PG_UUID(as_uuid=True))),
+        bindparam("keep_site_ids", type_=ARRAY(PG_UUID(as_uuid=True))),
+        bindparam("keep_keys", type_=ARRAY(String)),
+    )
+
+
+async def _delete_missing(db: AsyncSession, statement, site_ids: list, rows: List[dict], key: str):
+    if not site_ids:
+        return
+    await db.execute(
+        _with_array_params(statement),
+        {
+            "site_ids": site_ids,
+            "keep_site_ids": [row["site_id"] for row in rows],
+            "keep_keys": [row[key] for row in rows],
+        },
+    )
+
+
+async def sync_site_details(db: AsyncSession, site_lists: Dict[uuid.UUID, dict]):
+    """
+    Writes site users and modules into their child tables incrementally.
+
+    `site_lists` maps a SiteData id to any of "users", "active_users" and "modules".
+    Users are synced only when both user lists are present and modules only when the
+    module list is present, so a failed upstream call never wipes stored children.
+    Unchanged rows are left untouched and rows that disappeared are deleted.
+    """
+    now = datetime.now()
+    user_site_ids, user_rows = [], []
+    module_site_ids, module_rows = [], []
+
+    for site_id, lists in site_lists.items():
+        if lists.get("users") is not None and lists.get("active_users") is not None:
+            user_site_ids.append(site_id)
+            user_rows.extend(site_user_rows(site_id, lists["users"], lists["active_users"], now))
+        if lists.get("modules") is not None:
+            module_site_ids.append(site_id)
+            module_rows.extend(site_module_rows(site_id, lists["modules"], now))
+
+    await _delete_missing(db, _DELETE_MISSING_SITE_USERS, user_site_ids, user_rows, "email")
+    await _upsert_changed(db, SiteUser, user_rows, ["site_id", "email"], ["full_name", "is_active", "data"])
+
+    await _delete_missing(db, _DELETE_MISSING_SITE_MODULES, module_site_ids, module_rows, "module_name")
+    await _upsert_changed(db, SiteModule, module_rows, ["site_id", "module_name"], ["app_name", "data"])
+
+
+async def backfill_site_details(db: AsyncSession):
+    """Copies the JSON lists of sites that have no child rows yet into the child tables."""
+    has_users = select(SiteUser.id).where(SiteUser.site_id == SiteData.id).exists()
+    has_modules = select(SiteModule.id).where(SiteModule.site_id == SiteData.id).exists()
+    result = await db.execute(
+        select(SiteData.id, SiteData.total_users, SiteData.active_users, SiteData.active_modules)
+        .where(~has_users, ~has_modules)
+    )
+    site_lists = {
+        site_id: {"users": users or [], "active_users": active_users or [], "modules": modules or []}
+        for site_id, users, active_users, modules in result.all()
+    }
+    if site_lists:
+        await sync_site_details(db, site_lists)
+        logger.info(f"Backfilled users and modules for {len(site_lists)} sites")
+
+
+def contains_pattern(search: str) -> str:
+    """ILIKE pattern matching `search` literally anywhere; use with escape="\\"."""
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def get_site_users_page(db: AsyncSession, user_id: str, active_only: bool = False,
+                              search: Optional[str] = None, limit: int = 100, offset: int = 0) -> dict:
+    """
+    Returns a page of a customer's site users grouped by site, filtered, counted and
+    paged in Postgres.
+    """
+    sites_result = await db.execute(
+        select(SiteData.id, SiteData.site_name).where(SiteData.user_id == user_id).order_by(SiteData.site_name)
+    )
+    sites = sites_result.all()
+    site_names = {site_id: site_name for site_id, site_name in sites}
+
+    filters = [SiteUser.site_id.in_(list(site_names))]
+    if active_only:
+        filters.append(SiteUser.is_active.is_(True))
+    if search:
+        pattern = contains_pattern(search)
+        filters.append(SiteUser.email.ilike(pattern, escape="\\") | SiteUser.full_name.ilike(pattern, escape="\\"))
+
+    total = 0
+    users_by_site = {site_id: [] for site_id in site_names}
+    if site_names:
+        total = (await db.execute(select(func.count()).select_from(SiteUser).where(*filters))).scalar_one()
+        page = await db.execute(
+            select(SiteUser.site_id, SiteUser.data)
+            .where(*filters)
+            .order_by(SiteUser.site_id, SiteUser.email)
+            .limit(limit)
+            .offset(offset)
+        )
+        for site_id, data in page.all():
+            users_by_site[site_id].append(data)
+
+    return {
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "sites": [
+            {"site_name": site_names[site_id], "users": users}
+            for site_id, users in users_by_site.items()
+        ],
+    }
+
+
+_LAST_N_DAYS = re.compile(r"^last\s+(\d+)\s+days?$", re.IGNORECASE)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """The timestamp columns are naive UTC; an offset-aware bound is converted to match."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_date_range(date: Optional[str], date_from: Optional[datetime] = None,
+                     date_to: Optional[datetime] = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    Resolves the dashboard `date` filter ("Today", "Last 7 days", ...) into a
+    [start, end) range. Explicit `date_from`/`date_to` take precedence; offset-aware
+    ones are converted to naive UTC. Raises ValueError for a filter it does not understand.
+    """
+    start, end = _naive_utc(date_from), _naive_utc(date_to)
+    if date and start is None:
+        now = datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        value = date.strip().lower()
+        match = _LAST_N_DAYS.match(value)
+        if value == "today":
+            start = today
+        elif value == "yesterday":
+            start, end = today - timedelta(days=1), end or today
+        elif match:
+            start = now - timedelta(days=int(match.group(1)))
+        else:
+            raise ValueError(f"Unsupported date filter: {date}")
+    return start, end
+
+
+def encode_cursor(site_name: str, module_name: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([site_name, module_name]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Raises ValueError for a cursor that was not produced by encode_cursor."""
+    try:
+        site_name, module_name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(site_name), str(module_name)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+async def get_site_modules_page(db: AsyncSession, user_id: str, search: Optional[str] = None,
+                                start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                limit: int = 50, after: Optional[str] = None) -> dict:
+    """
+    Returns one keyset page of a customer's site modules, ordered by (site_name, module_name).
+
+    Search runs as ILIKE on the trigram-indexed module and app names (and the site name),
+    the date range applies to when the module was first recorded, and `next_after` is
+    the cursor for the following page (None on the last page).
+    """
+    query = (
+        select(SiteData.site_name, SiteModule.module_name, SiteModule.data)
+        .join(SiteModule, SiteModule.site_id == SiteData.id)
+        .where(SiteData.user_id == user_id)
+    )
+    if search:
+        pattern = contains_pattern(search)
+        query = query.where(or_(
+            SiteModule.module_name.ilike(pattern, escape="\\"),
+            SiteModule.app_name.ilike(pattern, escape="\\"),
+            SiteData.site_name.ilike(pattern, escape="\\"),
+        ))
+    if start is not None:
+        query = query.where(SiteModule.created_at >= start)
+    if end is not None:
+        query = query.where(SiteModule.created_at < end)
+    if after:
+        query = query.where(tuple_(SiteData.site_name, SiteModule.module_name) > tuple_(*decode_cursor(after)))
+
+    # One extra row tells whether another page exists
+    result = await db.execute(
+        query.order_by(SiteData.site_name, SiteModule.module_name).limit(limit + 1)
+    )
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    modules_by_site = {}
+    for site_name, _, module in rows:
+        modules_by_site.setdefault(site_name, []).append(module)
+
+    return {
+        "modules_by_site": [
+            {"site_name": site_name, "active_modules": {"count": len(modules), "modules": modules}}
+            for site_name, modules in modules_by_site.items()
+        ],
+        "next_after": encode_cursor(rows[-1][0], rows[-1][1]) if has_more else None,
+    }
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.api.config.settings import settings
+from app.api.database.db import async_engine, async_sessionmaker
+from app.api.models.site_data import SiteData
+from app.api.services.dashboard_services import SITE_STATS_ENDPOINTS, apply_site_stats, fetch_sites_stats, refresh_user_site_summary, site_detail_lists
+from app.api.services.site_detail_services import sync_site_details
+
+
+logger = logging.getLogger(__name__)
+
+
+# Arbitrary but fixed key for the Postgres advisory lock that elects the leader
+SITE_REFRESH_LOCK_KEY = 734_211_001
+
+# Whether this session still holds the lock; a bigint key below 2**32 is stored in objid
+HOLDS_LOCK_SQL = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND classid = 0 "
+    "AND objid = :key AND objsubid = 1 AND granted AND pid = pg_backend_pid())"
+)
+
+
+class SiteStatsRefresher:
+    """
+    Polls every known tenant site in the background and writes the stats to SiteData.
+
+    Only one worker polls at a time: each worker tries to take a session-level
+    Postgres advisory lock on a dedicated connection, and the one holding it is the
+    leader. If the leader dies its connection closes, the lock is released and
+    another worker takes over on its next tick. The leader checks on every tick that
+    its connection still holds the lock, and stops polling if the connection was lost.
+
+    Each site gets its own jittered next-poll time; failing sites back off
+    exponentially up to SITE_REFRESH_MAX_BACKOFF_SECONDS, and no more than
+    SITE_REFRESH_RATE_PER_SECOND sites are polled per second overall.
+    """
+
+    def __init__(self):
+        self.interval = settings.SITE_REFRESH_INTERVAL_SECONDS
+        self.jitter = settings.SITE_REFRESH_JITTER
+        self.max_backoff = settings.SITE_REFRESH_MAX_BACKOFF_SECONDS
+        self.rate = settings.SITE_REFRESH_RATE_PER_SECOND
+        self.tick = settings.SITE_REFRESH_TICK_SECONDS
+
+        self._task: Optional[asyncio.Task] = None
+        self._leader_connection: Optional[AsyncConnection] = None
+        self._next_poll: Dict[str, float] = {}
+        self._failures: Dict[str, int] = {}
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Site stats refresher started.")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._release_leadership()
+        logger.info("Site stats refresher stopped.")
+
+    async def _holds_lock(self) -> bool:
+        try:
+            result = await self._leader_connection.execute(HOLDS_LOCK_SQL, {"key": SITE_REFRESH_LOCK_KEY})
+            held = bool(result.scalar())
+            await self._leader_connection.commit()
+            return held
+        except Exception as e:
+            logger.warning(f"Site refresher lock check failed: {e}")
+            return False
+
+    async def _is_leader(self) -> bool:
+        if self._leader_connection is not None:
+            if await self._holds_lock():
+                return True
+            # The connection dropped (and with it the lock), another worker may lead now
+            logger.warning("This worker lost the site stats refresher lock, dropping leadership.")
+            await self._release_leadership(unlock=False)
+
+        connection = await async_engine.connect()
+        try:
+            result = await connection.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": SITE_REFRESH_LOCK_KEY}
+            )
+            acquired = bool(result.scalar())
+            # The lock is session-level, do not sit idle in a transaction while holding it
+            await connection.commit()
+        except Exception:
+            await connection.close()
+            raise
+
+        if not acquired:
+            await connection.close()
+            return False
+
+        self._leader_connection = connection
+        logger.info("This worker is now the site stats refresher leader.")
+        return True
+
+    async def _release_leadership(self, unlock: bool = True):
+        connection, self._leader_connection = self._leader_connection, None
+        if connection is None:
+            return
+        try:
+            if unlock:
+                await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SITE_REFRESH_LOCK_KEY})
+                await connection.commit()
+        except Exception as e:
+            logger.warning(f"Could not release site refresher lock cleanly: {e}")
+        finally:
+            try:
+                await connection.close()
+            except Exception as e:
+                logger.warning(f"Could not close site refresher lock connection: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                if await self._is_leader():
+                    await self.poll_due_sites()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Site stats refresher tick failed: {e}")
+                # Drop leadership, the connection may be broken
+                await self._release_leadership()
+            await asyncio.sleep(self.tick)
+
+    def _schedule(self, site_name: str, succeeded: bool, now: float):
+        if succeeded:
+            self._failures.pop(site_name, None)
+            self._next_poll[site_name] = now + self._jittered(self.interval)
+        else:
+            failures = self._failures.get(site_name, 0) + 1
+            self._failures[site_name] = failures
+            backoff = min(self.max_backoff, self.tick * 2 ** failures)
+            self._next_poll[site_name] = now + self._jittered(backoff)
+
+    async def poll_due_sites(self):
+        """Polls the sites whose next-poll time has passed, up to the rate cap for one tick."""
+        now = time.monotonic()
+
+        async with async_sessionmaker() as db:
+            result = await db.execute(select(SiteData.site_name).distinct())
+            known_sites = set(result.scalars().all())
+
+        # Forget deleted sites, spread newly seen sites over one interval
+        for site_name in list(self._next_poll):
+            if site_name not in known_sites:
+                self._next_poll.pop(site_name, None)
+                self._failures.pop(site_name, None)
+        for site_name in known_sites - self._next_poll.keys():
+            self._next_poll[site_name] = now + random.uniform(0, self.interval)
+
+        due = sorted(
+            (site_name for site_name, next_poll in self._next_poll.items() if next_poll <= now),
+            key=self._next_poll.get,
+        )
+        batch = due[:max(1, int(self.rate * self.tick))]
+        if not batch:
+            return
+
+        sites_stats = await fetch_sites_stats(batch)
+
+        async with async_sessionmaker() as db:
+            result = await db.execute(select(SiteData).where(SiteData.site_name.in_(batch)))
+            user_ids = set()
+            site_lists = {}
+            for site in result.scalars().all():
+                if apply_site_stats(site, sites_stats[site.site_name]):
+                    user_ids.add(site.user_id)
+                    site_lists[site.id] = site_detail_lists(sites_stats[site.site_name])
+            await sync_site_details(db, site_lists)
+            for user_id in user_ids:
+                await refresh_user_site_summary(db, user_id)
+            await db.commit()
+
+        failed = 0
+        for site_name in batch:
+            # A site counts as failed only when every endpoint failed
+            succeeded = len(sites_stats[site_name]["errors"]) < len(SITE_STATS_ENDPOINTS)
+            failed += 0 if succeeded else 1
+            self._schedule(site_name, succeeded, now)
+
+        logger.info(f"Site stats refresher polled {len(batch)} sites ({failed} failed), {len(due) - len(batch)} still due")
+
+
+site_stats_refresher = SiteStatsRefresher()
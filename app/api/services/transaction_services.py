@@ -2,8 +2,10 @@ import uuid
 import logging
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.api.database.db import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.models.paystack_webhook_event import PaystackWebhookEvent
 from app.api.models.site_data import SiteData
 from app.api.models.transactions import UserTransactions
 from fastapi import APIRouter, HTTPException, Depends
@@ -12,7 +14,7 @@ from app.api.security.payment_verification import verify_paystack_transaction
 # from app.api.utils.fr_utils import update_frappe_doctype  # Utility to update Frappe ER
 import httpx
 
-from app.api.utils.frappe_utils import create_frappe_site, store_site_data
+from app.api.services.outbox_services import CREATE_FRAPPE_SITE, enqueue, outbox_worker
 
 from sqlalchemy.exc import NoResultFound
 
@@ -168,40 +170,25 @@ async def store_transaction(transaction_data: dict, db: AsyncSession = Depends(g
             paystack_response=json.dumps(paystack_response, cls=CustomJSONEncoder),
         )
 
-        # Save transaction to database with safe serialization
+        # Save the transaction and queue the Frappe site creation in one commit;
+        # the outbox worker creates the site (with retries) after the response is sent
         db.add(users_transactions)
+        site_creation = None
+        if paystack_status == "success":
+            users_transactions.site_creation_status = "queued"
+            await db.flush()
+            enqueue(
+                db,
+                CREATE_FRAPPE_SITE,
+                {"site_name": site_name, "plan": plan, "quantity": quantity},
+                transaction_id=users_transactions.id,
+            )
+            site_creation = {"status": "queued"}
         await db.commit()
         await db.refresh(users_transactions)
-        
-        site_creation_response = None
-        
-        if paystack_status == "success":
-            try:
-                logging.info("Attempting to create Frappe site...")
-                # Create Frappe site with normalized site name (without storing site data in Frappe)
-                site_creation_response = await create_frappe_site(
-                    site_name=site_name, 
-                    plan=plan,
-                    quantity=quantity
-                )
-                logging.info(f"Site creation response: {site_creation_response}")
-                
-                # Update transaction with site creation status
-                users_transactions.site_creation_status = "initiated"
-                if site_creation_response and "job_id" in site_creation_response:
-                    users_transactions.site_creation_job_id = site_creation_response.get("job_id")
-                
-                await db.commit()
-                
-                logging.info(f"Site creation initiated successfully for {site_name}")
-                
-            except Exception as e:
-                error_msg = f"Error in site creation process: {str(e)}"
-                logging.error(error_msg)
-                users_transactions.site_creation_status = "failed"
-                users_transactions.site_creation_error = error_msg
-                await db.commit()
-                # We don't raise an exception here as the payment was successful
+        if site_creation:
+            outbox_worker.notify()
+            logging.info(f"Site creation queued for {site_name}")
 
         # Return success response with all relevant data
         return {
@@ -219,7 +206,7 @@ async def store_transaction(transaction_data: dict, db: AsyncSession = Depends(g
                 "valid_from": valid_from.isoformat(),
                 "valid_upto": valid_upto.isoformat()
             },
-            "site_creation": site_creation_response if site_creation_response else None
+            "site_creation": site_creation
         }
 
     except HTTPException as e:
@@ -506,6 +493,21 @@ async def get_transaction_by_id(transaction_id: str, db: AsyncSession) -> tuple:
             status_code=500,
             detail=f"Error fetching transaction: {str(e)}"
         )
+
+
+
+async def record_webhook_event(db: AsyncSession, event: str, reference: str, paystack_transaction_id=None) -> bool:
+    """
+    Records a Paystack webhook as processed (not committed). Returns False if the
+    same event for the same reference was already recorded, i.e. this is a redelivery.
+    """
+    result = await db.execute(
+        pg_insert(PaystackWebhookEvent)
+        .values(event=event, reference=reference, paystack_transaction_id=paystack_transaction_id)
+        .on_conflict_do_nothing(index_elements=["event", "reference"])
+        .returning(PaystackWebhookEvent.event)
+    )
+    return result.scalar_one_or_none() is not None
     
     
 
@@ -5,7 +5,7 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.repository.users_repository import create_user, get_user_by_email
 from app.api.schemas.user_schema import UserCreate, UserLogin
-from app.api.security.security import create_access_token, create_refresh_token, hash_password, verify_password
+from app.api.security.security import create_access_token, create_refresh_token, hash_password, verify_and_update_password
 from app.api.models.user_model import User
 from app.api.services.email_services import EmailService
 
@@ -81,11 +81,21 @@ async def signup(db: AsyncSession, user: UserCreate) -> str:
 async def signin(db: AsyncSession, user: UserLogin) -> JSONResponse:
     # Retrieve the user by email
     existing_user = await get_user_by_email(db, user.email)
-    if not existing_user or not await verify_password(user.password, existing_user.password):
+    if not existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid credentials"
         )
+    valid, new_hash = await verify_and_update_password(user.password, existing_user.password)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid credentials"
+        )
+    if new_hash:
+        # Stored hash uses an outdated cost factor, replace it while we have the plain password
+        existing_user.password = new_hash
+        await db.commit()
     
     # Generate JWT tokens
     token_data = {
@@ -91,48 +91,8 @@ def create_exception_handler(
     return exception_handler
 
 
-def register_all_errors(app: FastAPI):
-    app.add_exception_handler(
-        UserAlreadyExists,
-        create_exception_handler(
-            status_code=status.HTTP_403_FORBIDDEN,
-            initial_detail={
-                "message": "User with email already exists",
-                "error_code": "user_exists",
-            },
-        ),
-    )
-
-    app.add_exception_handler(
-        UserNotFound,
-        create_exception_handler(
-            status_code=status.HTTP_404_NOT_FOUND,
-            initial_detail={
-                "message": "User not found",
-                "error_code": "user_not_found",
-            },
-        ),
-    )
-    app.add_exception_handler(
-        BookNotFound,
-        create_exception_handler(
-            status_code=status.HTTP_404_NOT_FOUND,
-            initial_detail={
-                "message": "Book not found",
-                "error_code": "book_not_found",
-            },
-        ),
-    )
-    app.add_exception_handler(
-        InvalidCredentials,
-        create_exception_handler(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            initial_detail={
-                "message": "Invalid Email Or Password",
-                "error_code": "invalid_email_or_password",
-            },
-        ),
-    )
+def register_auth_errors(app: FastAPI):
+    """Handlers for the errors raised by the token and role dependencies."""
     app.add_exception_handler(
         InvalidToken,
         create_exception_handler(
@@ -188,43 +148,85 @@ def register_all_errors(app: FastAPI):
         ),
     )
     app.add_exception_handler(
-        TagNotFound,
+        AccountNotVerified,
         create_exception_handler(
-            status_code=status.HTTP_404_NOT_FOUND,
-            initial_detail={"message": "Tag Not Found", "error_code": "tag_not_found"},
+            status_code=status.HTTP_403_FORBIDDEN,
+            initial_detail={
+                "message": "Account Not verified",
+                "error_code": "account_not_verified",
+                "resolution":"Please check your email for verification details"
+            },
         ),
     )
 
+
+def register_all_errors(app: FastAPI):
+    register_auth_errors(app)
+
     app.add_exception_handler(
-        TagAlreadyExists,
+        UserAlreadyExists,
         create_exception_handler(
             status_code=status.HTTP_403_FORBIDDEN,
             initial_detail={
-                "message": "Tag Already exists",
-                "error_code": "tag_exists",
+                "message": "User with email already exists",
+                "error_code": "user_exists",
+            },
+        ),
+    )
+    app.add_exception_handler(
+        UserNotFound,
+        create_exception_handler(
+            status_code=status.HTTP_404_NOT_FOUND,
+            initial_detail={
+                "message": "User not found",
+                "error_code": "user_not_found",
             },
         ),
     )
-
     app.add_exception_handler(
         BookNotFound,
         create_exception_handler(
             status_code=status.HTTP_404_NOT_FOUND,
             initial_detail={
-                "message": "Book Not Found",
+                "message": "Book not found",
                 "error_code": "book_not_found",
             },
         ),
     )
-
     app.add_exception_handler(
-        AccountNotVerified,
+        InvalidCredentials,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid Email Or Password",
+                "error_code": "invalid_email_or_password",
+            },
+        ),
+    )
+    app.add_exception_handler(
+        TagNotFound,
+        create_exception_handler(
+            status_code=status.HTTP_404_NOT_FOUND,
+            initial_detail={"message": "Tag Not Found", "error_code": "tag_not_found"},
+        ),
+    )
+    app.add_exception_handler(
+        TagAlreadyExists,
         create_exception_handler(
             status_code=status.HTTP_403_FORBIDDEN,
             initial_detail={
-                "message": "Account Not verified",
-                "error_code": "account_not_verified",
-                "resolution":"Please check your email for verification details"
+                "message": "Tag Already exists",
+                "error_code": "tag_exists",
+            },
+        ),
+    )
+    app.add_exception_handler(
+        BookNotFound,
+        create_exception_handler(
+            status_code=status.HTTP_404_NOT_FOUND,
+            initial_detail={
+                "message": "Book Not Found",
+                "error_code": "book_not_found",
             },
         ),
     )
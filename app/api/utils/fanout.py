@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.api.config.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FanOutResult:
+    value: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# A job is the upstream host it talks to plus a factory for the coroutine to run
+FanOutJob = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class FanOut:
+    """
+    Runs many upstream calls concurrently under a global and a per-host limit.
+
+    The semaphores are shared by every request in the process, so a burst of
+    dashboard loads cannot open more than `max_concurrency` upstream calls in
+    total or more than `max_per_host` against a single tenant site. Each `run`
+    has its own deadline: whatever has not finished by then is cancelled and
+    reported with an error marker instead of holding up the whole response.
+    """
+
+    def __init__(self, max_concurrency: int, max_per_host: int, deadline: float):
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.deadline = deadline
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphores(self, host: str) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        host_semaphore = self._host_semaphores.get(host)
+        if host_semaphore is None:
+            host_semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return self._global_semaphore, host_semaphore
+
+    async def _run_job(self, host: str, factory: Callable[[], Awaitable[Any]]) -> FanOutResult:
+        global_semaphore, host_semaphore = self._semaphores(host)
+        started = time.monotonic()
+        try:
+            async with global_semaphore, host_semaphore:
+                value = await factory()
+            return FanOutResult(value=value, elapsed=time.monotonic() - started)
+        except Exception as e:
+            return FanOutResult(error=str(e) or e.__class__.__name__, elapsed=time.monotonic() - started)
+
+    async def run(self, jobs: Dict[Hashable, FanOutJob], deadline: Optional[float] = None) -> Dict[Hashable, FanOutResult]:
+        """
+        Run every job and return a result per key. Never raises for a failing job.
+        """
+        if not jobs:
+            return {}
+
+        deadline = self.deadline if deadline is None else deadline
+        tasks = {
+            asyncio.ensure_future(self._run_job(host, factory)): key
+            for key, (host, factory) in jobs.items()
+        }
+
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"Fan-out deadline of {deadline}s reached, {len(pending)} of {len(tasks)} calls cancelled")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = {}
+        for task, key in tasks.items():
+            if task in done:
+                results[key] = task.result()
+            else:
+                results[key] = FanOutResult(error=f"deadline of {deadline}s exceeded", elapsed=deadline)
+        return results
+
+
+tenant_fanout = FanOut(
+    max_concurrency=settings.FANOUT_MAX_CONCURRENCY,
+    max_per_host=settings.FANOUT_MAX_PER_HOST,
+    deadline=settings.FANOUT_DEADLINE_SECONDS,
+)
+
+# Writes to the Frappe admin site (one host), e.g. an item's child rows
+frappe_fanout = FanOut(
+    max_concurrency=settings.FRAPPE_WRITE_CONCURRENCY,
+    max_per_host=settings.FRAPPE_WRITE_CONCURRENCY,
+    deadline=settings.FRAPPE_WRITE_DEADLINE_SECONDS,
+)
@@ -3,6 +3,7 @@ from fastapi import HTTPException
 import httpx
 import logging
 from app.api.config.erp_config import FRAPPE_BASE_URL
+from app.api.utils.http_clients import http_clients, FRAPPE
 
 # Define these at the top of your file
 
@@ -21,21 +22,21 @@ async def store_site_data(site_data):
     logging.info(f"Attempting to store site data for site: {site_data.get('site_name')}")
     
     try:
-        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0)) as client:
-            logging.info(f"Making request to: {FRAPPE_STORE_SITE_ENDPOINT}")
-            logging.info(f"Request payload: {json.dumps(site_data)}")
+        client = http_clients.get(FRAPPE)
+        logging.info(f"Making request to: {FRAPPE_STORE_SITE_ENDPOINT}")
+        logging.info(f"Request payload: {json.dumps(site_data)}")
             
-            response = await client.post(
-                FRAPPE_STORE_SITE_ENDPOINT,
-                json=site_data,
-                headers=headers
-            )
+        response = await client.post(
+            FRAPPE_STORE_SITE_ENDPOINT,
+            json=site_data,
+            headers=headers
+        )
             
-            logging.info(f"Response status: {response.status_code}")
-            logging.info(f"Response body: {response.text}")
+        logging.info(f"Response status: {response.status_code}")
+        logging.info(f"Response body: {response.text}")
             
-            response.raise_for_status()
-            return response.json()
+        response.raise_for_status()
+        return response.json()
             
     except httpx.RequestError as e:
         error_msg = f"Network error when storing site data: {str(e)}"
@@ -75,14 +76,14 @@ async def create_frappe_site(site_name: str, plan: str, quantity: int):
 
     try:
         logging.info(f"Initiating Frappe site creation for: {site_name}")
-        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0)) as client:
-            response = await client.post(
-                f"{FRAPPE_SITE_CREATE_ENDPOINT}",
-                json=site_data,
-                headers=headers
-            )
-            response.raise_for_status()
-            return response.json()
+        client = http_clients.get(FRAPPE)
+        response = await client.post(
+            f"{FRAPPE_SITE_CREATE_ENDPOINT}",
+            json=site_data,
+            headers=headers
+        )
+        response.raise_for_status()
+        return response.json()
     except Exception as e:
         logging.error(f"Error creating Frappe site: {str(e)}")
         raise HTTPException(
@@ -0,0 +1,159 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+import httpx
+
+from app.api.config.settings import settings
+from app.api.utils.metrics import upstream_request_duration, upstream_request_errors
+
+try:
+    import h2  # noqa: F401  (optional, only needed for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+
+# Upstream names used across the services
+FRAPPE = "frappe"      # Frappe admin site (FRAPPE_BASE_URL)
+SITES = "sites"        # Tenant ERP sites (<site>.erp.staging.purpledove.net)
+PAYSTACK = "paystack"  # Paystack API
+GOOGLE = "google"      # Google OIDC discovery and JWKS
+
+
+@dataclass
+class UpstreamStats:
+    requests: int = 0
+    new_connections: int = 0
+
+    @property
+    def reuse_rate(self) -> float:
+        """Share of requests that went out on an already open connection."""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1 - self.new_connections / self.requests)
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the pooled transport to record time to response headers and errors per
+    upstream and host (tenant sites share one client, so the host tells them apart).
+    """
+
+    def __init__(self, upstream: str, transport: httpx.AsyncHTTPTransport):
+        self.upstream = upstream
+        self.transport = transport
+
+    @property
+    def _pool(self):
+        return self.transport._pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception:
+            upstream_request_errors.inc(self.upstream, host)
+            raise
+        finally:
+            upstream_request_duration.observe(time.perf_counter() - started, self.upstream, host)
+        if response.status_code >= 500:
+            upstream_request_errors.inc(self.upstream, host)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class UpstreamClientRegistry:
+    """
+    Application-wide pooled httpx clients, one per upstream.
+
+    Clients are created lazily on first use and closed from the app shutdown hook,
+    so every request to the same upstream reuses the keep-alive pool instead of
+    paying for a fresh TCP+TLS handshake.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, UpstreamStats] = {}
+        self._timeouts = {
+            FRAPPE: settings.FRAPPE_HTTP_TIMEOUT,
+            SITES: settings.SITES_HTTP_TIMEOUT,
+            PAYSTACK: settings.PAYSTACK_HTTP_TIMEOUT,
+            GOOGLE: settings.GOOGLE_HTTP_TIMEOUT,
+        }
+
+    def _build_client(self, name: str) -> httpx.AsyncClient:
+        http2 = settings.UPSTREAM_HTTP2
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("UPSTREAM_HTTP2 is enabled but the 'h2' package is not installed, using HTTP/1.1")
+            http2 = False
+
+        stats = self._stats.setdefault(name, UpstreamStats())
+
+        async def count_new_connections(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.complete":
+                stats.new_connections += 1
+
+        async def on_request(request: httpx.Request):
+            stats.requests += 1
+            request.extensions["trace"] = count_new_connections
+
+        transport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY,
+            ),
+        )
+        return httpx.AsyncClient(
+            transport=MeteredTransport(name, transport),
+            timeout=httpx.Timeout(self._timeouts.get(name, 30.0), connect=settings.UPSTREAM_CONNECT_TIMEOUT),
+            event_hooks={"request": [on_request]},
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the shared client for an upstream, creating it on first use."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build_client(name)
+            self._clients[name] = client
+        return client
+
+    async def aclose(self):
+        """Close every pooled client. Called from the app shutdown hook."""
+        for name, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client for upstream '{name}': {e}")
+        self._clients.clear()
+
+    def stats(self) -> dict:
+        """Pool occupancy and connection reuse for every upstream used so far."""
+        report = {}
+        for name, stats in self._stats.items():
+            client = self._clients.get(name)
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            in_use = sum(1 for connection in connections if not connection.is_idle())
+            report[name] = {
+                "open_connections": len(connections),
+                "in_use_connections": in_use,
+                "idle_connections": len(connections) - in_use,
+                "max_connections": settings.UPSTREAM_MAX_CONNECTIONS,
+                "requests": stats.requests,
+                "new_connections": stats.new_connections,
+                "reuse_rate": round(stats.reuse_rate, 4),
+            }
+        return report
+
+
+http_clients = UpstreamClientRegistry()
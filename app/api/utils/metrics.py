@@ -0,0 +1,211 @@
+"""
+Minimal in-process metrics with Prometheus text exposition, served at /api/metrics.
+
+Counters and histograms are plain Python objects updated in the event loop; an
+observation is a dict lookup, a bisect and two additions, so recording stays cheap
+enough to leave on under load. Gauges are collected when /metrics is scraped.
+"""
+import bisect
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+
+# Seconds; covers fast DB reads up to slow upstream calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0):
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, (bucket_counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.label_names, label_values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """Value read at scrape time from `collect`, which returns (label values, value) pairs."""
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str], collect: Callable):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for label_values, value in self.collect():
+            lines.append(f"{self.name}{_format_labels(self.label_names, tuple(label_values))} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time spent serving HTTP requests, by route template.",
+    ["method", "route", "status"],
+))
+upstream_request_duration = registry.register(Histogram(
+    "upstream_request_duration_seconds", "Time to response headers for calls to upstream services.",
+    ["upstream", "host"],
+))
+upstream_request_errors = registry.register(Counter(
+    "upstream_request_errors_total", "Upstream calls that raised or returned a 5xx status.",
+    ["upstream", "host"],
+))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a connection from the SQLAlchemy pool.",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+))
+password_hash_rejected = registry.register(Counter(
+    "password_hash_rejected_total", "Logins and signups turned away with 503 because the hashing queue was full.",
+))
+
+
+# SQLAlchemy pools by engine name, registered by MeteredAsyncQueuePool; weak so a
+# disposed pool drops out once the engine replaces it
+db_pools = weakref.WeakValueDictionary()
+
+
+def _collect_pool_connections():
+    for name, pool in list(db_pools.items()):
+        yield (name, "checked_out"), pool.checkedout()
+        yield (name, "idle"), pool.checkedin()
+        yield (name, "overflow"), max(pool.overflow(), 0)
+
+
+def _collect_pool_size():
+    for name, pool in list(db_pools.items()):
+        yield (name,), pool.size()
+
+
+registry.register(Gauge(
+    "db_pool_connections", "SQLAlchemy pool connections by state.",
+    ["engine", "state"], _collect_pool_connections,
+))
+registry.register(Gauge(
+    "db_pool_size", "Configured SQLAlchemy pool size (excluding overflow).",
+    ["engine"], _collect_pool_size,
+))
+
+
+@contextmanager
+def track_upstream(upstream: str, host: str):
+    """Times one upstream call and counts it as an error if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        upstream_request_errors.inc(upstream, host)
+        raise
+    finally:
+        upstream_request_duration.observe(time.perf_counter() - started, upstream, host)
+
+
+class MetricsMiddleware:
+    """Records request latency per route template (not raw path, to bound label cardinality)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                f"{status // 100}xx",
+            )
@@ -0,0 +1,102 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    queries: int = 0
+    seconds: float = 0.0
+
+
+# Stats of the request (or count_queries block) running in the current context.
+# SQLAlchemy's async greenlets share the caller's context, so the cursor events see it.
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# A connection runs one statement at a time, so a single start time per connection is enough
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - conn.info.pop("query_started_at", time.perf_counter())
+
+
+def instrument_engine(engine):
+    """Counts statements and their DB time on `engine` (an AsyncEngine or Engine)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries():
+    """
+    Counts the statements run inside the block:
+
+        with count_queries() as stats:
+            await some_service(db)
+        assert stats.queries <= 3
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def query_budget(max_queries: int):
+    """
+    Declares how many statements a route may run per request. Put it under the
+    router decorator; QueryCounterMiddleware logs every request that goes over.
+    """
+    def decorator(endpoint):
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorator
+
+
+class QueryCounterMiddleware:
+    """
+    Counts SQL statements and DB time per request and returns them in the
+    X-DB-Queries and X-DB-Time (milliseconds) response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-db-queries", str(stats.queries).encode()),
+                        (b"x-db-time", f"{stats.seconds * 1000:.2f}".encode()),
+                    ]
+                    budget = getattr(scope.get("endpoint"), "query_budget", None)
+                    if budget is not None and stats.queries > budget:
+                        logger.warning(
+                            f"Query budget exceeded on {scope['method']} {scope['path']}: "
+                            f"{stats.queries} statements (budget {budget})"
+                        )
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
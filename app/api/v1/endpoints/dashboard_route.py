@@ -1,14 +1,19 @@
 
 import asyncio
+import uuid
 from datetime import datetime
 import json
 from socket import timeout
 from fastapi import APIRouter, Depends, Query, HTTPException, Request, logger
 from app.api.models.site_data import SiteData
+from app.api.models.user_site_summary import UserSiteSummary
 from app.api.models.user_model import User
-from app.api.services.dashboard_services import fetch_total_users, fetch_active_users, fetch_active_modules, fetch_active_sites, fetch_active_users_dynamic, fetch_user_data, fetch_user_data_count, get_site_data
-from sqlalchemy import select
+from app.api.services.dashboard_services import fetch_total_users, fetch_active_users, fetch_active_modules, fetch_active_sites, fetch_active_users_dynamic, fetch_user_data, fetch_user_data_count, get_site_data, refresh_user_site_summary, upsert_site_data
+from app.api.services.site_detail_services import get_site_modules_page, get_site_users_page, parse_date_range, sync_site_details
+from sqlalchemy import select, delete
 from app.api.database.db import get_db
+from app.api.database.replica import get_read_db
+from app.api.utils.query_counter import query_budget
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from sqlalchemy import and_ 
@@ -20,11 +25,6 @@ from sqlalchemy.orm import selectinload
 
 from sqlalchemy.orm import Session
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
 logger = logging.getLogger(__name__)
 
 
@@ -92,6 +92,7 @@ async def get_overview_count(email: str = Query(..., description="The email to f
 
 
 @router.get("/sites-data", tags=["dashboard"])
+@query_budget(2)
 async def fetch_site_data(id: str, db: AsyncSession = Depends(get_db)):
     """
     Fetch site data for the given user ID.
@@ -101,14 +102,12 @@ async def fetch_site_data(id: str, db: AsyncSession = Depends(get_db)):
 
     try:
         data = await get_site_data(id=id, db=db)
-        return data
-    except TypeError as e:
-        if "got an unexpected keyword argument 'id'" in str(e):
+        if data is None:
             return {
                 "status": "error",
                 "message": "This user has not Purchased any Erp Plan Yet"
             }
-        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+        return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
@@ -119,6 +118,7 @@ async def fetch_site_data(id: str, db: AsyncSession = Depends(get_db)):
     
 
 @router.post("/webhook/site-data")
+@query_budget(12)
 async def receive_site_data(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Receives consolidated site data from the webhook, updates or creates corresponding
@@ -151,97 +151,72 @@ async def receive_site_data(request: Request, db: AsyncSession = Depends(get_db)
             logger.warning(f"No user found for email: {email}")
             return {"status": "error", "message": f"No user found for email: {email}"}
 
-        # Get incoming site names
-        incoming_site_names = {site.get("site_info", {}).get("site_name") for site in sites_data if site.get("site_info", {}).get("site_name")}
-
-        # Find and delete sites not in the incoming data
-        result = await db.execute(
-            select(SiteData).filter(
-                and_(
-                    SiteData.user_id == user.id,
-                    SiteData.site_name.notin_(incoming_site_names)
-                )
-            )
-        )
-        sites_to_delete = result.scalars().all()
-        
-        deleted_sites_count = 0
-        for site in sites_to_delete:
-            await db.delete(site)
-            deleted_sites_count += 1
-            logger.info(f"Deleted site not present in webhook: {site.site_name}")
-
-        # Process each site data entry (update or create)
         totals = data.get("data", {}).get("totals", {})
         total_sites_count = totals.get("total_sites", 0)
         active_sites_count = totals.get("active_sites", 0)
 
-        updated_sites = 0
-
+        # Build one row per incoming site (the last entry wins on duplicate names)
+        now = datetime.now()
+        rows = {}
         for site in sites_data:
             site_info = site.get("site_info", {})
             stats = site.get("stats", {})
             site_name = site_info.get("site_name")
             site_status = site_info.get("site_status")
-            country = site_info.get("country")
 
             if not site_name:
                 logger.error("Site name missing in site data")
                 continue
 
-            # Check if the site already exists in the database
-            result = await db.execute(select(SiteData).filter(SiteData.site_name == site_name))
-            existing_site = result.scalar_one_or_none()
-
-            if existing_site:
-                # Update the existing site's stats and info
-                existing_site.total_users_count = stats.get("total_users", 0)
-                existing_site.active_users_count = stats.get("active_users", 0)
-                existing_site.active_modules_count = stats.get("active_modules", 0)
-                existing_site.active_sites = site_status
-                existing_site.location = country 
-                existing_site.total_users = stats.get("users", [])
-                existing_site.active_users = stats.get("active_users_list", [])
-                existing_site.active_modules = stats.get("modules", [])
-                existing_site.sites_data = site  # Store full site data
-                existing_site.updated_at = datetime.now()
-                existing_site.total_site_counts = total_sites_count
-                existing_site.active_site_counts = active_sites_count
-                logger.info(f"Updated site: {site_name}")
-            else:
-                # Create a new SiteData record
-                new_site = SiteData(
-                    site_name=site_name,
-                    active_sites=site_status,
-                    location=country,
-                    total_users_count=stats.get("total_users", 0),
-                    active_users_count=stats.get("active_users", 0),
-                    active_modules_count=stats.get("active_modules", 0),
-                    total_users=stats.get("users", []),
-                    active_users=stats.get("active_users_list", []),
-                    active_modules=stats.get("modules", []),
-                    sites_data=site,
-                    user_id=user.id,
-                    total_site_counts=total_sites_count,
-                    active_site_counts=active_sites_count
+            rows[site_name] = {
+                "id": uuid.uuid4(),
+                "site_name": site_name,
+                "user_id": user.id,
+                "active_sites": site_status == "active" if isinstance(site_status, str) else bool(site_status),
+                "location": site_info.get("country"),
+                "total_users_count": stats.get("total_users", 0),
+                "active_users_count": stats.get("active_users", 0),
+                "active_modules_count": stats.get("active_modules", 0),
+                "total_users": stats.get("users", []),
+                "active_users": stats.get("active_users_list", []),
+                "active_modules": stats.get("modules", []),
+                "sites_data": site,  # Store full site data
+                "total_site_counts": total_sites_count,
+                "active_site_counts": active_sites_count,
+                "updated_at": now,
+            }
+
+        # Delete the user's sites that are no longer in the payload, in one statement
+        result = await db.execute(
+            delete(SiteData).where(
+                and_(
+                    SiteData.user_id == user.id,
+                    SiteData.site_name.notin_(list(rows))
                 )
-                db.add(new_site)
-                logger.info(f"Created new site: {site_name}")
+            )
+        )
+        deleted_sites_count = result.rowcount or 0
+
+        # Insert or update every incoming site with set-based upserts
+        site_ids = await upsert_site_data(db, list(rows.values()))
+        updated_sites = len(rows)
+
+        # Sync the normalized users/modules of every incoming site
+        await sync_site_details(db, {
+            site_ids[site_name]: {
+                "users": row["total_users"],
+                "active_users": row["active_users"],
+                "modules": row["active_modules"],
+            }
+            for site_name, row in rows.items()
+        })
 
-            updated_sites += 1
+        # Keep the per-user dashboard summary in the same transaction
+        await refresh_user_site_summary(db, user.id)
 
         # Commit the database changes
         await db.commit()
 
-        # Refresh each site record to ensure latest state is loaded
-        for site in sites_data:
-            site_name = site.get("site_info", {}).get("site_name")
-            if site_name:
-                result = await db.execute(select(SiteData).filter(SiteData.site_name == site_name))
-                refreshed_site = result.scalar_one_or_none()
-                if refreshed_site:
-                    await db.refresh(refreshed_site)
-
         # Log summary information
         logger.info(f"Site Data Summary - Email: {email}, "
                     f"Updated Sites: {updated_sites}, "
@@ -266,70 +241,39 @@ async def receive_site_data(request: Request, db: AsyncSession = Depends(get_db)
 
 
 @router.get("/active-modules", tags=["destructured dashboard data"])
+@query_budget(3)
 async def get_active_modules(
     id: str = Query(..., description="User ID to fetch active modules for"),
-    date: str = Query(None, description="Date filter (e.g., 'Last 7 days')"),
+    date: str = Query(None, description="Date filter (e.g., 'Today', 'Last 7 days')"),
+    date_from: datetime = Query(None, description="Only modules recorded at or after this time"),
+    date_to: datetime = Query(None, description="Only modules recorded before this time"),
     search: str = Query(None, description="Search term to filter modules"),
-    db: AsyncSession = Depends(get_db)
+    limit: int = Query(50, ge=1, le=500, description="Page size"),
+    after: str = Query(None, description="Cursor from the previous page's next_after"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Fetch active modules data from database."""
+    """Fetch one page of active modules from the database."""
     if not id:
         raise HTTPException(status_code=400, detail="Query parameter 'id' is required")
 
     try:
-        result = await db.execute(select(SiteData).where(SiteData.user_id == id))
-        user_sites = result.scalars().all()
-
-        if not user_sites:
-            return {
-                "total_active_modules": 0,
-                "modules_by_site": []
-            }
-
-        modules_data = []
-        total_active_modules = 0
-
-        for site in user_sites:
-            modules_count = site.active_modules_count or 0
-            total_active_modules += modules_count
-
-            # Check if the search term matches the site name
-            site_name_matches = False
-            if search and search.lower() in site.site_name.lower():
-                site_name_matches = True
-
-            # Filter modules based on the search term
-            filtered_modules = []
-            if search:
-                for module in site.active_modules or []:
-                    if (
-                        search.lower() in module.get("module_name", "").lower()
-                        or search.lower() in module.get("app_name", "").lower()
-                        or site_name_matches  # Include all modules if site name matches
-                    ):
-                        filtered_modules.append(module)
-            else:
-                filtered_modules = site.active_modules or []
-
-            # Only include sites that match the search or have matching modules
-            if not search or filtered_modules or site_name_matches:
-                modules_data.append({
-                    "site_name": site.site_name,
-                    "active_modules": {
-                        "count": len(filtered_modules),
-                        "modules": filtered_modules
-                    }
-                })
-
-        return {
-            "total_active_modules": total_active_modules,
-            "modules_by_site": modules_data
-        }
-
+        start, end = parse_date_range(date, date_from, date_to)
+        page = await get_site_modules_page(db, id, search=search, start=start, end=end, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logging.error(f"Database error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+    summary = await db.get(UserSiteSummary, id)
+
+    return {
+        "total_active_modules": summary.active_modules if summary else 0,
+        "modules_by_site": page["modules_by_site"],
+        "limit": limit,
+        "next_after": page["next_after"]
+    }
+
 
 
     
@@ -337,22 +281,16 @@ async def get_active_modules(
     
     
 @router.get("/active-sites-count", tags=["destructured dashboard data"])
+@query_budget(1)
 async def get_active_sites_count(id: str, db: AsyncSession = Depends(get_db)):
     """Fetch active sites count from database."""
     if not id:
         raise HTTPException(status_code=400, detail="Query parameter 'id' is required")
 
     try:
-        result = await db.execute(select(SiteData).where(SiteData.user_id == id))
-        user_sites = result.scalars().all()
-
-        if not user_sites:
-            return {"active_sites_count": 0}
+        summary = await db.get(UserSiteSummary, id)
 
-        # Get counts from the first site record
-        active_sites_count = user_sites[0].active_site_counts if user_sites else 0
-        
-        return {"active_sites_count": active_sites_count}
+        return {"active_sites_count": summary.active_sites if summary else 0}
 
     except Exception as e:
         logging.error(f"Database error: {str(e)}")
@@ -362,22 +300,16 @@ async def get_active_sites_count(id: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/total-sites-count", tags=["destructured dashboard data"])
+@query_budget(1)
 async def get_total_sites_count(id: str, db: AsyncSession = Depends(get_db)):
     """Fetch total sites count from database."""
     if not id:
         raise HTTPException(status_code=400, detail="Query parameter 'id' is required")
 
     try:
-        result = await db.execute(select(SiteData).where(SiteData.user_id == id))
-        user_sites = result.scalars().all()
+        summary = await db.get(UserSiteSummary, id)
 
-        if not user_sites:
-            return {"total_sites_count": 0}
-
-        # Get total sites count from the first site record
-        total_sites_count = user_sites[0].total_site_counts if user_sites else 0
-        
-        return {"total_sites_count": total_sites_count}
+        return {"total_sites_count": summary.total_sites if summary else 0}
 
     except Exception as e:
         logging.error(f"Database error: {str(e)}")
@@ -387,30 +319,26 @@ async def get_total_sites_count(id: str, db: AsyncSession = Depends(get_db)):
     
 
 @router.get("/active-users", tags=["destructured dashboard data"])
-async def get_active_users(id: str, db: AsyncSession = Depends(get_db)):
+@query_budget(4)
+async def get_active_users(
+    id: str,
+    search: str = Query(None, description="Search term to filter users by email or name"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
     """Fetch active users data from database."""
     if not id:
         raise HTTPException(status_code=400, detail="Query parameter 'id' is required")
 
     try:
-        result = await db.execute(select(SiteData).where(SiteData.user_id == id))
-        user_sites = result.scalars().all()
-
-        if not user_sites:
-            return {
-                "sites": []
-            }
-
-        sites = []
-
-        for site in user_sites:
-            sites.append({
-                "site_name": site.site_name,
-                "users": site.active_users or []
-            })
+        page = await get_site_users_page(db, id, active_only=True, search=search, limit=limit, offset=offset)
 
         return {
-            "sites": sites
+            "sites": page["sites"],
+            "total": page["total"],
+            "limit": limit,
+            "offset": offset
         }
 
     except Exception as e:
@@ -420,30 +348,26 @@ async def get_active_users(id: str, db: AsyncSession = Depends(get_db)):
     
 
 @router.get("/total-users", tags=["destructured dashboard data"])
-async def get_total_users(id: str, db: AsyncSession = Depends(get_db)):
+@query_budget(4)
+async def get_total_users(
+    id: str,
+    search: str = Query(None, description="Search term to filter users by email or name"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
     """Fetch total users data from database."""
     if not id:
         raise HTTPException(status_code=400, detail="Query parameter 'id' is required")
 
     try:
-        result = await db.execute(select(SiteData).where(SiteData.user_id == id))
-        user_sites = result.scalars().all()
-
-        if not user_sites:
-            return {
-                "users_by_site": []
-            }
-
-        users_data = []
-
-        for site in user_sites:
-            users_data.append({
-                "site_name": site.site_name,
-                "users": site.total_users or []
-            })
+        page = await get_site_users_page(db, id, search=search, limit=limit, offset=offset)
 
         return {
-            "users_by_site": users_data
+            "users_by_site": page["sites"],
+            "total": page["total"],
+            "limit": limit,
+            "offset": offset
         }
 
     except Exception as e:
@@ -454,23 +378,16 @@ async def get_total_users(id: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/site-totals", tags=["destructured dashboard data"])
+@query_budget(1)
 async def get_site_totals(id: str, db: AsyncSession = Depends(get_db)):
     """Fetch only total sites count from database."""
     if not id:
         raise HTTPException(status_code=400, detail="Query parameter 'id' is required")
 
     try:
-        result = await db.execute(select(SiteData).where(SiteData.user_id == id))
-        user_sites = result.scalars().all()
+        summary = await db.get(UserSiteSummary, id)
 
-        if not user_sites:
-            return {"total_sites": 0}
-
-        # Get total sites count from the first site record
-        total_sites_count = user_sites[0].total_site_counts if user_sites else 0
-        
-        # Return only the total_sites value
-        return {"total_sites": total_sites_count}
+        return {"total_sites": summary.total_sites if summary else 0}
 
     except Exception as e:
         logging.error(f"Database error: {str(e)}")
@@ -480,23 +397,16 @@ async def get_site_totals(id: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/active-sites-total", tags=["destructured dashboard data"])
+@query_budget(1)
 async def get_active_sites_total(id: str, db: AsyncSession = Depends(get_db)):
     """Fetch only active sites count from database."""
     if not id:
         raise HTTPException(status_code=400, detail="Query parameter 'id' is required")
 
     try:
-        result = await db.execute(select(SiteData).where(SiteData.user_id == id))
-        user_sites = result.scalars().all()
-
-        if not user_sites:
-            return {"active_sites": 0}
+        summary = await db.get(UserSiteSummary, id)
 
-        # Get active sites count from the first site record
-        active_sites_count = user_sites[0].active_site_counts if user_sites else 0
-        
-        # Return only the active_sites value
-        return {"active_sites": active_sites_count}
+        return {"active_sites": summary.active_sites if summary else 0}
 
     except Exception as e:
         logging.error(f"Database error: {str(e)}")
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.database.db import get_db
+from app.api.dependencies.dependencies import require_admin, require_metrics_token
+from app.api.services.outbox_services import outbox_stats
+from app.api.utils.http_clients import http_clients
+from app.api.utils.metrics import registry
+
+
+router = APIRouter()
+
+
+# Upstream hosts, error rates and backlog sizes are internal; admins only
+@router.get("/upstream-stats", tags=["monitoring"], dependencies=[Depends(require_admin)])
+async def get_upstream_stats():
+    """
+    Pool occupancy and connection reuse rate for every upstream HTTP client.
+    """
+    return http_clients.stats()
+
+
+@router.get("/outbox-stats", tags=["monitoring"], dependencies=[Depends(require_admin)])
+async def get_outbox_stats(db: AsyncSession = Depends(get_db)):
+    """
+    Outbox backlog: pending, delivered and dead-lettered Frappe writes.
+    """
+    return await outbox_stats(db)
+
+
+@router.get("/metrics", tags=["monitoring"], include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def get_metrics():
+    """
+    Route, upstream and DB pool metrics in the Prometheus text format. Scrapers
+    authenticate with METRICS_SCRAPE_TOKEN as a bearer token, not a user login.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
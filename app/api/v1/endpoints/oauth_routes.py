@@ -1,103 +1,92 @@
 import logging
 import os
 import uuid
+from functools import lru_cache
 from fastapi import APIRouter, Request, HTTPException, Depends
 from authlib.integrations.starlette_client import OAuth, OAuthError
 from sqlalchemy import func, select
 from app.api.database.db import get_db
 from app.api.models.user_model import User
 from sqlalchemy.ext.asyncio import AsyncSession
-from dotenv import load_dotenv
 from authlib.jose import jwt
 import httpx
 import json
+from base64 import urlsafe_b64decode
 
 from app.api.security.security import create_access_token, create_refresh_token, hash_password
+from app.api.services.oidc_key_cache import google_keys
 
-load_dotenv()
+from app.api.config.settings import settings
 
 router = APIRouter()
 
-oauth = OAuth()
-oauth.register(
-    name='google',
-    client_id=os.getenv("GOOGLE_CLIENT_ID"),
-    client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-    authorize_url='https://accounts.google.com/o/oauth2/auth',
-    access_token_url='https://oauth2.googleapis.com/token',
-    # authorize_params=None,
-    # refresh_token_url=None,
-    client_kwargs={
-        'scope': 'email openid profile',
-        'redirect_url': 'http://localhost:8000/callback/google'
-    },
-    server_metadata_url= 'https://accounts.google.com/.well-known/openid-configuration',
-)
-
-oauth.register(
-    name='apple',
-    client_id=os.getenv("APPLE_CLIENT_ID"),
-    client_secret=os.getenv("APPLE_CLIENT_SECRET"),
-    authorize_url='https://appleid.apple.com/auth/authorize',
-    access_token_url='https://appleid.apple.com/auth/token',
-    authorize_params=None,
-    refresh_token_url=None,
-    redirect_uri='http://localhost:8000/api/callback/apple',
-    client_kwargs={'scope': 'openid email'},
-)
-
-
-async def get_jwks_uri() -> str:
-    async with httpx.AsyncClient() as client:
-        response = await client.get("https://accounts.google.com/.well-known/openid-configuration")
-        response.raise_for_status()
-        return response.json()['jwks_uri']
-
-async def get_jwks(jwks_uri: str):
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(jwks_uri)
-            response.raise_for_status()
-            logging.debug(f"JWKS Response: {response.json()}")
-            return response.json()
-    except httpx.RequestError as e:
-        logging.error(f"Error while fetching JWKS: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error while fetching JWKS: {str(e)}")
+
+@lru_cache(maxsize=None)
+def get_oauth() -> OAuth:
+    """Builds the OAuth registry with the Google and Apple clients on first use."""
+    oauth = OAuth()
+    oauth.register(
+        name='google',
+        client_id=settings.GOOGLE_CLIENT_ID,
+        client_secret=settings.GOOGLE_CLIENT_SECRET,
+        authorize_url='https://accounts.google.com/o/oauth2/auth',
+        access_token_url='https://oauth2.googleapis.com/token',
+        # authorize_params=None,
+        # refresh_token_url=None,
+        client_kwargs={
+            'scope': 'email openid profile',
+            'redirect_url': 'http://localhost:8000/callback/google'
+        },
+        server_metadata_url= 'https://accounts.google.com/.well-known/openid-configuration',
+    )
+
+    oauth.register(
+        name='apple',
+        client_id=os.getenv("APPLE_CLIENT_ID"),
+        client_secret=os.getenv("APPLE_CLIENT_SECRET"),
+        authorize_url='https://appleid.apple.com/auth/authorize',
+        access_token_url='https://appleid.apple.com/auth/token',
+        authorize_params=None,
+        refresh_token_url=None,
+        redirect_uri='http://localhost:8000/api/callback/apple',
+        client_kwargs={'scope': 'openid email'},
+    )
+    return oauth
 
 
 async def verify_id_token(id_token: str):
-    jwks_uri = await get_jwks_uri()  # Fetch JWKS URI
-    jwks = await get_jwks(jwks_uri)   # Get JWKS
+    """Verifies a Google ID token against Google's cached signing keys."""
+    try:
+        kid = json.loads(urlsafe_b64decode(id_token.split(".")[0] + "==")).get("kid")
+    except (ValueError, AttributeError):
+        raise HTTPException(status_code=401, detail="Invalid token")
 
-    # Decode the header to extract 'kid'
-    header = jwt.get_unverified_header(id_token)
-    kid = header.get("kid")
+    try:
+        key = await google_keys.get_key(kid)
+    except (httpx.HTTPError, KeyError, ValueError) as e:
+        logging.error(f"Error while fetching Google signing keys: {str(e)}")
+        raise HTTPException(status_code=503, detail="Could not fetch Google signing keys")
 
-    # Find the key that matches the 'kid'
-    for key in jwks['keys']:
-        if key['kid'] == kid:
-            try:
-                # Decode the token using the public key
-                decoded_token = jwt.decode(id_token, key, claims_options={"aud": {"essential": False}})
-                return decoded_token
-            except Exception as e:
-                # Handle token verification errors
-                raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+    if key is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
 
-    raise HTTPException(status_code=401, detail="Invalid token")
+    try:
+        return jwt.decode(id_token, key, claims_options={"aud": {"essential": False}})
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
 
 
 @router.get("/login/google", tags=["auth"])
 async def login_google(request: Request):
     redirect_uri = request.url_for('callback_google')
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    return await get_oauth().google.authorize_redirect(request, redirect_uri)
 
 
 
 @router.get("/callback/google", tags=["auth"])
 async def callback_google(request: Request, db: AsyncSession = Depends(get_db)):
     try:
-        token = await oauth.google.authorize_access_token(request)
+        token = await get_oauth().google.authorize_access_token(request)
     except OAuthError as e:
         raise HTTPException(status_code=400, detail=f"Authorization failed: {str(e)}")
     
@@ -142,6 +131,7 @@ async def callback_google(request: Request, db: AsyncSession = Depends(get_db)):
             
             # Include user info directly in the access token payload
             access_token = await create_access_token(user_data={
+                "id": str(user.id),
                 "email": user.email,
                 "first_name": user.first_name, 
                 "last_name": user.last_name,
@@ -150,6 +140,7 @@ async def callback_google(request: Request, db: AsyncSession = Depends(get_db)):
 
             # Generate a refresh token
             refresh_token = await create_refresh_token(user_data={
+                "id": str(user.id),
                 "email": user.email
             })
 
@@ -171,7 +162,7 @@ async def callback_google(request: Request, db: AsyncSession = Depends(get_db)):
 @router.get("/api/login/apple", tags=["auth"])
 async def login_apple(request: Request):
     redirect_uri = request.url_for('callback_apple')
-    return await oauth.apple.authorize_redirect(request, redirect_uri)
+    return await get_oauth().apple.authorize_redirect(request, redirect_uri)
 
 
 
@@ -180,8 +171,8 @@ async def login_apple(request: Request):
 @router.get("/api/callback/apple", tags=["auth"])
 async def callback_apple(request: Request, db: AsyncSession = Depends(get_db)):
     try:
-        token = await oauth.apple.authorize_access_token(request)
-        user_info = await oauth.apple.parse_id_token(request, token)
+        token = await get_oauth().apple.authorize_access_token(request)
+        user_info = await get_oauth().apple.parse_id_token(request, token)
         user = db.query(User).filter(User.email == user_info['email']).first()
         if not user:
             user = User(email=user_info['email'])
@@ -1,18 +1,20 @@
 import traceback
 from uuid import UUID
 import json
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.database.db import get_db
+from app.api.database.replica import get_read_db
 from fastapi import APIRouter, Depends, HTTPException, Header
 from app.api.models.product import Product
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import FastAPI, APIRouter, Request
 from app.api.schemas.product_schema import ItemUpdateRequest
-from app.api.services.product_services import fetch_and_save_product, fetch_products_from_db, fetch_single_product_from_db
+from app.api.services.product_services import fetch_single_product_from_db
+from app.api.services.product_cache import etag_matches, product_catalog_cache, product_refresher
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
-from app.api.services.product_services import update_item_in_frappe
+from app.api.services.product_services import apply_product_webhook, update_item_in_frappe
 import json
 from typing import Optional
 import os
@@ -34,42 +36,46 @@ router = APIRouter()
 
 
 @router.get("/get-products", tags=["product"])
-async def get_all_products(db: AsyncSession = Depends(get_db)):
+async def get_all_products(
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Fetch products from the database. If no data is found, fetch from API and save it to the database.
+    Served from the in-process catalog cache; answers If-None-Match with 304.
     """
     try:
-        # Attempt to fetch products from the database
-        products = await fetch_products_from_db(db)
-
-        # If no products are found in the database, fetch and save products from the external API
-        if not products["products"]:
-            logging.info("No products found in the database. Fetching from external API.")
-            products = await fetch_and_save_product(db)
-
-        return products
+        body, etag = await product_catalog_cache.get(db)
     except HTTPException as e:
         raise e
     except Exception as e:
         logging.error(f"Unexpected error in get_all_products: {str(e)}")
         raise HTTPException(status_code=500, detail="Error fetching product data")
 
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 
     
 
 
 @router.get("/products/{product_id}", tags=["product"])
-async def get_product_by_id(product_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_product_by_id(product_id: UUID, db: AsyncSession = Depends(get_read_db)):
     """
-    Fetch a specific product by its ID from the database and update it with latest API data if available.
+    Fetch a specific product by its ID from the database, then refresh it from Frappe
+    in the background if it has not been refreshed recently.
     
     Parameters:
         product_id (UUID): The UUID of the product to fetch
         db (AsyncSession): Database session dependency
     """
     try:
-        return await fetch_single_product_from_db(product_id, db)
+        response = await fetch_single_product_from_db(product_id, db)
+        product_refresher.schedule(response["product"]["product_code"])
+        return response
     except HTTPException as e:
         raise e
     except ValueError as e:
@@ -140,6 +146,7 @@ async def get_data_from_erp(request: Request, db: AsyncSession = Depends(get_db)
 
         # Commit the transaction
         await db.commit()
+        product_catalog_cache.invalidate()
         return JSONResponse(content={"message": "Product processed successfully"}, status_code=200)
 
     except SQLAlchemyError as e:
@@ -155,8 +162,8 @@ async def get_data_from_erp(request: Request, db: AsyncSession = Depends(get_db)
 
 
 @router.put("/update-item/")
-def update_item(payload: ItemUpdateRequest):
-    return update_item_in_frappe(payload)
+async def update_item(payload: ItemUpdateRequest):
+    return await update_item_in_frappe(payload)
 
 
 
@@ -181,81 +188,6 @@ async def verify_api_key(x_api_key: Optional[str] = Header(None)):
 
 
 
-async def save_or_update_product(db: AsyncSession, product_data: dict) -> dict:
-    try:
-        # Log incoming data
-        logging.info(f"Incoming product_data: {json.dumps(product_data, indent=2)}")
-        
-        # Handle NULL product_image
-        product_image = product_data.get("image")
-        if product_image is None:
-            product_image = "https://example.com/default-product-image.jpg"  # Default image URL
-
-        formatted_product = {
-            "product_id": product_data.get("name"),
-            "product_name": product_data.get("item_name"),
-            "item_group": product_data.get("item_group", "Unknown"),
-            "product_description": product_data.get("description"),
-            "product_image": product_image,  # Use the default value if NULL
-            "images": product_data.get("images", []),
-            "benefits": product_data.get("benefits", []),
-            "plans": product_data.get("plans", {})
-        }
-        
-        # Log formatted data
-        logging.info(f"Formatted product data: {json.dumps(formatted_product, indent=2)}")
-
-        # Check if product exists
-        query = select(Product).where(Product.product_code == formatted_product["product_id"])
-        result = await db.execute(query)
-        existing_product = result.scalars().first()
-
-        if existing_product:
-            # Update existing product
-            existing_product.product_title = formatted_product["product_name"]
-            existing_product.item_group = formatted_product["item_group"]
-            existing_product.product_description = formatted_product["product_description"]
-            existing_product.product_image = formatted_product["product_image"]
-            existing_product.images = formatted_product["images"]
-            existing_product.benefits = formatted_product["benefits"]
-            existing_product.plans = formatted_product["plans"]
-            existing_product.updated_at = datetime.utcnow()
-            
-            product_response = existing_product
-            action = "updated"
-        else:
-            # Create new product
-            new_product = Product(
-                id=uuid.uuid4(),
-                product_code=formatted_product["product_id"],
-                product_title=formatted_product["product_name"],
-                item_group=formatted_product["item_group"],
-                product_description=formatted_product["product_description"],
-                product_image=formatted_product["product_image"],
-                images=formatted_product["images"],
-                benefits=formatted_product["benefits"],
-                plans=formatted_product["plans"]
-            )
-            db.add(new_product)
-            product_response = new_product
-            action = "created"
-
-        return {
-            "product_code": product_response.product_code,
-            "action": action,
-            "status": "success"
-        }
-
-    except Exception as e:
-        logging.error(f"Error processing product {formatted_product['product_id']}: {str(e)}")
-        logging.error(f"Full error traceback: {traceback.format_exc()}")
-        return {
-            "product_code": formatted_product["product_id"],
-            "action": "failed",
-            "status": "error",
-            "error": str(e)
-        }
-
 @router.post("/webhook/product-update")
 async def site_product_webhook(
     data: dict,
@@ -264,12 +196,8 @@ async def site_product_webhook(
 ):
     """
     Endpoint to receive product updates from Frappe and store them in the database.
+    The whole batch is saved with one lookup, one bulk upsert and one commit.
     """
-    logging.info("Received webhook data for product update")
-    logging.info(f"Full webhook data: {json.dumps(data, indent=2)}")
-    
-    results = []
-    
     if "items" not in data:
         raise HTTPException(
             status_code=400,
@@ -277,28 +205,10 @@ async def site_product_webhook(
         )
 
     try:
-        # Process each product in the webhook data
-        for item in data["items"]:  # Updated to handle the correct structure
-            result = await save_or_update_product(db, item)
-            results.append(result)
-
-        # Commit the transaction
+        results = await apply_product_webhook(db, data["items"])
         await db.commit()
-
-        # Prepare the response
-        successful = [r for r in results if r["status"] == "success"]
-        failed = [r for r in results if r["status"] == "error"]
-
-        return {
-            "status": "success",
-            "message": f"Processed {len(results)} products",
-            "details": {
-                "successful": len(successful),
-                "failed": len(failed),
-                "results": results
-            }
-        }
-
+        if any(r["action"] in ("created", "updated") for r in results):
+            product_catalog_cache.invalidate()
     except Exception as e:
         await db.rollback()
         logging.error(f"Error processing webhook: {str(e)}")
@@ -308,6 +218,23 @@ async def site_product_webhook(
             detail=f"Error processing webhook: {str(e)}"
         )
 
+    successful = [r for r in results if r["status"] == "success"]
+    failed = [r for r in results if r["status"] == "error"]
+    actions = [r["action"] for r in successful]
+    logger.info(
+        f"Product webhook: {len(results)} items, {actions.count('created')} created, "
+        f"{actions.count('updated')} updated, {actions.count('unchanged')} unchanged, {len(failed)} failed"
+    )
+
+    return {
+        "status": "success",
+        "message": f"Processed {len(results)} products",
+        "details": {
+            "successful": len(successful),
+            "failed": len(failed),
+            "results": results
+        }
+    }
 
 
 
@@ -17,6 +17,7 @@ from app.api.models.user_model import User
 from app.api.models.permission import Permission
 from app.api.dependencies.dependencies import get_role_name, get_role_by_name, verify_role_for_admin_or_super_admin
 from app.api.security.security import get_current_user_id
+from app.api.utils.query_counter import query_budget
 from app.api.services.role_permission_services import (
     add_permissions_to_user,
     create_role,
@@ -100,6 +101,7 @@ async def delete_existing_permission(permission_id: uuid.UUID, db: AsyncSession
 
 # Add multiple permissions to a role
 @router.post("/roles/{role_id}/permissions/", tags=["role_permission"])
+@query_budget(3)
 async def assign_single_or_multiple_permissions_to_role(
     role_id: uuid.UUID,
     permission_ids: list[uuid.UUID],
@@ -121,6 +123,7 @@ async def assign_single_or_multiple_permissions_to_role(
     
 
 @router.delete("/permission/{role_id}", tags=["role_permission"])
+@query_budget(3)
 async def revoke_permissions_from_role(role_id: uuid.UUID, permission_revoke: PermissionRevoke, db: AsyncSession = Depends(get_db)):
     success = await remove_permissions_from_role(db, role_id, permission_revoke.permission_ids)
     
@@ -134,6 +137,7 @@ async def revoke_permissions_from_role(role_id: uuid.UUID, permission_revoke: Pe
 
 # Add multiple permissions to a user
 @router.post("/user-permissions/{user_id}/permissions", tags=["role_permission"])
+@query_budget(3)
 async def assign_single_or_multiple_permissions_to_user(
     user_id: uuid.UUID,
     permission_ids: list[uuid.UUID],
@@ -156,6 +160,7 @@ async def assign_single_or_multiple_permissions_to_user(
 
 # Remove a permission or multiple permissions from a user
 @router.delete("/remove-user-permission/{role_id}", tags=["role_permission"])
+@query_budget(3)
 async def revoke_permissions_from_user(user_id: uuid.UUID, permission_revoke: PermissionRevoke, db: AsyncSession = Depends(get_db)):
     success = await remove_permissions_from_user(db, user_id, permission_revoke.permission_ids)
     
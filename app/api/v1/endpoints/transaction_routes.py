@@ -4,26 +4,20 @@ from typing import Dict, List
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy import select
 from app.api.database.db import get_db
+from app.api.database.replica import get_read_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.schemas.transaction_schema import TransactionPayload
-from app.api.services.transaction_services import CustomJSONEncoder, get_transaction_by_id, get_transactions_by_user_id, store_transaction
-from app.api.security.payment_verification import verify_paystack_transaction, verify_webhook_signature
+from app.api.services.transaction_services import CustomJSONEncoder, get_transaction_by_id, get_transactions_by_user_id, record_webhook_event, store_transaction
+from app.api.security.payment_verification import verify_webhook_signature
+from app.api.config.settings import settings
 from app.api.models.transactions import UserTransactions
 import logging
 
 
 
 
-import os
+from app.api.services.outbox_services import STORE_SITE_DATA, enqueue, outbox_worker
 
-from app.api.utils.frappe_utils import store_site_data
-
-
-
-PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY')
-
-
-secret_key = PAYSTACK_SECRET_KEY
 
 
 router = APIRouter()
@@ -98,50 +92,23 @@ async def site_creation_webhook(data: dict, db: AsyncSession = Depends(get_db)):
                 "product": transaction.plan
             }
             
-            logging.info(f"Prepared site data for Frappe: {json.dumps(site_data, indent=2)}")
-            
-            # Store the data in Frappe
+            # Redelivered webhook: the site data is already queued or stored
+            if transaction.site_creation_status in ("storing", "complete"):
+                return {"status": "success", "message": "Site data already queued for Frappe"}
+
+            # Queue the Frappe write; the outbox worker delivers it and retries on failure
             try:
-                logging.info(f"Attempting to store site data for {site_name} in Frappe")
-                frappe_response = await store_site_data(site_data)
-                
-                logging.info(f"Frappe response received: {frappe_response}")
-                
-                # Update transaction with Frappe data storage status
-                transaction.frappe_status = "success"
-                transaction.frappe_response = json.dumps(frappe_response, cls=CustomJSONEncoder)
-                transaction.site_creation_status = "complete"
-                
-                try:
-                    await db.commit()
-                    logging.info(f"Transaction updated successfully for {site_name}")
-                except Exception as commit_error:
-                    logging.error(f"Error committing transaction: {str(commit_error)}")
-                    await db.rollback()
-                
-                logging.info(f"Site data successfully stored in Frappe for {site_name}")
-                return {
-                    "status": "success", 
-                    "message": "Site data stored in Frappe",
-                    "frappe_response": frappe_response
-                }
-                
-            except Exception as e:
-                error_msg = f"Failed to store site data in Frappe: {str(e)}"
-                logging.error(error_msg)
-                
-                # Update transaction with failure status
-                transaction.frappe_status = "failed"
-                transaction.frappe_error = error_msg
-                
-                try:
-                    await db.commit()
-                    logging.info(f"Transaction updated with failure status for {site_name}")
-                except Exception as commit_error:
-                    logging.error(f"Error committing failure status: {str(commit_error)}")
-                    await db.rollback()
-                
-                return {"status": "error", "message": error_msg}
+                enqueue(db, STORE_SITE_DATA, site_data, transaction_id=transaction.id)
+                transaction.site_creation_status = "storing"
+                await db.commit()
+            except Exception as db_error:
+                logging.error(f"Error queueing site data for {site_name}: {str(db_error)}")
+                await db.rollback()
+                return {"status": "error", "message": "Database update failed"}
+
+            outbox_worker.notify()
+            logging.info(f"Site data for {site_name} queued for Frappe")
+            return {"status": "success", "message": "Site data queued for Frappe"}
         
         # Update site creation status if not successful
         elif data.get("status") == "failed":
@@ -193,68 +160,45 @@ async def site_creation_webhook(data: dict, db: AsyncSession = Depends(get_db)):
 async def paystack_webhook(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Endpoint for receiving Paystack webhook notifications.
-    """
-    try:
-        # Restrict Access to Webhook Endpoint (IP check)
-        # client_ip = request.client.host
-        # if client_ip not in ALLOWED_PAYSTACK_IPS:
-        #     raise HTTPException(status_code=403, detail="Forbidden: Invalid IP")
-
-        # Extract the Paystack signature from the headers
-        paystack_signature = request.headers.get("x-paystack-signature")
-        if not paystack_signature:
-            raise HTTPException(status_code=400, detail="Missing Paystack signature")
-        
-        # Parse the request body (JSON data from Paystack)
-        payload = await request.json()
-        logging.info(f"Paystack Webhook Payload1111111111111111111111111111111111111111111: {payload}")
-        
-        #Verify the webhook signature
-        
 
-        #Extract event and transaction data
-        event = payload.get('event')
-        transaction_data = payload.get('data')
-
-        # Log the event and transaction data for better tracking
-        logging.info(f"Paystack Webhook Event: {event}")
-        logging.info(f"Paystack Transaction Data: {transaction_data}")
+    The signature is checked first, on the raw body, before any parsing or I/O.
+    The signed payload is authoritative, so it is not re-verified with the Paystack
+    API. Each (event, reference) is processed once; redeliveries get a 200 straight away.
+    """
+    # Restrict Access to Webhook Endpoint (IP check)
+    # client_ip = request.client.host
+    # if client_ip not in ALLOWED_PAYSTACK_IPS:
+    #     raise HTTPException(status_code=403, detail="Forbidden: Invalid IP")
 
-        if not event or not transaction_data:
-            raise HTTPException(status_code=400, detail="Invalid payload received from Paystack")
+    paystack_signature = request.headers.get("x-paystack-signature")
+    if not paystack_signature:
+        raise HTTPException(status_code=400, detail="Missing Paystack signature")
 
-        # Verify the transaction via Paystack API
-        payment_reference = transaction_data.get("reference")
-        paystack_status, paystack_response = await verify_paystack_transaction(payment_reference)
-        
-        await verify_webhook_signature(secret_key, request, paystack_signature)
-        
+    raw_payload = await request.body()
+    verify_webhook_signature(settings.PAYSTACK_SECRET_KEY, raw_payload, paystack_signature)
 
-        # Process webhook based on the event type (e.g., payment.success, payment.failed, etc.)
-        if event == "charge.success":
-            # Update transaction status to success in the database
-            transaction_id = transaction_data.get("id")
-            logging.info(f"Processing charge.success for transaction_id: {transaction_id}")
-            logging.info(f"Comparing The Id from Paystack and database: {transaction_id}")
+    try:
+        payload = json.loads(raw_payload)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid payload received from Paystack")
 
-            transaction = await db.execute(select(UserTransactions).filter(UserTransactions.transaction_id == transaction_id))
-            logging.info(f"Transaction Query Result: {transaction}")
-            transaction = transaction.scalar_one_or_none()
+    event = payload.get("event")
+    transaction_data = payload.get("data")
+    if not event or not isinstance(transaction_data, dict) or not transaction_data.get("reference"):
+        raise HTTPException(status_code=400, detail="Invalid payload received from Paystack")
 
-            if transaction:
-                transaction.payment_status = "success"
-                transaction.paystack_status = paystack_status
-                transaction.paystack_response = paystack_response
-                await db.commit()
-                logging.info(f"Updated transaction {transaction_id} to success.")
-            else:
-                raise HTTPException(status_code=404, detail="Transaction not found")
+    payment_reference = str(transaction_data["reference"])
+    transaction_id = transaction_data.get("id")
+    logging.info(f"Paystack Webhook Event: {event} for reference {payment_reference}")
 
-        elif event == "charge.failed":
-            # Handle payment failure (e.g., update the payment status to failed)
-            transaction_id = transaction_data.get("id")
-            logging.info(f"Processing charge.success for transaction_id: {transaction_id}")
+    try:
+        # Recorded in the same commit as the update, so a failed attempt can be redelivered
+        if not await record_webhook_event(db, event, payment_reference, transaction_id):
+            logging.info(f"Duplicate Paystack webhook {event} for {payment_reference}, already processed")
+            return {"status": "success", "message": "Webhook already processed."}
 
+        if event in ("charge.success", "charge.failed"):
+            logging.info(f"Processing {event} for transaction_id: {transaction_id}")
             transaction = await db.execute(select(UserTransactions).filter(UserTransactions.transaction_id == transaction_id))
             transaction = transaction.scalar_one_or_none()
 
@@ -262,14 +206,19 @@ async def paystack_webhook(request: Request, db: AsyncSession = Depends(get_db))
                 logging.error(f"Transaction not found for transaction_id: {transaction_id}")
                 raise HTTPException(status_code=404, detail="Transaction not found")
 
-            # Update transaction status
-            transaction.payment_status = "failed"
-            transaction.paystack_status = paystack_status
-            transaction.paystack_response = paystack_response
-            await db.commit()
-            logging.info(f"Updated transaction {transaction_id} to success.")
+            transaction.payment_status = "success" if event == "charge.success" else "failed"
+            transaction.paystack_status = transaction_data.get("status")
+            transaction.paystack_response = transaction_data
+            logging.info(f"Updated transaction {transaction_id} to {transaction.payment_status}.")
+
+        await db.commit()
+        return {"status": "success", "message": "Webhook handled successfully."}
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
+        await db.rollback()
         logging.error(f"Error handling Paystack webhook: {str(e)}")
         raise HTTPException(status_code=500, detail="Error processing Paystack webhook")
 
@@ -307,7 +256,7 @@ async def paystack_webhook(request: Request, db: AsyncSession = Depends(get_db))
 #     ]
 
 @router.get("/get-transactions/{user_id}", response_model=List[dict])
-async def fetch_user_transactions(user_id: str, db: AsyncSession = Depends(get_db)):
+async def fetch_user_transactions(user_id: str, db: AsyncSession = Depends(get_read_db)):
     """
     Fetch all transactions for a specific user based on user_id with active sites.
     Path parameter:
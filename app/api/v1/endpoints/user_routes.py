@@ -75,6 +75,7 @@ from app.api.schemas.user_schema import UserLogin, UserCreate, UserResponse
 from app.api.models import user_model
 from app.api.services.user_services import signin, signup
 from app.api.services.settings_service import update_user
+from app.api.security.auth_cache import principal_cache
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.schemas.user_schema import UserUpdate, ChangePassword  # Import the Pydantic schema
@@ -162,6 +163,7 @@ async def settings_update_user(
         setattr(user, field, value)
     
     await db.commit()
+    principal_cache.invalidate(user_id)
     await db.refresh(user)
     
     return user
@@ -181,7 +183,7 @@ async def update_password(
         raise HTTPException(status_code=404, detail="User not found")
 
     # Verify old password
-    if not ChangePassword.verify_password(password_data.old_password, user.password):
+    if not await ChangePassword.verify_password(password_data.old_password, user.password):
         raise HTTPException(status_code=400, detail="Incorrect old password")
 
     # Validate new password and confirmation
@@ -191,7 +193,7 @@ async def update_password(
         raise HTTPException(status_code=400, detail=str(e))
 
     # Hash new password and update user record
-    user.password = ChangePassword.hash_password(password_data.new_password)
+    user.password = await ChangePassword.hash_password(password_data.new_password)
     await db.commit()
     await db.refresh(user)
 
@@ -0,0 +1,26 @@
+from app.api.v1.endpoints import (
+    card_routes,
+    dashboard_route,
+    email_routes,
+    monitoring_routes,
+    oauth_routes,
+    product_routes,
+    role_permission_routes,
+    transaction_routes,
+    user_routes,
+)
+
+
+# Every API router, mounted under settings.ROUTE_PREFIX by app.main.
+# New endpoint modules must be added here.
+routers = [
+    card_routes.router,
+    dashboard_route.router,
+    email_routes.router,
+    monitoring_routes.router,
+    oauth_routes.router,
+    product_routes.router,
+    role_permission_routes.router,
+    transaction_routes.router,
+    user_routes.router,
+]
@@ -1,19 +1,22 @@
-import os
 import logging
-import importlib
-from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from logging.handlers import RotatingFileHandler
 import uvicorn
 from app.api.config.settings import settings
-from app.api.database.db import async_engine
-from app.api.database.init_db import init_db
+from app.api.database.db import async_engine, replica_engine
+from app.api.database.replica import ReadYourWritesMiddleware
+from app.api.utils.query_counter import QueryCounterMiddleware, instrument_engine
+from app.api.utils.metrics import MetricsMiddleware
+from app.api.database.schema import check_schema_version
+from app.api.utils.http_clients import http_clients
+from app.api.services.site_stats_refresher import site_stats_refresher
+from app.api.services.outbox_services import outbox_worker
+from app.api.security.password_hasher import password_hasher
+from app.api.v1.routers import routers
+from app.api.utils.errors import register_auth_errors
 from starlette.middleware.sessions import SessionMiddleware
 
-# Load environment variables
-load_dotenv()
-
 # Create FastAPI instance
 app = FastAPI(title=settings.PROJECT_NAME)
 
@@ -32,8 +35,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Pin a client's reads to the primary right after its own writes (replica routing)
+if replica_engine is not None:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Per-request SQL statement count and DB time (X-DB-Queries / X-DB-Time headers)
+instrument_engine(async_engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine)
+app.add_middleware(QueryCounterMiddleware)
+
+# Route latency histograms served by GET /api/metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# 401/403 responses for the token and role dependencies
+register_auth_errors(app)
+
 # Session middleware
-app.add_middleware(SessionMiddleware, secret_key=os.getenv("SESSION_SECRET_KEY"))
+app.add_middleware(SessionMiddleware, secret_key=settings.SESSION_SECRET_KEY)
 
 # Logging setup
 def setup_logging():
@@ -58,16 +78,10 @@ def setup_logging():
 
 setup_logging()
 
-# Include routers dynamically
-router_folder = os.path.join(os.path.dirname(__file__), "api", "v1", "endpoints")
+# Include routers from the static registry in app/api/v1/routers.py
 def include_routers(app: FastAPI):
-    for module_name in os.listdir(router_folder):
-        if module_name.endswith(".py") and module_name != "__init__.py":
-            module_path = f"app.api.v1.endpoints.{module_name[:-3]}"
-            module = importlib.import_module(module_path)
-            if hasattr(module, "router"):
-                router = getattr(module, "router")
-                app.include_router(router, prefix=settings.ROUTE_PREFIX)
+    for router in routers:
+        app.include_router(router, prefix=settings.ROUTE_PREFIX)
 
 include_routers(app)
 
@@ -77,8 +91,9 @@ logging.info("App started successfully!")
 # Test database connection during startup
 @app.on_event("startup")
 async def on_startup():
-    await init_db()
-    logging.info("Database initialized with default roles and permissions.")
+    # Schema and seed data are applied by `python -m app.api.database.seed`, not here
+    if settings.SCHEMA_CHECK_ENABLED:
+        await check_schema_version()
 
     # Test the database connection
     try:
@@ -87,6 +102,24 @@ async def on_startup():
     except Exception as e:
         logging.error(f"Failed to connect to the database: {e}")
 
+    # Start the periodic site stats refresher (only the lock holder polls)
+    if settings.SITE_REFRESH_ENABLED:
+        await site_stats_refresher.start()
+
+    # Deliver queued Frappe writes (site creation, site data)
+    if settings.OUTBOX_ENABLED:
+        await outbox_worker.start()
+
+
+# Stop background work and close the pooled upstream HTTP clients on shutdown
+@app.on_event("shutdown")
+async def on_shutdown():
+    await site_stats_refresher.stop()
+    await outbox_worker.stop()
+    password_hasher.shutdown()
+    await http_clients.aclose()
+    logging.info("Upstream HTTP clients closed.")
+
 @app.get("/")
 async def home():
     return {'message': "Welcome"}
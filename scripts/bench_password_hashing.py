@@ -0,0 +1,83 @@
+"""
+Benchmark of event-loop latency while concurrent logins verify bcrypt passwords.
+
+Runs a probe task that sleeps for --tick ms in a loop and records how late it
+wakes up, while --logins concurrent verifications run. "inline" verifies on the
+event loop, as the app used to; "executor" goes through password_hasher's thread
+pool. Lag is what every other request on the worker would have waited.
+
+    python scripts/bench_password_hashing.py
+    python scripts/bench_password_hashing.py --logins 200 --workers 8 --rounds 10
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from fastapi import HTTPException
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.api.security.password_hasher import PasswordHasher  # noqa: E402
+
+
+async def probe(lags: list, tick: float, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append(time.perf_counter() - started - tick)
+
+
+async def run(mode: str, hasher: PasswordHasher, stored_hash: str, logins: int, tick: float):
+    lags, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, tick, stop))
+    rejected = 0
+
+    async def login():
+        nonlocal rejected
+        if mode == "inline":
+            hasher.context.verify("correct horse", stored_hash)
+            await asyncio.sleep(0)
+            return
+        try:
+            await hasher.verify("correct horse", stored_hash)
+        except HTTPException:
+            rejected += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{mode:>8} {elapsed:>9.2f} {(logins - rejected) / elapsed:>9.1f} {rejected:>8} "
+        f"{statistics.median(lags_ms):>9.1f} {p99:>9.1f} {lags_ms[-1]:>9.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50, help="concurrent password verifications")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--tick", type=float, default=10.0, help="probe interval in ms")
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(workers=args.workers, max_pending=args.max_pending, rounds=args.rounds)
+    stored_hash = hasher.context.hash("correct horse")
+
+    print(f"{args.logins} logins, bcrypt cost {args.rounds}, {args.workers} workers")
+    print(f"{'mode':>8} {'total s':>9} {'logins/s':>9} {'rejected':>8} {'lag p50':>9} {'lag p99':>9} {'lag max':>9}  (ms)")
+    for mode in ("inline", "executor"):
+        asyncio.run(run(mode, hasher, stored_hash, args.logins, args.tick / 1000))
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
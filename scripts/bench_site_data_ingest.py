@@ -0,0 +1,71 @@
+"""
+Benchmark for the /webhook/site-data ingest against payload size.
+
+Posts synthetic payloads with an increasing number of sites to a running app and
+prints the request time for each size. The email must belong to an existing user.
+
+    python scripts/bench_site_data_ingest.py --email owner@example.com
+    python scripts/bench_site_data_ingest.py --url http://localhost:8000/api/webhook/site-data --sizes 1 10 50 200 --repeat 5
+"""
+import argparse
+import statistics
+import time
+
+import httpx
+
+
+def build_payload(email: str, site_count: int, users_per_site: int) -> dict:
+    sites = []
+    for index in range(site_count):
+        site_name = f"bench-{index}.erp.staging.purpledove.net"
+        users = [
+            {"email": f"user{user}@bench-{index}.test", "full_name": f"User {user}"}
+            for user in range(users_per_site)
+        ]
+        modules = [{"module_name": f"Module {module}", "app_name": "erpnext"} for module in range(10)]
+        sites.append({
+            "site_info": {"site_name": site_name, "site_status": "active", "country": "Nigeria", "email": email},
+            "stats": {
+                "total_users": len(users),
+                "active_users": len(users) // 2,
+                "active_modules": len(modules),
+                "users": users,
+                "active_users_list": users[: len(users) // 2],
+                "modules": modules,
+            },
+        })
+    return {
+        "status": "success",
+        "data": {
+            "totals": {"total_sites": site_count, "active_sites": site_count},
+            "sites_data": sites,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000/api/webhook/site-data")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--users-per-site", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'sites':>6} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    with httpx.Client(timeout=120.0) as client:
+        for size in args.sizes:
+            payload = build_payload(args.email, size, args.users_per_site)
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.post(args.url, json=payload)
+                timings.append((time.perf_counter() - started) * 1000)
+                body = response.json()
+                if body.get("status") != "success":
+                    raise SystemExit(f"Ingest failed for {size} sites: {body}")
+            print(f"{size:>6} {statistics.median(timings):>10.1f} {min(timings):>8.1f} {max(timings):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
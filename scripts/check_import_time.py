@@ -0,0 +1,67 @@
+"""
+Import-time budget check for the app.
+
+Imports `app.main` in fresh interpreters under `python -X importtime`. It prints
+the median cumulative import time and the slowest modules. It exits non-zero when
+the median goes over the budget, so it can run in CI:
+
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --budget-ms 750 --runs 5 --top 20
+
+The app's settings need the usual environment variables (or a .env file).
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def import_times(module: str) -> dict:
+    """Cumulative import time in microseconds of every module imported by `module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    totals = [run[args.module] / 1000 for run in runs]
+    median = statistics.median(totals)
+
+    print("Slowest imports (cumulative, last run):")
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)
+    for name, micros in slowest[1:args.top + 1]:
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    print(f"{args.module}: median {median:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    if median > args.budget_ms:
+        print("Import time is over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
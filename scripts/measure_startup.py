@@ -0,0 +1,60 @@
+"""
+Measures app cold-start time: spawns uvicorn, polls GET / until it answers and
+reports the time from process start to first successful response.
+
+    python scripts/measure_startup.py
+    python scripts/measure_startup.py --runs 5 --workers 4
+
+Run it against the same database before and after a startup change to compare.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def measure_once(port: int, workers: int, timeout: float) -> float:
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+    ]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode} during startup")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/", timeout=0.5).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.05)
+        raise RuntimeError(f"App did not answer within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    timings = []
+    for run in range(args.runs):
+        elapsed = measure_once(args.port, args.workers, args.timeout)
+        timings.append(elapsed)
+        print(f"run {run + 1}: {elapsed * 1000:.0f} ms")
+
+    print(f"median {statistics.median(timings) * 1000:.0f} ms, min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
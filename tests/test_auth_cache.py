@@ -0,0 +1,69 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.api.dependencies.dependencies import get_current_user
+from app.api.utils.errors import InvalidToken
+from app.api.security import auth_cache
+
+
+USER_ID = uuid.uuid4()
+EMAIL = "user@example.com"
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Records every load_principal lookup; only USER_ID / EMAIL exist."""
+    calls = []
+
+    async def load_principal(db, user_id=None, email=None):
+        calls.append({"user_id": user_id} if user_id is not None else {"email": email})
+        if user_id != USER_ID and email != EMAIL:
+            return None
+        return auth_cache.Principal(USER_ID, EMAIL, "Test", "User", True, None, "customer", frozenset())
+
+    monkeypatch.setattr(auth_cache, "load_principal", load_principal)
+    auth_cache.principal_cache.invalidate_all()
+    yield calls
+    auth_cache.principal_cache.invalidate_all()
+
+
+def current_user(user_data: dict):
+    return asyncio.run(get_current_user(token_details={"user": user_data}, session=None))
+
+
+def test_token_with_id_is_loaded_once(loads):
+    token_user = {"id": str(USER_ID), "email": EMAIL}
+    assert current_user(token_user).id == USER_ID
+    assert current_user(token_user).id == USER_ID
+    assert loads == [{"user_id": USER_ID}]
+
+
+def test_google_token_without_id_falls_back_to_email(loads):
+    token_user = {"email": EMAIL, "first_name": "Test", "last_name": "User", "picture": None}
+    assert current_user(token_user).id == USER_ID
+    assert current_user(token_user).id == USER_ID
+    assert loads == [{"email": EMAIL}]
+
+    # Both token shapes share the cached principal
+    assert current_user({"id": str(USER_ID), "email": EMAIL}).id == USER_ID
+    assert len(loads) == 1
+
+
+def test_invalidate_drops_the_email_index(loads):
+    current_user({"email": EMAIL})
+    auth_cache.principal_cache.invalidate(USER_ID)
+    current_user({"email": EMAIL})
+    assert loads == [{"email": EMAIL}, {"email": EMAIL}]
+
+
+@pytest.mark.parametrize("user_data", [
+    {},
+    {"id": "not-a-uuid", "email": EMAIL},
+    {"id": str(uuid.uuid4())},
+    {"email": "someone-else@example.com"},
+])
+def test_unknown_or_malformed_users_are_rejected(loads, user_data):
+    with pytest.raises(InvalidToken):
+        current_user(user_data)
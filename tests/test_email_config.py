@@ -0,0 +1,36 @@
+import asyncio
+
+from app.api.config import email_config
+from app.api.utils.metrics import upstream_request_duration
+
+
+class StubFastMail:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, message):
+        self.sent.append(message)
+
+
+def test_send_mail_sends_through_fastmail(monkeypatch):
+    from fastapi_mail import MessageSchema
+
+    stub = StubFastMail()
+    monkeypatch.setattr(email_config, "get_fast_mail", lambda: stub)
+    message = MessageSchema(subject="Hi", recipients=["user@example.com"], body="Hello", subtype="plain")
+
+    asyncio.run(email_config.send_mail(message))
+
+    assert stub.sent == [message]
+    assert upstream_request_duration._series[("smtp", email_config.settings.SMTP_SERVER)][2] >= 1
+
+
+def test_verification_email_is_sent(monkeypatch):
+    stub = StubFastMail()
+    monkeypatch.setattr(email_config, "get_fast_mail", lambda: stub)
+
+    asyncio.run(email_config.EmailService().send_verification_email("user@example.com", "token123", "Ada"))
+
+    assert len(stub.sent) == 1
+    assert stub.sent[0].recipients == ["user@example.com"]
+    assert "token123" in stub.sent[0].body
@@ -0,0 +1,93 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.config.settings import settings
+from app.api.security import auth_cache
+from app.api.security.security import create_access_token
+from app.main import app
+
+
+ROUTES = ["/api/upstream-stats"]
+SCRAPE_TOKEN = "scrape-token"
+
+
+@pytest.fixture
+def principals(monkeypatch):
+    """user id -> role name; load_principal answers from it instead of the database."""
+    roles = {}
+
+    async def load_principal(db, user_id=None, email=None):
+        if user_id not in roles:
+            return None
+        return auth_cache.Principal(user_id, "user@example.com", "Test", "User", True, None, roles[user_id], frozenset())
+
+    monkeypatch.setattr(auth_cache, "load_principal", load_principal)
+    auth_cache.principal_cache.invalidate_all()
+    yield roles
+    auth_cache.principal_cache.invalidate_all()
+
+
+def bearer(user_id: uuid.UUID) -> dict:
+    token = asyncio.run(create_access_token({"id": str(user_id), "email": "user@example.com"}))
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_monitoring_requires_a_token(path):
+    response = TestClient(app).get(path)
+    assert response.status_code in (401, 403)
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_monitoring_rejects_non_admins(path, principals):
+    user_id = uuid.uuid4()
+    principals[user_id] = "customer"
+    response = TestClient(app).get(path, headers=bearer(user_id))
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_monitoring_allows_admins(path, principals):
+    user_id = uuid.uuid4()
+    principals[user_id] = "admin"
+    response = TestClient(app).get(path, headers=bearer(user_id))
+    assert response.status_code == 200
+
+
+def test_monitoring_rejects_invalid_tokens():
+    response = TestClient(app).get("/api/upstream-stats", headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 401
+
+
+@pytest.fixture
+def scrape_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_SCRAPE_TOKEN", SCRAPE_TOKEN)
+    return SCRAPE_TOKEN
+
+
+def test_metrics_accepts_the_scrape_token(scrape_token):
+    response = TestClient(app).get("/api/metrics", headers={"Authorization": f"Bearer {scrape_token}"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer wrong-token"}])
+def test_metrics_rejects_other_tokens(scrape_token, headers):
+    response = TestClient(app).get("/api/metrics", headers=headers)
+    assert response.status_code == 401
+
+
+def test_metrics_does_not_take_user_tokens(scrape_token, principals):
+    user_id = uuid.uuid4()
+    principals[user_id] = "admin"
+    response = TestClient(app).get("/api/metrics", headers=bearer(user_id))
+    assert response.status_code == 401
+
+
+def test_metrics_is_off_without_a_scrape_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_SCRAPE_TOKEN", None)
+    response = TestClient(app).get("/api/metrics", headers={"Authorization": f"Bearer {SCRAPE_TOKEN}"})
+    assert response.status_code == 404
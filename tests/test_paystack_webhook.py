@@ -0,0 +1,102 @@
+import hashlib
+import hmac
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+# Import every model so the mappers can resolve their relationships
+from app.api.models import (  # noqa: F401
+    card_model, outbox_message, paystack_webhook_event, permission, role, role_permission,
+    site_data, site_module, site_user, transactions, user_model, user_site_summary,
+)
+from app.api.config.settings import settings
+from app.api.database.db import get_db
+from app.api.models.paystack_webhook_event import PaystackWebhookEvent
+from app.api.models.transactions import UserTransactions
+from app.main import app
+
+
+URL = "/api/verify-webhook-payload/webhookpaystack"
+PAYSTACK_ID = 4099260516
+
+
+class AsyncSessionAdapter:
+    """Just enough of AsyncSession over a sync SQLite session for the webhook route."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def execute(self, statement):
+        return self.session.execute(statement)
+
+    async def commit(self):
+        self.session.commit()
+
+    async def rollback(self):
+        self.session.rollback()
+
+
+@pytest.fixture
+def session():
+    # One connection shared with the thread TestClient runs the app on
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    for table in (PaystackWebhookEvent.__table__, UserTransactions.__table__):
+        table.create(engine)
+    with Session(engine) as session:
+        session.add(UserTransactions(
+            plan="standard", payment_status="pending", first_name="Test", last_name="User",
+            email="user@example.com", phone="0", country="Nigeria", company_name="Test", organization="Test",
+            site_name="test.example.com", quantity=1, amount=1.0, training_and_setup=False,
+            valid_from=datetime(2026, 10, 1), valid_upto=datetime(2026, 11, 1), payment_reference="ref-1",
+            transaction_id=PAYSTACK_ID, message="ok", site_creation_job_id=uuid.uuid4(),
+        ))
+        session.commit()
+        yield session
+
+
+@pytest.fixture
+def client(session):
+    async def override_get_db():
+        yield AsyncSessionAdapter(session)
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+def signed(payload: dict):
+    body = json.dumps(payload).encode()
+    signature = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+    return body, {"x-paystack-signature": signature, "content-type": "application/json"}
+
+
+def test_signed_webhook_is_processed_once(client, session):
+    body, headers = signed({
+        "event": "charge.success",
+        "data": {"id": PAYSTACK_ID, "reference": "ref-1", "status": "success"},
+    })
+
+    first = client.post(URL, content=body, headers=headers)
+    assert first.status_code == 200
+    assert first.json()["message"] == "Webhook handled successfully."
+    transaction = session.query(UserTransactions).one()
+    session.refresh(transaction)
+    assert transaction.payment_status == "success"
+    assert transaction.paystack_status == "success"
+
+    second = client.post(URL, content=body, headers=headers)
+    assert second.status_code == 200
+    assert second.json()["message"] == "Webhook already processed."
+    assert session.query(PaystackWebhookEvent).count() == 1
+
+
+def test_unsigned_webhook_is_rejected(client):
+    body, headers = signed({"event": "charge.success", "data": {"id": PAYSTACK_ID, "reference": "ref-1"}})
+    response = client.post(URL, content=body, headers={**headers, "x-paystack-signature": "0" * 128})
+    assert response.status_code == 401
@@ -0,0 +1,119 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects.postgresql import Insert as PostgresInsert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+
+# Import every model so the mappers can resolve their relationships
+from app.api.models import (  # noqa: F401
+    card_model, outbox_message, paystack_webhook_event, permission, role, role_permission,
+    site_data, site_module, site_user, transactions, user_model, user_site_summary,
+)
+from app.api.models.product import Product, product_content_hash
+from app.api.services.product_services import (
+    apply_frappe_product, apply_product_webhook, frappe_item_to_row, upsert_products, webhook_item_to_row,
+)
+
+
+WEBHOOK_ITEM = {
+    "name": "ERP-STD",
+    "item_name": "ERP Standard",
+    "item_group": "Plans",
+    "description": "Standard plan",
+    "image": "https://example.com/std.png",
+    "images": ["https://example.com/std.png"],
+    "benefits": ["Support"],
+    "plans": {"monthly": 10},
+}
+
+
+class AsyncSessionAdapter:
+    """Just enough of AsyncSession over a sync SQLite session; Postgres upserts are recorded, not run."""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.upserted = []
+
+    async def execute(self, statement):
+        if isinstance(statement, PostgresInsert):
+            rows = statement.compile().params
+            self.upserted.append(rows)
+            return self.session.execute(select(text("0")).where(text("1 = 0")))
+        return self.session.execute(statement)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Product.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def stored_product(session: Session, row: dict) -> Product:
+    product = Product(id=uuid.uuid4(), product_code=row["product_code"], **{k: v for k, v in row.items() if k != "product_code"})
+    session.add(product)
+    session.commit()
+    return product
+
+
+def test_orm_insert_sets_content_hash(session):
+    row = webhook_item_to_row(WEBHOOK_ITEM)
+    product = stored_product(session, row)
+    assert product.content_hash == product_content_hash(row)
+
+
+def test_refresh_then_sync_rewrites_the_row(session):
+    row = webhook_item_to_row(WEBHOOK_ITEM)
+    product = stored_product(session, row)
+
+    # Background refresh changes the row through the ORM
+    assert apply_frappe_product(product, {"item_name": "ERP Standard (renamed)"})
+    session.commit()
+    assert product.content_hash == product_content_hash({**row, "product_title": "ERP Standard (renamed)"})
+
+    # A later sync carrying the original content must not be treated as unchanged
+    db = AsyncSessionAdapter(session)
+    results = asyncio.run(apply_product_webhook(db, [WEBHOOK_ITEM]))
+    assert results == [{"product_code": "ERP-STD", "action": "updated", "status": "success"}]
+    assert len(db.upserted) == 1
+
+
+def test_sync_of_identical_content_is_skipped(session):
+    stored_product(session, webhook_item_to_row(WEBHOOK_ITEM))
+    db = AsyncSessionAdapter(session)
+    results = asyncio.run(apply_product_webhook(db, [WEBHOOK_ITEM]))
+    assert results[0]["action"] == "unchanged"
+    assert db.upserted == []
+
+
+def test_refresh_then_sync_on_postgres(test_database_url):
+    async def run():
+        engine = create_async_engine(test_database_url)
+        try:
+            async with engine.connect() as conn:
+                transaction = await conn.begin()
+                try:
+                    from sqlalchemy.ext.asyncio import AsyncSession
+                    db = AsyncSession(bind=conn, expire_on_commit=False)
+                    item = {"name": f"hash-check-{uuid.uuid4()}", "item_name": "Original", "images": ["a.png"]}
+                    await upsert_products(db, [frappe_item_to_row(item)])
+
+                    product = (await db.execute(select(Product).where(Product.product_code == item["name"]))).scalar_one()
+                    apply_frappe_product(product, {"item_name": "Refreshed"})
+                    await db.flush()
+
+                    counts = await upsert_products(db, [frappe_item_to_row(item)])
+                    await db.refresh(product)
+                    return counts, product.product_title
+                finally:
+                    await transaction.rollback()
+        finally:
+            await engine.dispose()
+
+    counts, title = asyncio.run(run())
+    assert counts["updated"] == 1
+    assert title == "Original"
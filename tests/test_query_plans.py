@@ -0,0 +1,153 @@
+"""
+Query plan regression tests for the hot lookups.
+
+Seeds synthetic users, sites, transactions and outbox messages inside a transaction,
+runs ANALYZE, then EXPLAINs each hot query and fails if the plan sequentially scans
+the table the query looks up. Everything is rolled back at the end, so it can run
+against any migrated database. Skipped unless TEST_DATABASE_URL is set.
+"""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Import every model so the mappers can resolve their relationships
+from app.api.models import (  # noqa: F401
+    card_model, outbox_message, paystack_webhook_event, permission, product, role, role_permission,
+    site_data, site_module, site_user, transactions, user_model, user_site_summary,
+)
+from app.api.models.outbox_message import OutboxMessage
+from app.api.models.site_data import SiteData
+from app.api.models.transactions import UserTransactions
+
+
+USERS = 500
+SITES = 2000
+# Seeded transactions and outbox messages
+ROWS = 20000
+
+SEED_SQL = [
+    text(
+        "INSERT INTO users (id, first_name, last_name, email, password, created_at, updated_at, is_active) "
+        "SELECT md5('plancheck-user-' || g)::uuid, 'Plan', 'Check', 'plancheck-' || g || '@example.invalid', "
+        "'x', now(), now(), true FROM generate_series(1, :users) g"
+    ),
+    text(
+        "INSERT INTO site_data (id, site_name, user_id, created_at, updated_at) "
+        "SELECT md5('plancheck-site-' || g)::uuid, 'plancheck-' || g || '.example.invalid', "
+        "md5('plancheck-user-' || (g % :users + 1))::uuid, now(), now() FROM generate_series(1, :sites) g"
+    ),
+    text(
+        "INSERT INTO transactions (id, user_id, plan, payment_status, first_name, last_name, email, phone, "
+        "country, company_name, organization, site_name, quantity, amount, training_and_setup, valid_from, "
+        "valid_upto, payment_reference, transaction_id, message, site_creation_job_id, created_at, updated_at) "
+        "SELECT md5('plancheck-tx-' || g)::uuid, md5('plancheck-user-' || (g % :users + 1))::uuid, 'standard', "
+        "'success', 'Plan', 'Check', 'plancheck@example.invalid', '0', 'Nigeria', 'Plan Check', 'Plan Check', "
+        "'plancheck-' || (g % :sites + 1) || '.example.invalid', 1, 1.0, false, now(), now(), "
+        "'plancheck-ref-' || g, 9000000000 + g, 'ok', md5('plancheck-job-' || g)::uuid, "
+        "now() - g * interval '1 minute', now() FROM generate_series(1, :rows) g"
+    ),
+    # Mostly delivered messages with a few pending, like a healthy outbox
+    text(
+        "INSERT INTO outbox_messages (kind, payload, status, next_attempt_at) "
+        "SELECT 'create_frappe_site', '{}'::jsonb, CASE WHEN g % 100 = 0 THEN 'pending' ELSE 'done' END, "
+        "now() - g * interval '1 second' FROM generate_series(1, :rows) g"
+    ),
+]
+
+SEEDED_TABLES = ["users", "site_data", "transactions", "outbox_messages"]
+
+
+def hot_queries():
+    """name -> (table that must not be seq scanned, statement), mirroring the app's queries."""
+    site_name = f"plancheck-{SITES // 2}.example.invalid"
+    return {
+        "latest transaction for site (site-creation webhook)": (
+            "transactions",
+            select(UserTransactions).filter(UserTransactions.site_name == site_name)
+            .order_by(UserTransactions.created_at.desc()).limit(1),
+        ),
+        "transaction by Paystack id (Paystack webhook)": (
+            "transactions",
+            select(UserTransactions).filter(UserTransactions.transaction_id == 9000000000 + ROWS // 2),
+        ),
+        "transaction by payment reference": (
+            "transactions",
+            select(UserTransactions).filter(UserTransactions.payment_reference == f"plancheck-ref-{ROWS // 2}"),
+        ),
+        "transactions for user with sites (get_transactions_by_user_id)": (
+            "transactions",
+            select(UserTransactions, SiteData.active_sites)
+            .join(SiteData, UserTransactions.site_name == SiteData.site_name, isouter=True)
+            .filter(UserTransactions.user_id == text("md5('plancheck-user-1')::uuid")),
+        ),
+        "sites for user (dashboard)": (
+            "site_data",
+            select(SiteData.id, SiteData.site_name)
+            .where(SiteData.user_id == text("md5('plancheck-user-1')::uuid"))
+            .order_by(SiteData.site_name),
+        ),
+        "due outbox messages (outbox worker)": (
+            "outbox_messages",
+            select(OutboxMessage.id).where(OutboxMessage.status == "pending", OutboxMessage.next_attempt_at <= text("now()"))
+            .order_by(OutboxMessage.next_attempt_at).limit(10),
+        ),
+    }
+
+
+HOT_QUERIES = hot_queries()
+
+
+def compile_sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+async def explain_hot_queries(database_url: str) -> dict:
+    """name -> root plan node of every hot query, against freshly seeded and analyzed tables."""
+    engine = create_async_engine(database_url)
+    plans = {}
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            try:
+                params = {"users": USERS, "sites": SITES, "rows": ROWS}
+                for statement in SEED_SQL:
+                    await conn.execute(statement, params)
+                for table in SEEDED_TABLES:
+                    await conn.execute(text(f"ANALYZE {table}"))
+
+                for name, (_, statement) in HOT_QUERIES.items():
+                    result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {compile_sql(statement)}"))
+                    plan = result.scalar()
+                    plans[name] = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+            finally:
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+    return plans
+
+
+@pytest.fixture(scope="module")
+def plans(test_database_url):
+    return asyncio.run(explain_hot_queries(test_database_url))
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_an_index(plans, name):
+    table, statement = HOT_QUERIES[name]
+    seq_scans = [
+        node for node in plan_nodes(plans[name])
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") == table
+    ]
+    assert not seq_scans, (
+        f"{name} sequentially scans {table}:\n{compile_sql(statement)}\n{json.dumps(plans[name], indent=2)}"
+    )
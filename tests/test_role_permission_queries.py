@@ -0,0 +1,90 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+# Import every model so the mappers can resolve their relationships
+from app.api.models import (  # noqa: F401
+    card_model, outbox_message, paystack_webhook_event, permission, role, role_permission,
+    site_data, site_module, site_user, transactions, user_model, user_site_summary,
+)
+from app.api.models.permission import Permission
+from app.api.models.role import Role
+from app.api.models.role_permission import role_permissions, user_permissions
+from app.api.models.user_model import User
+from app.api.schemas.role_permission_schema import PermissionRevoke
+from app.api.utils.query_counter import instrument_engine
+from app.api.v1.endpoints.role_permission_routes import (
+    assign_single_or_multiple_permissions_to_role,
+    assign_single_or_multiple_permissions_to_user,
+    revoke_permissions_from_role,
+    revoke_permissions_from_user,
+)
+
+
+PERMISSIONS = 10
+
+
+class AsyncSessionAdapter:
+    """Just enough of AsyncSession over a sync SQLite session for the role/permission services."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def execute(self, statement):
+        return self.session.execute(statement)
+
+    async def commit(self):
+        self.session.commit()
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    for table in (Role.__table__, Permission.__table__, User.__table__, role_permissions, user_permissions):
+        table.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def seeded(session):
+    role = Role(id=uuid.uuid4(), name="manager")
+    user = User(id=uuid.uuid4(), first_name="Test", last_name="User", email="user@example.com", password="x")
+    permissions = [Permission(id=uuid.uuid4(), name=f"permission-{i}") for i in range(PERMISSIONS)]
+    session.add_all([role, user, *permissions])
+    session.commit()
+    return role.id, user.id, [permission.id for permission in permissions]
+
+
+def linked(session: Session, table, column, owner_id) -> int:
+    return len(session.execute(select(table).where(table.c[column] == owner_id)).all())
+
+
+def test_role_permissions_stay_within_budget(session, seeded, assert_query_budget):
+    role_id, _, permission_ids = seeded
+    db = AsyncSessionAdapter(session)
+
+    with assert_query_budget(assign_single_or_multiple_permissions_to_role):
+        asyncio.run(assign_single_or_multiple_permissions_to_role(role_id, permission_ids, db))
+    assert linked(session, role_permissions, "role_id", role_id) == PERMISSIONS
+
+    with assert_query_budget(revoke_permissions_from_role):
+        asyncio.run(revoke_permissions_from_role(role_id, PermissionRevoke(permission_ids=permission_ids[:5]), db))
+    assert linked(session, role_permissions, "role_id", role_id) == PERMISSIONS - 5
+
+
+def test_user_permissions_stay_within_budget(session, seeded, assert_query_budget):
+    _, user_id, permission_ids = seeded
+    db = AsyncSessionAdapter(session)
+
+    with assert_query_budget(assign_single_or_multiple_permissions_to_user):
+        asyncio.run(assign_single_or_multiple_permissions_to_user(user_id, permission_ids, db))
+    assert linked(session, user_permissions, "user_id", user_id) == PERMISSIONS
+
+    with assert_query_budget(revoke_permissions_from_user):
+        asyncio.run(revoke_permissions_from_user(user_id, PermissionRevoke(permission_ids=permission_ids[:5]), db))
+    assert linked(session, user_permissions, "user_id", user_id) == PERMISSIONS - 5
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.database import seed
+# Import every model so the mappers can resolve their relationships
+from app.api.models import (  # noqa: F401
+    card_model, outbox_message, paystack_webhook_event, permission, role, role_permission,
+    site_data, site_module, site_user, transactions, user_model, user_site_summary,
+)
+from app.api.services.dashboard_services import refresh_all_user_site_summaries
+
+
+class FakeConnection:
+    """Refuses statements while its transaction is aborted, like Postgres after an error."""
+
+    def __init__(self, broken: bool = False):
+        self.aborted = False
+        self.broken = broken
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement, params=None):
+        if self.broken:
+            raise ConnectionError("connection was closed")
+        if self.aborted:
+            raise RuntimeError("current transaction is aborted, commands ignored until end of transaction block")
+        self.statements.append(str(statement))
+
+    async def commit(self):
+        if self.aborted:
+            raise RuntimeError("current transaction is aborted")
+
+    async def rollback(self):
+        if self.broken:
+            raise ConnectionError("connection was closed")
+        self.aborted = False
+
+
+class FakeEngine:
+    def __init__(self, connection: FakeConnection):
+        self.connection = connection
+
+    def connect(self):
+        return self.connection
+
+
+def failing_migration(connection: FakeConnection, broken: bool = False):
+    async def migrate(conn):
+        conn.aborted = True
+        conn.broken = broken
+        raise ValueError("migration failed")
+    return migrate
+
+
+def test_failed_migration_is_reported_and_the_lock_released(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(seed, "async_engine", FakeEngine(connection))
+    monkeypatch.setattr(seed, "migrate", failing_migration(connection))
+
+    with pytest.raises(ValueError, match="migration failed"):
+        asyncio.run(seed.run())
+    assert "pg_advisory_unlock" in connection.statements[-1]
+
+
+def test_broken_connection_does_not_hide_the_original_error(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(seed, "async_engine", FakeEngine(connection))
+    monkeypatch.setattr(seed, "migrate", failing_migration(connection, broken=True))
+
+    with pytest.raises(ValueError, match="migration failed"):
+        asyncio.run(seed.run())
+
+
+@pytest.mark.parametrize("backfill_derived", [False, True])
+def test_backfill_runs_only_when_asked(monkeypatch, backfill_derived):
+    calls = []
+
+    async def record(name, conn):
+        calls.append(name)
+
+    monkeypatch.setattr(seed, "async_engine", FakeEngine(FakeConnection()))
+    monkeypatch.setattr(seed, "migrate", lambda conn: record("migrate", conn))
+    monkeypatch.setattr(seed, "seed_roles_and_permissions", lambda conn: record("seed", conn))
+    monkeypatch.setattr(seed, "backfill", lambda conn: record("backfill", conn))
+
+    asyncio.run(seed.run(backfill_derived=backfill_derived))
+    assert calls == ["migrate", "seed"] + (["backfill"] if backfill_derived else [])
+
+
+def test_summary_backfill_is_one_set_based_upsert():
+    class RecordingSession:
+        statements = []
+
+        async def execute(self, statement):
+            self.statements.append(statement)
+
+    db = RecordingSession()
+    asyncio.run(refresh_all_user_site_summaries(db))
+
+    assert len(db.statements) == 1
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "INSERT INTO user_site_summaries" in sql
+    assert "GROUP BY site_data.user_id" in sql
+    assert "ON CONFLICT (user_id) DO UPDATE" in sql
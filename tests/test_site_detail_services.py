@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import Column, MetaData, String, Table, create_engine, insert, select
+
+from app.api.services.site_detail_services import contains_pattern, parse_date_range
+
+
+NAMES = ["50% off", "500 off", "sales_report", "salesXreport", "back\\slash", "backslash"]
+
+
+def matching(search: str) -> list:
+    names = Table("names", MetaData(), Column("name", String))
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        names.create(conn)
+        conn.execute(insert(names), [{"name": name} for name in NAMES])
+        result = conn.execute(select(names.c.name).where(names.c.name.ilike(contains_pattern(search), escape="\\")))
+        return sorted(row.name for row in result)
+
+
+@pytest.mark.parametrize("search, expected", [
+    ("%", ["50% off"]),
+    ("_", ["sales_report"]),
+    ("s_r", ["sales_report"]),
+    ("\\", ["back\\slash"]),
+    ("SALES", ["salesXreport", "sales_report"]),
+])
+def test_search_wildcards_match_literally(search, expected):
+    assert matching(search) == expected
+
+
+def test_offset_aware_bounds_become_naive_utc():
+    date_from = datetime(2026, 10, 18, 9, 0, tzinfo=timezone(timedelta(hours=1)))
+    date_to = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+    assert parse_date_range(None, date_from, date_to) == (datetime(2026, 10, 18, 8, 0), datetime(2026, 10, 18, 12, 0))
+
+
+def test_naive_bounds_are_unchanged():
+    date_from, date_to = datetime(2026, 10, 1), datetime(2026, 10, 2)
+    assert parse_date_range("Today", date_from, date_to) == (date_from, date_to)
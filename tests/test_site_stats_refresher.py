@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.api.services import site_stats_refresher as refresher_module
+from app.api.services.site_stats_refresher import HOLDS_LOCK_SQL, SiteStatsRefresher
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class FakeConnection:
+    """A connection to a fake Postgres where `lock` says which connection holds the advisory lock."""
+
+    def __init__(self, lock: dict):
+        self.lock = lock
+        self.broken = False
+        self.closed = False
+
+    async def execute(self, statement, params=None):
+        if self.broken:
+            raise ConnectionError("connection was closed")
+        sql = str(statement)
+        if statement is HOLDS_LOCK_SQL:
+            return FakeResult(self.lock.get("holder") is self)
+        if "pg_try_advisory_lock" in sql:
+            if self.lock.get("holder") is None:
+                self.lock["holder"] = self
+            return FakeResult(self.lock["holder"] is self)
+        if "pg_advisory_unlock" in sql:
+            released = self.lock.get("holder") is self
+            if released:
+                self.lock["holder"] = None
+            return FakeResult(released)
+        raise AssertionError(f"unexpected statement {sql}")
+
+    async def commit(self):
+        if self.broken:
+            raise ConnectionError("connection was closed")
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeEngine:
+    def __init__(self, lock: dict):
+        self.lock = lock
+        self.connections = []
+
+    async def connect(self):
+        connection = FakeConnection(self.lock)
+        self.connections.append(connection)
+        return connection
+
+
+@pytest.fixture
+def lock(monkeypatch):
+    lock = {}
+    monkeypatch.setattr(refresher_module, "async_engine", FakeEngine(lock))
+    return lock
+
+
+def test_leader_keeps_the_lock_across_ticks(lock):
+    refresher = SiteStatsRefresher()
+    assert asyncio.run(refresher._is_leader())
+    assert asyncio.run(refresher._is_leader())
+    assert len(refresher_module.async_engine.connections) == 1
+
+
+def test_leader_steps_down_when_its_connection_drops(lock):
+    refresher = SiteStatsRefresher()
+    assert asyncio.run(refresher._is_leader())
+    first = refresher._leader_connection
+
+    # Postgres released the lock with the dropped connection, and another worker took it
+    first.broken = True
+    lock["holder"] = object()
+
+    assert not asyncio.run(refresher._is_leader())
+    assert refresher._leader_connection is None
+    assert first.closed
+
+
+def test_leader_steps_down_when_the_lock_is_gone(lock):
+    refresher = SiteStatsRefresher()
+    assert asyncio.run(refresher._is_leader())
+
+    # e.g. a proxy handed the session to a new backend
+    lock["holder"] = object()
+
+    assert not asyncio.run(refresher._is_leader())
+    assert refresher._leader_connection is None